@@ -0,0 +1,4 @@
+from .engine import alert_engine
+from .router import router
+
+__all__ = ["alert_engine", "router"]
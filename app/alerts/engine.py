@@ -0,0 +1,273 @@
+import asyncio
+from datetime import datetime
+from typing import Dict, List, Optional, Set, Tuple
+
+from loguru import logger
+
+from .. import cache
+from ..docker.inventory import container_inventory
+from ..models import AlertRule
+from ..system.utils.history import extract_series
+from .notifiers import WebhookNotifier, build_notifier
+from .window import SlidingWindow
+
+RULES_CHANNEL = "snakeos_alert_rules"
+
+
+def alert_series(snapshot: Dict) -> Dict[str, float]:
+    """
+    Series a snapshot offers to alert rules: the history series, disk usage by mountpoint and
+    the restart count of every container the Docker inventory knows.
+    """
+    values = extract_series(snapshot)
+    for disk in snapshot.get("disks") or ():
+        for key in ("percentage", "used", "free"):
+            values[f"disks.{disk['mountpoint']}.{key}"] = float(disk[key])
+    values.update(container_inventory.restart_series())
+    return values
+
+
+class _CompiledRule:
+    __slots__ = (
+        "id",
+        "name",
+        "metric",
+        "aggregation",
+        "operator",
+        "threshold",
+        "clear_threshold",
+        "window",
+        "notifiers",
+    )
+
+    def __init__(self, rule: AlertRule):
+        self.id = rule.id
+        self.name = rule.name
+        self.metric = rule.metric
+        self.aggregation = rule.aggregation
+        self.operator = rule.operator
+        self.threshold = rule.threshold
+        self.clear_threshold = (
+            rule.threshold if rule.clear_threshold is None else rule.clear_threshold
+        )
+        self.window = rule.window
+        self.notifiers = [
+            build_notifier(config) for config in rule.notifiers or [{"type": "log"}]
+        ]
+
+    def breached(self, value: float) -> bool:
+        return (
+            value > self.threshold if self.operator == ">" else value < self.threshold
+        )
+
+    def cleared(self, value: float) -> bool:
+        return (
+            value <= self.clear_threshold
+            if self.operator == ">"
+            else value >= self.clear_threshold
+        )
+
+
+class _SeriesState:
+    __slots__ = ("window", "value", "firing", "since")
+
+    def __init__(self, width: float):
+        self.window = SlidingWindow(width)
+        self.value: Optional[float] = None
+        self.firing = False
+        self.since: Optional[datetime] = None
+
+
+class AlertEngine:
+    """
+    Evaluates alert rules incrementally as samples arrive.
+    Rules are indexed by metric and the rules matching each series name are resolved once,
+    so a sample only touches the rules that apply to it; each of those does O(1) work.
+    With Redis, rule changes are broadcast so every worker, including the sampler leaseholder
+    that evaluates local samples, reloads the rule from the database.
+    """
+
+    def __init__(self):
+        self._rules: Dict[int, _CompiledRule] = {}
+        self._by_metric: Dict[str, List[_CompiledRule]] = {}
+        # Series name -> matching rules, rebuilt lazily after any rule change
+        self._routes: Dict[str, List[_CompiledRule]] = {}
+        self._states: Dict[Tuple[int, str], _SeriesState] = {}
+        # Source of samples (local, or a fleet node) -> keys of the states its series feed
+        self._sources: Dict[str, Set[Tuple[int, str]]] = {}
+        self._tasks: Set[asyncio.Task] = set()
+        self._listener: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        await self._load()
+        self._listener = asyncio.create_task(
+            cache.subscribe(RULES_CHANNEL, self._changed, self._reload)
+        )
+        logger.info(f"Alert engine started with {len(self._rules)} rules")
+
+    async def stop(self) -> None:
+        if self._listener:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+            self._listener = None
+        for task in list(self._tasks):
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        await WebhookNotifier.close()
+        logger.info("Alert engine stopped")
+
+    def upsert(self, rule: AlertRule) -> None:
+        """Add or replace a rule; its series state restarts from an empty window."""
+        self.remove(rule.id)
+        if not rule.enabled:
+            return
+        compiled = _CompiledRule(rule)
+        self._rules[rule.id] = compiled
+        self._by_metric.setdefault(compiled.metric, []).append(compiled)
+        self._routes.clear()
+
+    async def publish(self, rule_id: int) -> None:
+        """Have the other workers reload a rule that was created, changed or deleted."""
+        await cache.publish(RULES_CHANNEL, str(rule_id))
+
+    async def _load(self, rule_id: Optional[int] = None) -> None:
+        """Reload one rule, or all of them, from the database."""
+        if rule_id is None:
+            rules = await AlertRule.filter(enabled=True)
+            for stale in self._rules.keys() - {rule.id for rule in rules}:
+                self.remove(stale)
+        else:
+            rule = await AlertRule.get_or_none(id=rule_id)
+            if rule is None:
+                self.remove(rule_id)
+                return
+            rules = [rule]
+        for rule in rules:
+            self.upsert(rule)
+
+    def _spawn(self, coroutine) -> None:
+        task = asyncio.create_task(coroutine)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def _changed(self, message: str) -> None:
+        self._spawn(self._load(int(message)))
+
+    def _reload(self) -> None:
+        # Changes may have been missed while the subscription was down
+        self._spawn(self._load())
+
+    def remove(self, rule_id: int) -> None:
+        compiled = self._rules.pop(rule_id, None)
+        if compiled is None:
+            return
+        self._by_metric[compiled.metric].remove(compiled)
+        if not self._by_metric[compiled.metric]:
+            del self._by_metric[compiled.metric]
+        self._states = {
+            key: state for key, state in self._states.items() if key[0] != rule_id
+        }
+        for keys in self._sources.values():
+            keys.difference_update([key for key in keys if key[0] == rule_id])
+        self._routes.clear()
+
+    def _route(self, name: str) -> List[_CompiledRule]:
+        rules = self._routes.get(name)
+        if rules is None:
+            rules = []
+            prefix = name
+            while True:
+                rules.extend(self._by_metric.get(prefix, ()))
+                dot = prefix.rfind(".")
+                if dot < 0:
+                    break
+                prefix = prefix[:dot]
+            self._routes[name] = rules
+        return rules
+
+    def record_snapshot(self, snapshot: Dict) -> None:
+        """Sampler listener."""
+        self.observe(snapshot["sampled_at"], alert_series(snapshot))
+
+    def observe(
+        self, at: datetime, values: Dict[str, float], source: str = "local"
+    ) -> None:
+        """
+        Feed one sample holding every series of a source, e.g. the sampler or a fleet node.
+        The state of a series the source no longer sends (a removed container or interface) is dropped.
+        """
+        if not self._rules:
+            return
+        timestamp = at.timestamp()
+        keys = self._sources.setdefault(source, set())
+        for key in [key for key in keys if key[1] not in values]:
+            keys.discard(key)
+            self._states.pop(key, None)
+        for name, value in values.items():
+            for rule in self._route(name):
+                state = self._states.get((rule.id, name))
+                if state is None:
+                    state = self._states[(rule.id, name)] = _SeriesState(rule.window)
+                    keys.add((rule.id, name))
+                state.window.push(timestamp, value)
+                if not state.window.covers(timestamp):
+                    continue
+                state.value = aggregate = state.window.aggregate(rule.aggregation)
+                if not state.firing and rule.breached(aggregate):
+                    state.firing, state.since = True, at
+                    self._notify(rule, name, state, "firing")
+                elif state.firing and rule.cleared(aggregate):
+                    state.firing, state.since = False, at
+                    self._notify(rule, name, state, "resolved")
+
+    def _notify(
+        self, rule: _CompiledRule, series: str, state: _SeriesState, transition: str
+    ) -> None:
+        event = {
+            "rule_id": rule.id,
+            "rule": rule.name,
+            "series": series,
+            "state": transition,
+            "aggregation": rule.aggregation,
+            "value": state.value,
+            "operator": rule.operator,
+            "threshold": rule.threshold
+            if transition == "firing"
+            else rule.clear_threshold,
+            "at": state.since.isoformat(),
+        }
+        self._spawn(self._dispatch(rule, event))
+
+    async def _dispatch(self, rule: _CompiledRule, event: Dict) -> None:
+        results = await asyncio.gather(
+            *(notifier.send(event) for notifier in rule.notifiers),
+            return_exceptions=True,
+        )
+        for notifier, result in zip(rule.notifiers, results):
+            if isinstance(result, Exception):
+                logger.error(
+                    f"Alert notifier '{notifier.config['type']}' failed for '{rule.name}': {result}"
+                )
+
+    def states(self, firing_only: bool = False) -> List[Dict]:
+        result = []
+        for (rule_id, series), state in self._states.items():
+            if firing_only and not state.firing:
+                continue
+            result.append(
+                {
+                    "rule_id": rule_id,
+                    "rule": self._rules[rule_id].name,
+                    "series": series,
+                    "state": "firing" if state.firing else "ok",
+                    "value": state.value,
+                    "since": state.since,
+                }
+            )
+        return result
+
+
+alert_engine = AlertEngine()
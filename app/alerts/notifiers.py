@@ -0,0 +1,60 @@
+from typing import Dict, Optional, Type
+
+import httpx
+from loguru import logger
+
+from ..settings import settings
+
+
+class Notifier:
+    """Delivers alert state changes. Subclasses are registered in NOTIFIERS by type name."""
+
+    def __init__(self, config: Dict):
+        self.config = config
+
+    async def send(self, event: Dict) -> None:
+        raise NotImplementedError
+
+
+class LogNotifier(Notifier):
+    async def send(self, event: Dict) -> None:
+        log = logger.warning if event["state"] == "firing" else logger.info
+        log(
+            f"Alert '{event['rule']}' {event['state']}: {event['series']} "
+            f"{event['aggregation']}={event['value']} (threshold {event['operator']} {event['threshold']})"
+        )
+
+
+class WebhookNotifier(Notifier):
+    """POSTs the event as JSON to config["url"], with optional extra headers."""
+
+    _client: Optional[httpx.AsyncClient] = None
+
+    @classmethod
+    def client(cls) -> httpx.AsyncClient:
+        # One client for every webhook so connections to the same receiver are reused
+        if cls._client is None:
+            cls._client = httpx.AsyncClient(timeout=settings.ALERTS_WEBHOOK_TIMEOUT)
+        return cls._client
+
+    @classmethod
+    async def close(cls) -> None:
+        if cls._client is not None:
+            await cls._client.aclose()
+            cls._client = None
+
+    async def send(self, event: Dict) -> None:
+        response = await self.client().post(
+            self.config["url"], json=event, headers=self.config.get("headers")
+        )
+        response.raise_for_status()
+
+
+NOTIFIERS: Dict[str, Type[Notifier]] = {
+    "log": LogNotifier,
+    "webhook": WebhookNotifier,
+}
+
+
+def build_notifier(config: Dict) -> Notifier:
+    return NOTIFIERS[config["type"]](config)
@@ -0,0 +1,104 @@
+from typing import List
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+
+from ..auth.utils import get_admin_user, get_current_user
+from ..models import AlertRule, User
+from . import schemas
+from .engine import alert_engine
+
+router = APIRouter(prefix="/alerts", tags=["Alerts"])
+
+
+async def _get_rule(rule_id: int) -> AlertRule:
+    rule = await AlertRule.get_or_none(id=rule_id)
+    if rule is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Alert rule not found"
+        )
+    return rule
+
+
+async def _check_name(name: str, rule_id: int = None) -> None:
+    if await AlertRule.filter(name=name).exclude(id=rule_id).exists():
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Alert rule with this name already exists",
+        )
+
+
+@router.get("/rules", response_model=List[schemas.AlertRuleResponse])
+async def list_rules(_: User = Depends(get_current_user)):
+    """List all alert rules"""
+    return await AlertRule.all().order_by("id")
+
+
+@router.post(
+    "/rules",
+    response_model=schemas.AlertRuleResponse,
+    status_code=status.HTTP_201_CREATED,
+)
+async def create_rule(
+    rule_data: schemas.AlertRuleCreate, _: User = Depends(get_admin_user)
+):
+    """Create an alert rule; it is evaluated from the next sample on (admins only)"""
+    await _check_name(rule_data.name)
+    rule = await AlertRule.create(**rule_data.model_dump(mode="json"))
+    alert_engine.upsert(rule)
+    await alert_engine.publish(rule.id)
+    return rule
+
+
+@router.get("/rules/{rule_id}", response_model=schemas.AlertRuleResponse)
+async def get_rule(rule_id: int, _: User = Depends(get_current_user)):
+    """Get an alert rule"""
+    return await _get_rule(rule_id)
+
+
+@router.put("/rules/{rule_id}", response_model=schemas.AlertRuleResponse)
+async def update_rule(
+    rule_id: int,
+    rule_data: schemas.AlertRuleUpdate,
+    _: User = Depends(get_admin_user),
+):
+    """Update an alert rule; its window and state start over (admins only)"""
+    rule = await _get_rule(rule_id)
+    # clear_threshold is the only field that may be reset to null
+    changes = {
+        key: value
+        for key, value in rule_data.model_dump(mode="json", exclude_unset=True).items()
+        if value is not None or key == "clear_threshold"
+    }
+    if changes.get("name"):
+        await _check_name(changes["name"], rule_id)
+    rule.update_from_dict(changes)
+    try:
+        schemas.check_hysteresis(rule.operator, rule.threshold, rule.clear_threshold)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(e)
+        )
+    await rule.save()
+    alert_engine.upsert(rule)
+    await alert_engine.publish(rule.id)
+    return rule
+
+
+@router.delete("/rules/{rule_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_rule(rule_id: int, _: User = Depends(get_admin_user)):
+    """Delete an alert rule (admins only)"""
+    rule = await _get_rule(rule_id)
+    await rule.delete()
+    alert_engine.remove(rule_id)
+    await alert_engine.publish(rule_id)
+
+
+@router.get("/state", response_model=List[schemas.AlertState])
+async def get_alert_state(
+    firing: bool = Query(
+        False, description="Only return series that are currently firing"
+    ),
+    _: User = Depends(get_current_user),
+):
+    """Get the evaluation state of every rule and series it matched"""
+    return alert_engine.states(firing_only=firing)
@@ -0,0 +1,110 @@
+from datetime import datetime
+from typing import Any, Dict, List, Literal, Optional
+
+from pydantic import BaseModel, ConfigDict, Field, HttpUrl, model_validator
+
+Aggregation = Literal["avg", "min", "max", "last", "rate", "increase"]
+Operator = Literal[">", "<"]
+
+
+class NotifierConfig(BaseModel):
+    type: Literal["log", "webhook"] = Field(description="Notifier type")
+    url: Optional[HttpUrl] = Field(None, description="Webhook URL (webhook only)")
+    headers: Optional[Dict[str, str]] = Field(
+        None, description="Extra request headers (webhook only)"
+    )
+
+    @model_validator(mode="after")
+    def check_url(self):
+        if self.type == "webhook" and self.url is None:
+            raise ValueError("webhook notifiers require a url")
+        return self
+
+
+class AlertRuleBase(BaseModel):
+    name: str = Field(..., min_length=1, max_length=100, description="Unique rule name")
+    metric: str = Field(
+        ...,
+        description="Series name or prefix, e.g. cpu.total_cpu_usage, disks./.percentage or containers "
+        "(every containers.<name>.restarts series)",
+    )
+    aggregation: Aggregation = Field(
+        "avg", description="Aggregate of the series over the window"
+    )
+    operator: Operator = Field(
+        ">", description="Fire when the aggregate is above or below threshold"
+    )
+    threshold: float = Field(..., description="Value at which the rule fires")
+    clear_threshold: Optional[float] = Field(
+        None, description="Value at which a firing rule resolves (default: threshold)"
+    )
+    window: int = Field(60, ge=1, le=86400, description="Window length in seconds")
+    notifiers: List[NotifierConfig] = Field(
+        default_factory=lambda: [NotifierConfig(type="log")],
+        description="Where state changes are sent",
+    )
+    enabled: bool = Field(True, description="Whether the rule is evaluated")
+
+
+def check_hysteresis(
+    operator: str, threshold: float, clear_threshold: Optional[float]
+) -> None:
+    if clear_threshold is None:
+        return
+    if operator == ">" and clear_threshold > threshold:
+        raise ValueError("clear_threshold must not be above threshold for '>' rules")
+    if operator == "<" and clear_threshold < threshold:
+        raise ValueError("clear_threshold must not be below threshold for '<' rules")
+
+
+class AlertRuleCreate(AlertRuleBase):
+    @model_validator(mode="after")
+    def validate_hysteresis(self):
+        check_hysteresis(self.operator, self.threshold, self.clear_threshold)
+        return self
+
+
+class AlertRuleUpdate(BaseModel):
+    name: Optional[str] = Field(
+        None, min_length=1, max_length=100, description="Unique rule name"
+    )
+    metric: Optional[str] = Field(None, description="Series name or prefix")
+    aggregation: Optional[Aggregation] = Field(
+        None, description="Aggregate of the series over the window"
+    )
+    operator: Optional[Operator] = Field(
+        None, description="Fire when the aggregate is above or below threshold"
+    )
+    threshold: Optional[float] = Field(
+        None, description="Value at which the rule fires"
+    )
+    clear_threshold: Optional[float] = Field(
+        None, description="Value at which a firing rule resolves"
+    )
+    window: Optional[int] = Field(
+        None, ge=1, le=86400, description="Window length in seconds"
+    )
+    notifiers: Optional[List[NotifierConfig]] = Field(
+        None, description="Where state changes are sent"
+    )
+    enabled: Optional[bool] = Field(None, description="Whether the rule is evaluated")
+
+
+class AlertRuleResponse(AlertRuleBase):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    notifiers: List[Dict[str, Any]]
+    created_at: datetime
+    updated_at: datetime
+
+
+class AlertState(BaseModel):
+    rule_id: int = Field(description="ID of the rule")
+    rule: str = Field(description="Name of the rule")
+    series: str = Field(description="Series the rule matched")
+    state: Literal["ok", "firing"] = Field(description="Current state")
+    value: Optional[float] = Field(
+        None, description="Last evaluated aggregate, once the window is full"
+    )
+    since: Optional[datetime] = Field(None, description="Time of the last state change")
@@ -0,0 +1,80 @@
+import math
+from collections import deque
+from typing import Deque, Optional, Tuple
+
+AGGREGATIONS = ("avg", "min", "max", "last", "rate", "increase")
+
+
+class SlidingWindow:
+    """
+    Time-based window over a series with O(1) amortised updates and O(1) aggregates.
+    A running sum gives the average and monotonic deques give min and max, so a sample is
+    pushed and expired once and nothing is rescanned on evaluation.
+    """
+
+    __slots__ = ("width", "started", "_samples", "_min", "_max", "_sum", "_expired")
+
+    def __init__(self, width: float):
+        self.width = width
+        self.started: Optional[float] = None
+        self._samples: Deque[Tuple[float, float]] = deque()
+        # Candidates for the minimum (increasing values) and maximum (decreasing values)
+        self._min: Deque[Tuple[float, float]] = deque()
+        self._max: Deque[Tuple[float, float]] = deque()
+        self._sum = 0.0
+        self._expired = 0
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def push(self, timestamp: float, value: float) -> None:
+        if self.started is None:
+            self.started = timestamp
+        sample = (timestamp, value)
+        self._samples.append(sample)
+        self._sum += value
+        while self._min and self._min[-1][1] >= value:
+            self._min.pop()
+        self._min.append(sample)
+        while self._max and self._max[-1][1] <= value:
+            self._max.pop()
+        self._max.append(sample)
+        self._expire(timestamp - self.width)
+
+    def _expire(self, cutoff: float) -> None:
+        samples = self._samples
+        while samples and samples[0][0] <= cutoff:
+            sample = samples.popleft()
+            self._sum -= sample[1]
+            if self._min[0] is sample:
+                self._min.popleft()
+            if self._max[0] is sample:
+                self._max.popleft()
+            self._expired += 1
+        if self._expired > len(samples):
+            # Re-add the sum now and then so subtracting expired values cannot drift
+            self._sum = math.fsum(value for _, value in samples)
+            self._expired = 0
+
+    def covers(self, timestamp: float) -> bool:
+        """Whether the series has been observed for at least the full window."""
+        return self.started is not None and timestamp - self.started >= self.width
+
+    def aggregate(self, aggregation: str) -> Optional[float]:
+        samples = self._samples
+        if not samples:
+            return None
+        if aggregation == "avg":
+            return self._sum / len(samples)
+        if aggregation == "min":
+            return self._min[0][1]
+        if aggregation == "max":
+            return self._max[0][1]
+        if aggregation == "last":
+            return samples[-1][1]
+        (first_ts, first), (last_ts, last) = samples[0], samples[-1]
+        if aggregation == "increase":
+            return last - first
+        if aggregation == "rate":
+            return (last - first) / (last_ts - first_ts) if last_ts > first_ts else 0.0
+        raise ValueError(f"Unknown aggregation: {aggregation}")
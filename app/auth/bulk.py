@@ -0,0 +1,233 @@
+import codecs
+import json
+from typing import IO, Any, AsyncIterator, Dict, Iterator, List, Optional, Tuple
+
+from fastapi import HTTPException
+from pydantic import ValidationError
+from tortoise.exceptions import IntegrityError
+from tortoise.expressions import Q
+from tortoise.transactions import in_transaction
+
+from app.auth.hashing import password_hasher
+from app.auth.schemas import UserCreate
+from app.models.user import User
+from app.settings import settings
+
+# Largest single row accepted; bounds the parse buffer whatever the upload size
+MAX_ROW_BYTES = 64 * 1024
+
+
+class MalformedUpload(ValueError):
+    """The upload cannot be parsed any further; rows read so far are still processed."""
+
+
+def _loads(line: bytes) -> Any:
+    try:
+        return json.loads(line)
+    except ValueError as e:
+        # Returned rather than raised: one bad NDJSON line does not stop the upload
+        return ValueError(f"Invalid JSON: {e}")
+
+
+async def iter_ndjson(chunks: AsyncIterator[bytes]) -> AsyncIterator[Any]:
+    """One value per line of a newline-delimited JSON stream."""
+    buffer = b""
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            if line.strip():
+                yield _loads(line)
+        if len(buffer) > MAX_ROW_BYTES:
+            raise MalformedUpload(f"Line longer than {MAX_ROW_BYTES} bytes")
+    if buffer.strip():
+        yield _loads(buffer)
+
+
+async def iter_json_array(chunks: AsyncIterator[bytes]) -> AsyncIterator[Any]:
+    """Elements of a streamed JSON array, decoded one at a time as they arrive."""
+    decoder = json.JSONDecoder()
+    text = codecs.getincrementaldecoder("utf-8")()
+    buffer = ""
+    expect = (
+        "["  # then "first", "value" or "separator", and "end" after the closing bracket
+    )
+    rows = 0
+    async for chunk in chunks:
+        try:
+            buffer += text.decode(chunk)
+        except UnicodeDecodeError as e:
+            raise MalformedUpload(f"Invalid UTF-8: {e}")
+        pos = 0
+        while True:
+            while pos < len(buffer) and buffer[pos].isspace():
+                pos += 1
+            if pos == len(buffer):
+                break
+            char = buffer[pos]
+            if expect == "[":
+                if char != "[":
+                    raise MalformedUpload("Expected a JSON array of users")
+                expect, pos = "first", pos + 1
+            elif expect == "first" and char == "]":
+                expect, pos = "end", pos + 1
+            elif expect in ("first", "value"):
+                try:
+                    value, pos = decoder.raw_decode(buffer, pos)
+                except json.JSONDecodeError:
+                    # Most likely the element continues in the next chunk
+                    break
+                rows += 1
+                expect = "separator"
+                yield value
+            elif expect == "separator" and char in ",]":
+                expect, pos = ("value" if char == "," else "end"), pos + 1
+            else:
+                raise MalformedUpload(f"Malformed JSON array after row {rows}")
+        buffer = buffer[pos:]
+        if len(buffer) > MAX_ROW_BYTES:
+            raise MalformedUpload(
+                f"Malformed JSON array, or row {rows} longer than {MAX_ROW_BYTES} bytes"
+            )
+    if expect != "end":
+        raise MalformedUpload(f"Malformed or truncated JSON array after row {rows}")
+
+
+def _validation_detail(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(map(str, e['loc']))}: {e['msg']}" for e in error.errors()
+    )
+
+
+class _Results:
+    """Per-row outcomes written as NDJSON to out, with counts per status."""
+
+    def __init__(self, out: IO[bytes]):
+        self.out = out
+        self.summary: Dict[str, Any] = {
+            "total": 0,
+            "created": 0,
+            "conflict": 0,
+            "invalid": 0,
+            "failed": 0,
+        }
+
+    def add(
+        self, row: int, email: Optional[str], status: str, detail: Optional[str] = None
+    ) -> None:
+        self.summary[status] += 1
+        self.out.write(
+            json.dumps(
+                {"row": row, "email": email, "status": status, "detail": detail}
+            ).encode()
+            + b"\n"
+        )
+
+
+async def _provision(batch: List[Tuple[int, Any]], results: _Results) -> None:
+    valid: List[Tuple[int, UserCreate]] = []
+    for row, data in batch:
+        email = data.get("email") if isinstance(data, dict) else None
+        if isinstance(data, Exception):
+            results.add(row, None, "invalid", str(data))
+            continue
+        try:
+            valid.append((row, UserCreate.model_validate(data)))
+        except ValidationError as e:
+            results.add(
+                row,
+                email if isinstance(email, str) else None,
+                "invalid",
+                _validation_detail(e),
+            )
+    if not valid:
+        return
+
+    # One query for the whole batch; earlier batches are already inserted, so they are covered too
+    taken = await User.filter(
+        Q(email__in=list({user.email for _, user in valid}))
+        | Q(username__in=list({user.username for _, user in valid}))
+    ).values_list("email", "username")
+    taken_emails = {email for email, _ in taken}
+    taken_usernames = {username for _, username in taken}
+    accepted: List[Tuple[int, UserCreate]] = []
+    for row, user in valid:
+        if user.email in taken_emails:
+            results.add(
+                row, user.email, "conflict", "User with this email already exists"
+            )
+        elif user.username in taken_usernames:
+            results.add(
+                row, user.email, "conflict", "User with this username already exists"
+            )
+        else:
+            # Later duplicates within the batch conflict with this row
+            taken_emails.add(user.email)
+            taken_usernames.add(user.username)
+            accepted.append((row, user))
+    if not accepted:
+        return
+
+    try:
+        hashes = await password_hasher.hash_many(
+            [user.password for _, user in accepted]
+        )
+    except HTTPException as e:
+        for row, user in accepted:
+            results.add(row, user.email, "failed", e.detail)
+        return
+    users = [
+        User(email=user.email, username=user.username, hashed_password=hashed_password)
+        for (_, user), hashed_password in zip(accepted, hashes)
+    ]
+    try:
+        async with in_transaction():
+            await User.bulk_create(users, batch_size=settings.BULK_REGISTER_BATCH_SIZE)
+    except IntegrityError:
+        # A concurrent registration took a name after the check; find it row by row
+        for (row, user), instance in zip(accepted, users):
+            try:
+                await instance.save()
+            except IntegrityError:
+                results.add(
+                    row,
+                    user.email,
+                    "conflict",
+                    "User with this email or username already exists",
+                )
+            else:
+                results.add(row, user.email, "created")
+        return
+    for row, user in accepted:
+        results.add(row, user.email, "created")
+
+
+async def bulk_register(rows: AsyncIterator[Any], out: IO[bytes]) -> Dict[str, Any]:
+    """
+    Create users from a stream of UserCreate rows, BULK_REGISTER_BATCH_SIZE at a time.
+    Writes one NDJSON outcome per row to out and returns the counts per outcome.
+    """
+    results = _Results(out)
+    batch: List[Tuple[int, Any]] = []
+    try:
+        async for data in rows:
+            batch.append((results.summary["total"], data))
+            results.summary["total"] += 1
+            if len(batch) >= settings.BULK_REGISTER_BATCH_SIZE:
+                await _provision(batch, results)
+                batch = []
+    except MalformedUpload as e:
+        results.summary["error"] = str(e)
+    if batch:
+        await _provision(batch, results)
+    return results.summary
+
+
+def iter_file(file: IO[bytes], chunk_size: int = 64 * 1024) -> Iterator[bytes]:
+    """Stream a results file from the start, closing it once sent."""
+    try:
+        file.seek(0)
+        while chunk := file.read(chunk_size):
+            yield chunk
+    finally:
+        file.close()
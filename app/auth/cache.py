@@ -0,0 +1,371 @@
+import asyncio
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Set, Tuple
+
+from fastapi.encoders import jsonable_encoder
+from loguru import logger
+from redis.exceptions import RedisError
+from tortoise import connections
+from tortoise.signals import post_delete, post_save
+
+from app import cache
+from app.connections import get_redis
+from app.models.user import User
+from app.settings import settings
+
+try:
+    import asyncpg
+    from tortoise.backends.asyncpg import AsyncpgDBClient
+except ImportError:  # asyncpg not installed
+    asyncpg = AsyncpgDBClient = None
+
+INVALIDATION_CHANNEL = "snakeos_session_invalidation"
+
+# Share a validated session unless it was revoked while it was being validated: the token has
+# a tombstone, or the user's revocation generation moved past ARGV[1]
+_STORE_SCRIPT = """
+if redis.call('exists', KEYS[3]) == 1 then
+    return 0
+end
+if (redis.call('get', KEYS[4]) or '') ~= ARGV[1] then
+    return 0
+end
+redis.call('set', KEYS[1], ARGV[2], 'PX', ARGV[3])
+redis.call('sadd', KEYS[2], ARGV[4])
+redis.call('expire', KEYS[2], ARGV[5])
+return 1
+"""
+
+# Local and shared revocation generations, taken before a session is validated
+Generation = Tuple[int, str]
+
+
+def token_digest(token: str) -> bytes:
+    return hashlib.sha256(token.encode()).digest()
+
+
+# What authenticated requests read of a user; never the password hash, which must not leave the database
+SHARED_USER_FIELDS = (
+    "id",
+    "email",
+    "username",
+    "is_active",
+    "created_at",
+    "updated_at",
+)
+
+
+def _user_row(user: User) -> Dict:
+    return {name: getattr(user, name) for name in SHARED_USER_FIELDS}
+
+
+def _user_from_row(row: Dict) -> User:
+    # A partial instance, as .only() returns: save() must name its update_fields, so the missing
+    # hash can't be written back
+    return User._init_from_db(**row)
+
+
+class SessionCache:
+    """
+    Bounded LRU+TTL cache of validated sessions, keyed by the SHA-256 digest of the token.
+    An entry never outlives the token's exp. With Redis, validated sessions are also shared
+    between workers, and revocations are broadcast over Redis pub/sub; otherwise, on
+    PostgreSQL, with NOTIFY.
+    A validation that overlaps a revocation is not cached: callers take generation() before
+    reading the session and pass it to store(), which drops it if anything was revoked since.
+    """
+
+    def __init__(self, max_size: int, ttl: float):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self._entries: "OrderedDict[bytes, Tuple[User, float]]" = OrderedDict()
+        self._by_user: Dict[int, Set[bytes]] = {}
+        # Increased by every invalidation, including those of entries this worker doesn't hold
+        self._generation = 0
+        self._listener: Optional[asyncio.Task] = None
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, token: str) -> Optional[User]:
+        digest = token_digest(token)
+        entry = self._entries.get(digest)
+        if entry is None:
+            self.misses += 1
+            return None
+        user, expires_at = entry
+        if time.time() >= expires_at:
+            self._discard(digest)
+            self.misses += 1
+            return None
+        self._entries.move_to_end(digest)
+        self.hits += 1
+        return user
+
+    def put(self, token: str, user: User, token_expires_at: float) -> None:
+        digest = token_digest(token)
+        self._discard(digest)
+        self._entries[digest] = (user, min(token_expires_at, time.time() + self.ttl))
+        self._by_user.setdefault(user.id, set()).add(digest)
+        while len(self._entries) > self.max_size:
+            self._discard(next(iter(self._entries)))
+            self.evictions += 1
+
+    async def lookup(self, token: str) -> Optional[User]:
+        """User of a validated session, from this worker or the shared store."""
+        user = self.get(token)
+        if user is not None:
+            return user
+        redis = get_redis()
+        if redis is None:
+            return None
+        name = cache.key("session", token_digest(token).hex())
+        try:
+            async with redis.pipeline(transaction=False) as pipe:
+                data, ttl_ms = await pipe.get(name).pttl(name).execute()
+        except RedisError as e:
+            logger.warning(f"Shared session lookup failed: {e}")
+            return None
+        if data is None or ttl_ms <= 0:
+            return None
+        user = _user_from_row(json.loads(data))
+        self.shared_hits += 1
+        # The shared entry expires no later than the token, so the local copy must not outlive it either
+        self.put(token, user, time.time() + ttl_ms / 1000)
+        return user
+
+    async def generation(self, user_id: int) -> Generation:
+        """Revocation generation to pass to store(), taken before the session is read."""
+        shared = ""
+        redis = get_redis()
+        if redis is not None:
+            try:
+                shared = (
+                    await redis.get(cache.key("user-generation", str(user_id))) or ""
+                )
+            except RedisError as e:
+                logger.warning(f"Shared session generation unavailable: {e}")
+        return self._generation, shared
+
+    async def store(
+        self, token: str, user: User, token_expires_at: float, generation: Generation
+    ) -> None:
+        """Cache a validated session here and, with Redis, for the other workers."""
+        if generation[0] != self._generation:
+            # Something was revoked while the session was validated, possibly this one
+            return
+        self.put(token, user, token_expires_at)
+        redis = get_redis()
+        if redis is None:
+            return
+        ttl = min(token_expires_at - time.time(), self.ttl)
+        if ttl <= 0:
+            return
+        digest = token_digest(token).hex()
+        row = json.dumps(jsonable_encoder(_user_row(user)), separators=(",", ":"))
+        try:
+            stored = await redis.eval(
+                _STORE_SCRIPT,
+                4,
+                cache.key("session", digest),
+                cache.key("user-sessions", str(user.id)),
+                cache.key("session-revoked", digest),
+                cache.key("user-generation", str(user.id)),
+                generation[1],
+                row,
+                int(ttl * 1000),
+                digest,
+                int(self.ttl) + 1,
+            )
+        except RedisError as e:
+            logger.warning(f"Failed to share session: {e}")
+            return
+        if not stored:
+            # Revoked by another worker, whose broadcast may not have arrived yet
+            self._discard(token_digest(token))
+
+    def _discard(self, digest: bytes) -> None:
+        entry = self._entries.pop(digest, None)
+        if entry is None:
+            return
+        digests = self._by_user.get(entry[0].id)
+        if digests is not None:
+            digests.discard(digest)
+            if not digests:
+                del self._by_user[entry[0].id]
+
+    def invalidate_digest(self, digest: bytes) -> None:
+        self._generation += 1
+        if digest in self._entries:
+            self._discard(digest)
+            self.invalidations += 1
+
+    def invalidate_user(self, user_id: int) -> None:
+        self._generation += 1
+        for digest in list(self._by_user.get(user_id, ())):
+            self._discard(digest)
+            self.invalidations += 1
+
+    def clear(self) -> None:
+        self._generation += 1
+        self._entries.clear()
+        self._by_user.clear()
+
+    async def revoke_token(self, token: str) -> None:
+        """Drop a token here, in the shared store and in every other worker."""
+        digest = token_digest(token)
+        self.invalidate_digest(digest)
+        redis = get_redis()
+        if redis is not None:
+            try:
+                async with redis.pipeline(transaction=True) as pipe:
+                    # The tombstone keeps a validation still in flight from sharing it again
+                    pipe.set(
+                        cache.key("session-revoked", digest.hex()),
+                        1,
+                        ex=int(self.ttl) + 1,
+                    )
+                    pipe.delete(cache.key("session", digest.hex()))
+                    await pipe.execute()
+            except RedisError as e:
+                logger.warning(f"Failed to drop shared session: {e}")
+        await self._publish(f"t:{digest.hex()}")
+
+    async def revoke_user(self, user_id: int) -> None:
+        """Drop every session of a user here, in the shared store and in every other worker."""
+        self.invalidate_user(user_id)
+        redis = get_redis()
+        if redis is not None:
+            sessions = cache.key("user-sessions", str(user_id))
+            generation = cache.key("user-generation", str(user_id))
+            try:
+                async with redis.pipeline(transaction=True) as pipe:
+                    # Validations that read the user before this point can't share it anymore
+                    pipe.incr(generation)
+                    pipe.expire(generation, int(self.ttl) + 1)
+                    pipe.smembers(sessions)
+                    *_, digests = await pipe.execute()
+                await self._unshare(
+                    sessions, *(cache.key("session", digest) for digest in digests)
+                )
+            except RedisError as e:
+                logger.warning(f"Failed to drop shared sessions of user {user_id}: {e}")
+        await self._publish(f"u:{user_id}")
+
+    @staticmethod
+    async def _unshare(*keys: str) -> None:
+        redis = get_redis()
+        if redis is None:
+            return
+        try:
+            await redis.delete(*keys)
+        except RedisError as e:
+            logger.warning(f"Failed to drop shared session: {e}")
+
+    def _apply(self, message: str) -> None:
+        kind, _, value = message.partition(":")
+        if kind == "t":
+            self.invalidate_digest(bytes.fromhex(value))
+        elif kind == "u":
+            self.invalidate_user(int(value))
+
+    @staticmethod
+    def _postgres() -> Optional["AsyncpgDBClient"]:
+        client = connections.get("default")
+        if AsyncpgDBClient is not None and isinstance(client, AsyncpgDBClient):
+            return client
+        return None
+
+    async def _publish(self, message: str) -> None:
+        if get_redis() is not None:
+            await cache.publish(INVALIDATION_CHANNEL, message)
+            return
+        client = self._postgres()
+        if client is None:
+            return
+        try:
+            await client.execute_query(
+                "SELECT pg_notify($1, $2)", [INVALIDATION_CHANNEL, message]
+            )
+        except Exception as e:
+            # Other workers still drop the entry once its TTL runs out
+            logger.warning(f"Failed to broadcast session invalidation: {e}")
+
+    async def start(self) -> None:
+        if get_redis() is not None:
+            self._listener = asyncio.create_task(
+                cache.subscribe(INVALIDATION_CHANNEL, self._apply, self.clear)
+            )
+            return
+        client = self._postgres()
+        if client is not None:
+            self._listener = asyncio.create_task(self._listen(client))
+
+    async def stop(self) -> None:
+        if self._listener:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+            self._listener = None
+        self.clear()
+
+    async def _listen(self, client: "AsyncpgDBClient") -> None:
+        """Hold a dedicated LISTEN connection, reconnecting when it drops."""
+        while True:
+            connection = None
+            try:
+                connection = await asyncpg.connect(
+                    host=client.host,
+                    port=client.port,
+                    user=client.user,
+                    password=client.password,
+                    database=client.database,
+                )
+                closed = asyncio.Event()
+                connection.add_termination_listener(lambda _: closed.set())
+                await connection.add_listener(
+                    INVALIDATION_CHANNEL, lambda *args: self._apply(args[3])
+                )
+                logger.info("Listening for session invalidations")
+                await closed.wait()
+                logger.warning("Session invalidation listener disconnected")
+            except asyncio.CancelledError:
+                if connection is not None:
+                    await connection.close()
+                raise
+            except Exception as e:
+                logger.warning(f"Session invalidation listener failed: {e}")
+            # Invalidations may have been missed while disconnected
+            self.clear()
+            await asyncio.sleep(5)
+
+
+session_cache = SessionCache(
+    settings.AUTH_SESSION_CACHE_SIZE, settings.AUTH_SESSION_CACHE_TTL
+)
+
+
+@post_save(User)
+async def _user_saved(
+    sender, instance: User, created: bool, using_db, update_fields
+) -> None:
+    # Cached users would otherwise keep serving stale fields, including is_active.
+    # Queryset updates such as User.filter(...).update(is_active=False) send no signal: call
+    # session_cache.revoke_user() after them, or the change waits for AUTH_SESSION_CACHE_TTL
+    if not created:
+        await session_cache.revoke_user(instance.id)
+
+
+@post_delete(User)
+async def _user_deleted(sender, instance: User, using_db) -> None:
+    await session_cache.revoke_user(instance.id)
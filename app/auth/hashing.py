@@ -0,0 +1,141 @@
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from typing import List, Optional, Sequence, Tuple
+
+from fastapi import HTTPException, status
+from loguru import logger
+from passlib.context import CryptContext
+
+from app.settings import settings
+
+
+@lru_cache()
+def _context(rounds: int) -> CryptContext:
+    # Hashes with any other cost are reported as needing an update on verify
+    return CryptContext(
+        schemes=["bcrypt"],
+        deprecated="auto",
+        bcrypt__rounds=rounds,
+        bcrypt__min_rounds=rounds,
+        bcrypt__max_rounds=rounds,
+    )
+
+
+def _hash(password: str, rounds: int) -> str:
+    return _context(rounds).hash(password)
+
+
+def _hash_many(passwords: Sequence[str], rounds: int) -> List[str]:
+    context = _context(rounds)
+    return [context.hash(password) for password in passwords]
+
+
+def _verify_and_update(
+    password: str, hashed_password: str, rounds: int
+) -> Tuple[bool, Optional[str]]:
+    return _context(rounds).verify_and_update(password, hashed_password)
+
+
+def _warm_up() -> None:
+    _context(settings.BCRYPT_ROUNDS)
+
+
+class PasswordHasher:
+    """
+    Runs bcrypt in a process pool so password work never blocks the event loop.
+    At most PASSWORD_HASH_MAX_PENDING operations are queued or running; beyond that callers
+    get an immediate 503 with Retry-After instead of waiting behind a login burst.
+    """
+
+    def __init__(self, workers: int, max_pending: int):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.pending = 0
+        self.rejected = 0
+        self._executor: Optional[ProcessPoolExecutor] = None
+        # Bulk work runs on all workers but one, so logins always find a free process
+        self._bulk_slots = asyncio.Semaphore(max(1, workers - 1))
+
+    def _pool(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # spawn rather than fork: the server process already runs threads
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return self._executor
+
+    async def start(self) -> None:
+        """Start the worker processes up front so the first login does not pay for it."""
+        pool = self._pool()
+        await asyncio.gather(
+            *(asyncio.wrap_future(pool.submit(_warm_up)) for _ in range(self.workers))
+        )
+        logger.info(f"Password hashing pool started with {self.workers} workers")
+
+    def stop(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    async def _run(self, func, *args):
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Too many concurrent password operations, retry shortly",
+                headers={"Retry-After": "1"},
+            )
+        self.pending += 1
+        try:
+            return await asyncio.wrap_future(self._pool().submit(func, *args))
+        finally:
+            self.pending -= 1
+
+    async def hash(self, password: str) -> str:
+        return await self._run(_hash, password, settings.BCRYPT_ROUNDS)
+
+    async def hash_many(self, passwords: Sequence[str]) -> List[str]:
+        """
+        Hash a batch in chunks of PASSWORD_HASH_BULK_CHUNK. Chunks are submitted one per free bulk
+        slot rather than all at once, so the pool's queue never holds more than a chunk per slot
+        ahead of a login, and all bulk batches together count as at most `workers - 1` pending
+        operations.
+        """
+        size = settings.PASSWORD_HASH_BULK_CHUNK
+
+        async def hash_chunk(chunk: Sequence[str]) -> List[str]:
+            async with self._bulk_slots:
+                return await self._run(_hash_many, list(chunk), settings.BCRYPT_ROUNDS)
+
+        chunks = await asyncio.gather(
+            *(
+                hash_chunk(passwords[i : i + size])
+                for i in range(0, len(passwords), size)
+            )
+        )
+        return [hashed for chunk in chunks for hashed in chunk]
+
+    async def verify(
+        self, password: str, hashed_password: str
+    ) -> Tuple[bool, Optional[str]]:
+        """Return (valid, new_hash); new_hash is set when the stored hash uses outdated parameters."""
+        return await self._run(
+            _verify_and_update, password, hashed_password, settings.BCRYPT_ROUNDS
+        )
+
+
+def _available_cores() -> int:
+    # Respects CPU affinity (e.g. docker --cpuset-cpus) where the platform supports it
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+password_hasher = PasswordHasher(
+    settings.PASSWORD_HASH_WORKERS or _available_cores(),
+    settings.PASSWORD_HASH_MAX_PENDING,
+)
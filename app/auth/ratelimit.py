@@ -0,0 +1,161 @@
+import math
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from fastapi import Depends, HTTPException, Request, status
+from loguru import logger
+from redis.exceptions import RedisError
+
+from app import cache
+from app.auth.utils import get_current_user
+from app.connections import get_redis
+from app.models.user import User
+from app.settings import settings
+
+PERIODS = {"second": 1, "minute": 60, "hour": 3600, "day": 86400}
+
+# Token bucket in a hash; refills from the server clock so workers on different hosts agree.
+# Returns the seconds to wait as a string, "0" when a token was taken.
+_BUCKET_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'at')
+local tokens = tonumber(bucket[1]) or capacity
+local at = tonumber(bucket[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - at) * rate)
+local wait = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+else
+    wait = (1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'at', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil((capacity - tokens) / rate * 1000) + 1000)
+return tostring(wait)
+"""
+
+
+def parse_limit(limit: str) -> Tuple[int, float]:
+    """(capacity, tokens per second) of a limit such as "10/minute"."""
+    count, _, period = limit.partition("/")
+    if period.strip() not in PERIODS or not count.strip().isdigit() or int(count) < 1:
+        raise ValueError(f"Invalid rate limit '{limit}', expected e.g. '10/minute'")
+    return int(count), int(count) / PERIODS[period.strip()]
+
+
+class MemoryBackend:
+    """Token buckets of this worker. Buckets that have refilled completely are dropped when max_keys is reached."""
+
+    def __init__(self, max_keys: int):
+        self.max_keys = max_keys
+        # key -> [tokens, updated_at, full_at]
+        self._buckets: Dict[str, List[float]] = {}
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+    async def take(self, key: str, capacity: int, rate: float) -> float:
+        """Take a token; returns 0 on success, otherwise the seconds until one is available."""
+        now = time.monotonic()
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            if len(self._buckets) >= self.max_keys:
+                self._prune(now)
+            bucket = self._buckets[key] = [capacity, now, now]
+        else:
+            bucket[0] = min(capacity, bucket[0] + (now - bucket[1]) * rate)
+            bucket[1] = now
+        if bucket[0] < 1:
+            return (1 - bucket[0]) / rate
+        bucket[0] -= 1
+        bucket[2] = now + (capacity - bucket[0]) / rate
+        return 0.0
+
+    def _prune(self, now: float) -> None:
+        for key in [key for key, bucket in self._buckets.items() if bucket[2] <= now]:
+            del self._buckets[key]
+        # Still full of active clients: forget the oldest half rather than grow without bound
+        if len(self._buckets) >= self.max_keys:
+            for key in list(self._buckets)[: len(self._buckets) // 2]:
+                del self._buckets[key]
+
+
+class RateLimiter:
+    """
+    Token-bucket rate limits per route and principal, in memory or, with RATE_LIMIT_BACKEND=redis,
+    shared between workers. Redis errors fail over to the memory buckets rather than rejecting requests.
+    """
+
+    def __init__(self):
+        self.memory = MemoryBackend(settings.RATE_LIMIT_MAX_KEYS)
+        self.rejected: Dict[str, int] = {}
+        self._script = None
+
+    async def take(self, key: str, capacity: int, rate: float) -> float:
+        redis = get_redis() if settings.RATE_LIMIT_BACKEND == "redis" else None
+        if redis is None:
+            return await self.memory.take(key, capacity, rate)
+        if self._script is None:
+            self._script = redis.register_script(_BUCKET_SCRIPT)
+        try:
+            return float(
+                await self._script(
+                    keys=[cache.key("ratelimit", key)],
+                    args=[capacity, rate],
+                    client=redis,
+                )
+            )
+        except RedisError as e:
+            logger.warning(f"Shared rate limit unavailable, limiting per worker: {e}")
+            return await self.memory.take(key, capacity, rate)
+
+    async def check(
+        self, name: str, principal: str, capacity: int, rate: float
+    ) -> None:
+        wait = await self.take(f"{name}:{principal}", capacity, rate)
+        if wait <= 0:
+            return
+        self.rejected[name] = self.rejected.get(name, 0) + 1
+        retry_after = max(1, math.ceil(wait))
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=f"Rate limit exceeded, retry in {retry_after}s",
+            headers={"Retry-After": str(retry_after)},
+        )
+
+
+rate_limiter = RateLimiter()
+
+
+def _client_ip(request: Request) -> str:
+    # Behind a proxy, run uvicorn with --proxy-headers so this is the real client
+    return request.client.host if request.client else "unknown"
+
+
+async def _unlimited() -> None:
+    return None
+
+
+def rate_limit(name: str, per_user: bool = True) -> Callable:
+    """
+    Route dependency enforcing RATE_LIMITS[name] per authenticated user, or per client IP
+    for routes used before login. Without a configured limit it does nothing.
+    """
+    limit: Optional[str] = settings.RATE_LIMITS.get(name)
+    if not settings.RATE_LIMIT_ENABLED or not limit:
+        return _unlimited
+    capacity, rate = parse_limit(limit)
+
+    if per_user:
+
+        async def limit_user(user: User = Depends(get_current_user)) -> None:
+            await rate_limiter.check(name, f"user:{user.id}", capacity, rate)
+
+        return limit_user
+
+    async def limit_ip(request: Request) -> None:
+        await rate_limiter.check(name, f"ip:{_client_ip(request)}", capacity, rate)
+
+    return limit_ip
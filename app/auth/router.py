@@ -1,14 +1,22 @@
+import json
+import tempfile
 from datetime import datetime, timedelta
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from fastapi.responses import StreamingResponse
 from fastapi.security import HTTPBearer
+from app.auth.bulk import bulk_register, iter_file, iter_json_array, iter_ndjson
+from app.auth.cache import session_cache
 from app.auth.schemas import UserCreate, UserLogin, Token, UserResponse
 from app.auth.utils import (
     get_password_hash,
     authenticate_user,
     create_access_token,
+    get_admin_user,
     get_current_user,
+    hash_token,
 )
 from app.models.user import User, Session
+from app.auth.ratelimit import rate_limit
 from app.settings import settings
 
 router = APIRouter(prefix="/auth", tags=["Authentication"])
@@ -16,7 +24,10 @@ security = HTTPBearer()
 
 
 @router.post(
-    "/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED
+    "/register",
+    response_model=UserResponse,
+    status_code=status.HTTP_201_CREATED,
+    dependencies=[Depends(rate_limit("register", per_user=False))],
 )
 async def register(user_data: UserCreate):
     # Check if user exists
@@ -33,7 +44,7 @@ async def register(user_data: UserCreate):
         )
 
     # Create new user
-    hashed_password = get_password_hash(user_data.password)
+    hashed_password = await get_password_hash(user_data.password)
     user = await User.create(
         email=user_data.email,
         username=user_data.username,
@@ -43,7 +54,11 @@ async def register(user_data: UserCreate):
     return user
 
 
-@router.post("/login", response_model=Token)
+@router.post(
+    "/login",
+    response_model=Token,
+    dependencies=[Depends(rate_limit("login", per_user=False))],
+)
 async def login(user_data: UserLogin):
     user = await authenticate_user(user_data.email, user_data.password)
     if not user:
@@ -61,7 +76,9 @@ async def login(user_data: UserLogin):
 
     # Create session
     expires_at = datetime.utcnow() + access_token_expires
-    await Session.create(user=user, token=access_token, expires_at=expires_at)
+    await Session.create(
+        user=user, token_hash=hash_token(access_token), expires_at=expires_at
+    )
 
     return Token(access_token=access_token)
 
@@ -69,12 +86,38 @@ async def login(user_data: UserLogin):
 @router.post("/logout")
 async def logout(credentials: HTTPBearer = Depends(security)):
     # Deactivate the current session
-    await Session.filter(token=credentials.credentials, is_active=True).update(
-        is_active=False
-    )
+    await Session.filter(
+        token_hash=hash_token(credentials.credentials), is_active=True
+    ).update(is_active=False)
+    await session_cache.revoke_token(credentials.credentials)
     return {"message": "Successfully logged out"}
 
 
 @router.get("/me", response_model=UserResponse)
 async def get_current_user_info(current_user: User = Depends(get_current_user)):
     return current_user
+
+
+@router.post("/users/bulk")
+async def bulk_register_users(request: Request, _: User = Depends(get_admin_user)):
+    """
+    Register users from a JSON array or, with Content-Type application/x-ndjson, one JSON user per line.
+    Rows are processed in batches while the upload is read. The response is NDJSON: one
+    {"row", "email", "status", "detail"} line per row (status created, conflict, invalid or failed),
+    then a {"summary": ...} line.
+    """
+    content_type = request.headers.get("content-type", "")
+    ndjson = "ndjson" in content_type or "jsonlines" in content_type
+    rows = (
+        iter_ndjson(request.stream()) if ndjson else iter_json_array(request.stream())
+    )
+
+    # Outcomes spill to disk on large uploads instead of accumulating in memory
+    results = tempfile.SpooledTemporaryFile(max_size=1024 * 1024)
+    try:
+        summary = await bulk_register(rows, results)
+    except BaseException:
+        results.close()
+        raise
+    results.write(json.dumps({"summary": summary}).encode() + b"\n")
+    return StreamingResponse(iter_file(results), media_type="application/x-ndjson")
@@ -0,0 +1,71 @@
+import asyncio
+from datetime import datetime
+from typing import Optional
+
+from loguru import logger
+from tortoise.expressions import Q
+
+from app.models.user import Session
+from app.settings import settings
+from app.system.utils import sampler
+
+
+class SessionSweeper:
+    """
+    Deletes expired and logged-out sessions in the background.
+    Only the worker holding the sampler lease sweeps, so workers don't delete the same rows.
+    Rows are removed in batches of SESSION_SWEEP_BATCH_SIZE so no single statement holds locks
+    on a large part of the table, and the event loop is yielded between batches.
+    """
+
+    def __init__(self):
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+        logger.info(
+            f"Session sweeper started with {settings.SESSION_SWEEP_INTERVAL}s interval"
+        )
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            # Leadership is only known once the sampler has run, so the first sweep waits too
+            await asyncio.sleep(settings.SESSION_SWEEP_INTERVAL)
+            if not sampler.leader:
+                continue
+            try:
+                await self.sweep()
+            except Exception:
+                logger.exception("Failed to sweep sessions")
+
+    async def sweep(self) -> int:
+        # Sessions are stored with naive UTC timestamps (see login)
+        predicate = Q(is_active=False) | Q(expires_at__lte=datetime.utcnow())
+        deleted = 0
+        while True:
+            ids = (
+                await Session.filter(predicate)
+                .limit(settings.SESSION_SWEEP_BATCH_SIZE)
+                .values_list("id", flat=True)
+            )
+            if not ids:
+                break
+            deleted += await Session.filter(id__in=ids).delete()
+            if len(ids) < settings.SESSION_SWEEP_BATCH_SIZE:
+                break
+            await asyncio.sleep(0)
+        if deleted:
+            logger.info(f"Session sweeper removed {deleted} sessions")
+        return deleted
+
+
+session_sweeper = SessionSweeper()
@@ -1,27 +1,38 @@
+import secrets
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Optional, Tuple
 from jose import JWTError, jwt
-from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer
 from app.models.user import User, Session
+from app.auth.cache import session_cache, token_digest
+from app.auth.hashing import password_hasher
 from app.auth.schemas import TokenData
 from app.settings import settings
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 security = HTTPBearer()
 
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+async def verify_password(
+    plain_password: str, hashed_password: str
+) -> Tuple[bool, Optional[str]]:
+    """Check a password off the event loop; also returns a new hash when the bcrypt cost changed."""
+    return await password_hasher.verify(plain_password, hashed_password)
 
 
-def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
+async def get_password_hash(password: str) -> str:
+    return await password_hasher.hash(password)
+
+
+def hash_token(token: str) -> str:
+    """Fixed-size digest sessions are stored and looked up by, instead of the raw token."""
+    return token_digest(token).hex()
 
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     to_encode = data.copy()
+    # A unique ID keeps tokens issued for the same user in the same second distinct
+    to_encode.setdefault("jti", secrets.token_hex(16))
     if expires_delta:
         expire = datetime.utcnow() + expires_delta
     else:
@@ -37,14 +48,30 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
 
 
 async def get_current_user(credentials: HTTPBearer = Depends(security)) -> User:
+    return await authenticate_token(credentials.credentials)
+
+
+async def get_admin_user(user: User = Depends(get_current_user)) -> User:
+    if user.email not in settings.ADMIN_EMAILS:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN, detail="Admin privileges required"
+        )
+    return user
+
+
+async def authenticate_token(token: str) -> User:
+    """Validate a JWT against its active session and return the owning user."""
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
 
+    user = await session_cache.lookup(token)
+    if user is not None:
+        return user
+
     try:
-        token = credentials.credentials
         payload = jwt.decode(
             token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
         )
@@ -58,9 +85,12 @@ async def get_current_user(credentials: HTTPBearer = Depends(security)) -> User:
     except JWTError:
         raise credentials_exception
 
+    # Taken before the reads, so a logout racing them keeps the session out of the cache
+    generation = await session_cache.generation(token_data.user_id)
+
     # Verify token in session
     session = await Session.get_or_none(
-        token=token, is_active=True, expires_at__gt=datetime.utcnow()
+        token_hash=hash_token(token), is_active=True, expires_at__gt=datetime.utcnow()
     )
     if not session:
         raise credentials_exception
@@ -69,6 +99,7 @@ async def get_current_user(credentials: HTTPBearer = Depends(security)) -> User:
     if user is None:
         raise credentials_exception
 
+    await session_cache.store(token, user, payload["exp"], generation)
     return user
 
 
@@ -76,6 +107,11 @@ async def authenticate_user(email: str, password: str) -> Optional[User]:
     user = await User.get_or_none(email=email, is_active=True)
     if not user:
         return None
-    if not verify_password(password, user.hashed_password):
+    valid, new_hash = await verify_password(password, user.hashed_password)
+    if not valid:
         return None
+    if new_hash:
+        # Transparently upgrade the hash to the configured BCRYPT_ROUNDS
+        user.hashed_password = new_hash
+        await user.save(update_fields=["hashed_password"])
     return user
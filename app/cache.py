@@ -0,0 +1,85 @@
+import asyncio
+import json
+from typing import Any, Callable, Optional
+
+from fastapi.encoders import jsonable_encoder
+from loguru import logger
+from redis.exceptions import RedisError
+
+from .connections import get_redis
+from .settings import settings
+
+
+def key(*parts: str) -> str:
+    """Namespaced Redis key or channel name."""
+    return ":".join((settings.REDIS_KEY_PREFIX, *parts))
+
+
+async def get_json(name: str) -> Optional[Any]:
+    """Value shared between workers, or None when missing, expired or Redis is not available."""
+    redis = get_redis()
+    if redis is None:
+        return None
+    try:
+        value = await redis.get(key(name))
+    except RedisError as e:
+        logger.warning(f"Redis read of '{name}' failed: {e}")
+        return None
+    return json.loads(value) if value is not None else None
+
+
+async def set_json(name: str, value: Any, ttl: float) -> None:
+    """Share a value with the other workers for ttl seconds; a no-op without Redis."""
+    redis = get_redis()
+    if redis is None:
+        return
+    try:
+        await redis.set(
+            key(name),
+            json.dumps(jsonable_encoder(value), separators=(",", ":")),
+            px=max(1, int(ttl * 1000)),
+        )
+    except RedisError as e:
+        logger.warning(f"Redis write of '{name}' failed: {e}")
+
+
+async def publish(channel: str, message: str) -> bool:
+    """Publish to the other workers; False when Redis is not available or the publish failed."""
+    redis = get_redis()
+    if redis is None:
+        return False
+    try:
+        await redis.publish(key(channel), message)
+    except RedisError as e:
+        logger.warning(f"Redis publish on '{channel}' failed: {e}")
+        return False
+    return True
+
+
+async def subscribe(
+    channel: str, handler: Callable[[str], None], on_reconnect: Callable[[], None]
+) -> None:
+    """
+    Call handler with every message published on channel, until cancelled.
+    on_reconnect runs after the subscription dropped, as messages may have been missed meanwhile.
+    """
+    while True:
+        redis = get_redis()
+        if redis is None:
+            return
+        pubsub = redis.pubsub(ignore_subscribe_messages=True)
+        try:
+            await pubsub.subscribe(key(channel))
+            logger.info(f"Subscribed to Redis channel '{channel}'")
+            async for message in pubsub.listen():
+                try:
+                    handler(message["data"])
+                except Exception:
+                    logger.exception(f"Handler for Redis channel '{channel}' failed")
+            logger.warning(f"Redis subscription to '{channel}' ended")
+        except RedisError as e:
+            logger.warning(f"Redis subscription to '{channel}' failed: {e}")
+        finally:
+            await pubsub.aclose()
+        on_reconnect()
+        await asyncio.sleep(5)
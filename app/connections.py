@@ -1,10 +1,42 @@
+from typing import Optional
+
 from fastapi import FastAPI
-from tortoise import Tortoise
+from redis.asyncio import ConnectionPool, Redis
+from redis.exceptions import RedisError
+from tortoise import Tortoise, connections
 from app.settings import settings
 from loguru import logger
 from tortoise.contrib.fastapi import register_tortoise
 
 
+async def _table_columns(table: str) -> set[str]:
+    """Column names of a table, empty when it does not exist."""
+    connection = connections.get("default")
+    if connection.capabilities.dialect == "sqlite":
+        _, rows = await connection.execute_query(f"PRAGMA table_info({table})")
+        return {row["name"] for row in rows}
+    _, rows = await connection.execute_query(
+        "SELECT column_name FROM information_schema.columns WHERE table_name = "
+        + ("$1" if connection.capabilities.dialect == "postgres" else "%s"),
+        [table],
+    )
+    return {row["column_name"] for row in rows}
+
+
+async def migrate_sessions():
+    """
+    Drop a sessions table created before sessions were stored by token digest.
+    generate_schemas only creates missing tables, so it would keep the old columns; the table is
+    recreated right after, and every user has to log in again.
+    """
+    columns = await _table_columns("sessions")
+    if columns and "token_hash" not in columns:
+        logger.warning(
+            "Dropping the sessions table of the old schema, all users are logged out"
+        )
+        await connections.get("default").execute_script("DROP TABLE IF EXISTS sessions")
+
+
 async def init_tortoise(app: FastAPI):
     """
     Initialize Tortoise ORM with PostgreSQL database connection.
@@ -14,6 +46,7 @@ async def init_tortoise(app: FastAPI):
         db_url=settings.DB_URL,
         modules={"models": ["app.models"]},
     )
+    await migrate_sessions()
     await Tortoise.generate_schemas()
 
     # Register exception handlers
@@ -26,31 +59,61 @@ async def init_tortoise(app: FastAPI):
     )
 
 
+_redis: Optional[Redis] = None
+
+
+def get_redis() -> Optional[Redis]:
+    """
+    Shared Redis client, or None when Redis is not configured or was unreachable at startup.
+    Callers fall back to in-process state in that case.
+    """
+    return _redis
+
+
 async def init_redis():
     """
-    Initialize Redis connection if configured.
+    Initialize the pooled Redis client if configured.
     """
-    if settings.REDIS_HOST and settings.REDIS_PORT:
-        # Redis connection logic would go here
-        # Example: redis = await aioredis.create_redis_pool(f'redis://{settings.REDIS_HOST}:{settings.REDIS_PORT}')
-        logger.info(
-            f"Redis connection initialized to {settings.REDIS_HOST}:{settings.REDIS_PORT}"
-        )
-    else:
+    global _redis
+    if not (settings.REDIS_HOST and settings.REDIS_PORT):
         logger.info("Redis connection not configured, skipping")
+        return
+
+    pool = ConnectionPool(
+        host=settings.REDIS_HOST,
+        port=settings.REDIS_PORT,
+        password=settings.REDIS_PASSWORD,
+        db=settings.REDIS_DB or 0,
+        max_connections=settings.REDIS_MAX_CONNECTIONS,
+        decode_responses=True,
+        socket_connect_timeout=5,
+        health_check_interval=30,
+    )
+    client = Redis(connection_pool=pool)
+    try:
+        await client.ping()
+    except RedisError as e:
+        # Each worker keeps working on its own rather than refusing to start
+        logger.warning(
+            f"Redis at {settings.REDIS_HOST}:{settings.REDIS_PORT} unreachable, using in-process state: {e}"
+        )
+        await client.aclose()
+        return
+    _redis = client
+    logger.info(
+        f"Redis connection initialized to {settings.REDIS_HOST}:{settings.REDIS_PORT}"
+    )
 
 
 async def close_redis():
     """
     Close Redis connection if it exists.
     """
-
-    if settings.REDIS_HOST and settings.REDIS_PORT:
-        # Redis close logic would go here
-        # Example: if redis: await redis.close()
+    global _redis
+    if _redis is not None:
+        await _redis.aclose()
+        _redis = None
         logger.info("Redis connection closed")
-    else:
-        logger.info("Redis connection not configured, skipping")
 
 
 async def init_external_clients(app: FastAPI):
@@ -1,5 +1,5 @@
 """Docker client modules."""
 
-from .docker import DockerClient
+from .docker import DockerClient, DockerError
 
-__all__ = ["DockerClient"]
+__all__ = ["DockerClient", "DockerError"]
@@ -1,18 +1,266 @@
-from typing import Any, Dict, List, Optional
+import asyncio
+import json
+import time
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from typing import (
+    Any,
+    AsyncContextManager,
+    AsyncIterator,
+    Dict,
+    Iterable,
+    List,
+    Literal,
+    Optional,
+    Tuple,
+    Union,
+)
+from urllib.parse import quote
 
-import docker
-from docker.errors import DockerException
+import httpx
+from docker.utils import convert_port_bindings, convert_volume_binds, parse_devices
 from fastapi import HTTPException
 
-from ..schemas import ContainerDetailResponse, ContainerListResponse, ContainerOperationResponse
+from ...settings import settings
+from ..schemas import (
+    ContainerDetailResponse,
+    ContainerListResponse,
+    ContainerOperationResponse,
+)
+
+# Seconds dockerd waits for a container to exit on stop/restart before killing it
+STOP_TIMEOUT = 10
+
+
+class DockerError(Exception):
+    """A failed Docker Engine API call: an error response or a transport failure."""
+
+    def __init__(self, message: str, status_code: Optional[int] = None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def _transport_target(host: str) -> Tuple[Optional[str], str]:
+    """(unix socket path, base URL) for a DOCKER_HOST value."""
+    if host.startswith("unix://"):
+        return host[len("unix://") :], "http://docker"
+    if host.startswith("tcp://"):
+        return None, "http://" + host[len("tcp://") :]
+    return None, host
+
+
+async def _raw_output(chunks: AsyncIterator[bytes]) -> AsyncIterator[Tuple[str, bytes]]:
+    async for chunk in chunks:
+        yield "stdout", chunk
+
+
+async def _demultiplex(
+    chunks: AsyncIterator[bytes],
+) -> AsyncIterator[Tuple[str, bytes]]:
+    """
+    Split Docker's multiplexed stream: frames of an 8-byte header (stream type, 3 zero bytes,
+    big-endian payload size) and the payload. Payloads are passed on piecewise as they arrive,
+    so a large frame is never held in memory whole.
+    """
+    buffer = b""
+    stream, remaining = "stdout", 0
+    async for chunk in chunks:
+        buffer = buffer + chunk if buffer else chunk
+        while buffer:
+            if remaining:
+                piece, buffer = buffer[:remaining], buffer[remaining:]
+                remaining -= len(piece)
+                yield stream, piece
+            elif len(buffer) >= 8:
+                stream = "stderr" if buffer[0] == 2 else "stdout"
+                remaining = int.from_bytes(buffer[4:8], "big")
+                buffer = buffer[8:]
+            else:
+                # Header split across chunks
+                break
+
+
+def _image_tags(image: Dict) -> List[str]:
+    return [tag for tag in image.get("RepoTags") or [] if tag != "<none>:<none>"]
 
 
 class DockerClient:
-    def __init__(self):
+    """
+    Asynchronous Docker Engine API client over HTTP on the daemon socket (DOCKER_HOST).
+    Requests share an httpx connection pool of max_pool_size connections, time out after
+    timeout seconds and are cancelled with the calling task.
+    """
+
+    def __init__(
+        self, max_pool_size: int = 10, timeout: int = 60, host: Optional[str] = None
+    ):
+        uds, base_url = _transport_target(host or settings.DOCKER_HOST)
+        self.timeout = timeout
+        self.max_pool_size = max_pool_size
+        # Image ID -> /images/json entry; IDs are content addresses, only the tags can change
+        self._images: Dict[str, Dict] = {}
+        self._images_expire_at = 0.0
+        self._images_lock = asyncio.Lock()
+        self.client = httpx.AsyncClient(
+            base_url=base_url,
+            transport=httpx.AsyncHTTPTransport(
+                uds=uds,
+                limits=httpx.Limits(
+                    max_connections=max_pool_size,
+                    max_keepalive_connections=max_pool_size,
+                ),
+            ),
+            timeout=httpx.Timeout(timeout, connect=5.0),
+        )
+
+    async def _request(
+        self, method: str, path: str, timeout: Optional[float] = None, **kwargs
+    ) -> httpx.Response:
+        try:
+            response = await self.client.request(
+                method,
+                path,
+                timeout=timeout if timeout is not None else httpx.USE_CLIENT_DEFAULT,
+                **kwargs,
+            )
+        except httpx.HTTPError as e:
+            raise DockerError(str(e) or type(e).__name__)
+        if response.status_code >= 400:
+            try:
+                message = response.json().get("message", response.text)
+            except ValueError:
+                message = response.text
+            raise DockerError(
+                f"{response.status_code}: {message}", response.status_code
+            )
+        return response
+
+    async def _get_json(self, path: str, **kwargs) -> Any:
+        return (await self._request("GET", path, **kwargs)).json()
+
+    async def version(self) -> Dict:
+        """Daemon version information; raises DockerError when the daemon is unreachable."""
+        return await self._get_json("/version")
+
+    async def close(self) -> None:
+        await self.client.aclose()
+
+    @asynccontextmanager
+    async def _open_stream(
+        self, path: str, params: Dict[str, Any]
+    ) -> AsyncIterator[httpx.Response]:
+        """A streaming GET whose body is read as it arrives; errors are raised as DockerError."""
         try:
-            self.client = docker.from_env()
-        except DockerException as e:
-            raise HTTPException(status_code=500, detail=f"Failed to connect to Docker: {str(e)}")
+            # No read timeout: the stream stays silent for as long as there is nothing to report
+            async with self.client.stream(
+                "GET", path, params=params, timeout=httpx.Timeout(None, connect=5.0)
+            ) as response:
+                if response.status_code >= 400:
+                    raise DockerError(
+                        f"{response.status_code}: {(await response.aread()).decode()}",
+                        response.status_code,
+                    )
+                yield response
+        except httpx.HTTPError as e:
+            raise DockerError(str(e) or type(e).__name__)
+
+    @asynccontextmanager
+    async def _stream_json(
+        self, path: str, params: Dict[str, Any]
+    ) -> AsyncIterator[AsyncIterator[Dict]]:
+        """
+        Open a streaming endpoint that sends one JSON document per line. The stream is open once
+        the context is entered; the yielded iterator decodes documents as they arrive.
+        """
+
+        async def decode(response: httpx.Response) -> AsyncIterator[Dict]:
+            async for line in response.aiter_lines():
+                if line.strip():
+                    yield json.loads(line)
+
+        async with self._open_stream(path, params) as response:
+            yield decode(response)
+
+    def events(
+        self, filters: Dict[str, List[str]]
+    ) -> AsyncContextManager[AsyncIterator[Dict]]:
+        """
+        Subscribe to /events. The subscription is open once the context is entered, so events that
+        happen while the caller reads the current state are still delivered afterwards.
+        """
+        return self._stream_json("/events", {"filters": json.dumps(filters)})
+
+    def stats(self, container_id: str) -> AsyncContextManager[AsyncIterator[Dict]]:
+        """Subscribe to a container's resource usage, one frame about every second while it runs."""
+        return self._stream_json(
+            f"/containers/{quote(container_id, safe='')}/stats", {"stream": 1}
+        )
+
+    @asynccontextmanager
+    async def logs(
+        self,
+        container_id: str,
+        tail: Optional[int] = None,
+        since: Optional[float] = None,
+        follow: bool = False,
+        timestamps: bool = False,
+    ) -> AsyncIterator[AsyncIterator[Tuple[str, bytes]]]:
+        """
+        Open a container's log, the last tail lines (default: all) written after since. The yielded
+        iterator gives ("stdout" | "stderr", data) pieces as dockerd sends them; with follow it
+        keeps going until the stream is closed.
+        """
+        # With a TTY the output is sent as is, without stream headers
+        tty = (await self._inspect(container_id))["Config"].get("Tty", False)
+        params: Dict[str, Any] = {
+            "stdout": 1,
+            "stderr": 1,
+            "follow": int(follow),
+            "timestamps": int(timestamps),
+            "tail": "all" if tail is None else tail,
+        }
+        if since is not None:
+            params["since"] = since
+        async with self._open_stream(
+            f"/containers/{quote(container_id, safe='')}/logs", params
+        ) as response:
+            chunks = response.aiter_raw()
+            yield _raw_output(chunks) if tty else _demultiplex(chunks)
+
+    async def _inspect(self, container_id: str) -> Dict:
+        return await self._get_json(f"/containers/{quote(container_id, safe='')}/json")
+
+    async def _image_index(self, image_ids: Iterable[str]) -> Dict[str, Dict]:
+        """
+        Image metadata by ID, from a single /images/json call that is repeated only when
+        DOCKER_IMAGE_CACHE_TTL passed or an image is not known yet.
+        """
+        image_ids = set(image_ids)
+        if (
+            time.monotonic() < self._images_expire_at
+            and image_ids <= self._images.keys()
+        ):
+            return self._images
+        async with self._images_lock:
+            # Another request may have refreshed the index while we were waiting
+            if (
+                time.monotonic() >= self._images_expire_at
+                or not image_ids <= self._images.keys()
+            ):
+                images = {
+                    image["Id"]: image for image in await self._get_json("/images/json")
+                }
+                # Images removed while still used by a container have no entry; don't refetch for them
+                for image_id in image_ids - images.keys():
+                    images[image_id] = {"Id": image_id, "RepoTags": []}
+                self._images = images
+                self._images_expire_at = (
+                    time.monotonic() + settings.DOCKER_IMAGE_CACHE_TTL
+                )
+        return self._images
+
+    async def _image(self, image_id: str) -> Dict:
+        return (await self._image_index([image_id]))[image_id]
 
     def _format_ports(self, ports: Dict[str, Any]) -> Dict[str, Any]:
         """Format ports from Docker API format to our format"""
@@ -21,7 +269,11 @@ class DockerClient:
         formatted_ports = {}
         for container_port, host_bindings in ports.items():
             if host_bindings:
-                formatted_ports[container_port] = host_bindings[0] if isinstance(host_bindings, list) else host_bindings
+                formatted_ports[container_port] = (
+                    host_bindings[0]
+                    if isinstance(host_bindings, list)
+                    else host_bindings
+                )
         return formatted_ports
 
     def _format_volumes(self, mounts: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
@@ -57,34 +309,133 @@ class DockerClient:
             return "medium"
         return "high"
 
-    async def list_containers(self, all_containers: bool = False) -> List[ContainerListResponse]:
-        """List all containers"""
+    def _container_fields(self, attrs: Dict, image: Dict) -> Dict[str, Any]:
+        """Response fields of an inspected container and its image."""
+        tags = _image_tags(image)
+        state = attrs.get("State")
+        return dict(
+            id=attrs["Id"],
+            name=attrs["Name"].lstrip("/"),
+            status=state["Status"] if isinstance(state, dict) else state,
+            image=tags[0] if tags else image["Id"],
+            created=attrs["Created"],
+            ports=self._format_ports(attrs.get("NetworkSettings", {}).get("Ports")),
+            volumes=self._format_volumes(attrs["Mounts"]),
+            devices=attrs["HostConfig"]["Devices"]
+            if attrs["HostConfig"].get("Devices")
+            else [],
+            environment=self._format_environment(attrs["Config"]["Env"]),
+            privileged=attrs["HostConfig"]["Privileged"],
+            restart_policy=attrs["HostConfig"]["RestartPolicy"]["Name"],
+            cpu_allocation=self._get_cpu_allocation(attrs["HostConfig"]),
+            network=attrs["NetworkSettings"]["Networks"],
+            command=self._format_command(attrs["Config"]["Cmd"]),
+            tag=tags[0].split(":")[1] if tags and ":" in tags[0] else None,
+        )
+
+    def _summary_fields(self, summary: Dict, image: Dict) -> Dict[str, Any]:
+        """
+        Response fields available from a /containers/json entry. Environment, devices, privileged,
+        restart policy and CPU allocation are only known after an inspect and are left empty.
+        """
+        tags = _image_tags(image)
+        ports: Dict[str, Any] = {}
+        for port in summary.get("Ports") or []:
+            if "PublicPort" in port:
+                ports.setdefault(
+                    f"{port['PrivatePort']}/{port['Type']}",
+                    {"HostIp": port.get("IP", ""), "HostPort": str(port["PublicPort"])},
+                )
+        return dict(
+            id=summary["Id"],
+            name=summary["Names"][0].lstrip("/")
+            if summary.get("Names")
+            else summary["Id"][:12],
+            status=summary["State"],
+            image=tags[0] if tags else image["Id"],
+            created=datetime.fromtimestamp(summary["Created"], timezone.utc).strftime(
+                "%Y-%m-%dT%H:%M:%SZ"
+            ),
+            ports=ports,
+            volumes=self._format_volumes(summary.get("Mounts")),
+            devices=None,
+            environment=None,
+            privileged=None,
+            restart_policy=None,
+            cpu_allocation=None,
+            network=(summary.get("NetworkSettings") or {}).get("Networks"),
+            command=summary.get("Command") or None,
+            tag=tags[0].split(":")[1] if tags and ":" in tags[0] else None,
+        )
+
+    async def list_containers(
+        self, all_containers: bool = False, detail: Literal["summary", "full"] = "full"
+    ) -> List[ContainerListResponse]:
+        """
+        List all containers with one /containers/json and at most one /images/json call.
+        The "full" detail level adds one inspect per container, run concurrently.
+        """
         try:
-            containers = self.client.containers.list(all=all_containers)
+            summaries = await self._get_json(
+                "/containers/json", params={"all": int(all_containers)}
+            )
+            images = await self._image_index(
+                summary["ImageID"] for summary in summaries
+            )
+            if detail == "summary":
+                return [
+                    ContainerListResponse(
+                        **self._summary_fields(summary, images[summary["ImageID"]])
+                    )
+                    for summary in summaries
+                ]
+
+            semaphore = asyncio.Semaphore(self.max_pool_size)
+
+            async def inspect(container_id: str) -> Optional[Dict]:
+                async with semaphore:
+                    try:
+                        return await self._inspect(container_id)
+                    except DockerError as e:
+                        if e.status_code == 404:
+                            # Removed since it was listed
+                            return None
+                        raise
+
+            inspected = await asyncio.gather(
+                *(inspect(summary["Id"]) for summary in summaries)
+            )
             return [
                 ContainerListResponse(
-                    id=container.id,
-                    name=container.name,
-                    status=container.status,
-                    image=container.image.tags[0] if container.image.tags else container.image.id,
-                    created=container.attrs["Created"],
-                    ports=self._format_ports(container.ports),
-                    volumes=self._format_volumes(container.attrs["Mounts"]),
-                    devices=container.attrs["HostConfig"]["Devices"] if container.attrs["HostConfig"].get("Devices") else [],
-                    environment=self._format_environment(container.attrs["Config"]["Env"]),
-                    privileged=container.attrs["HostConfig"]["Privileged"],
-                    restart_policy=container.attrs["HostConfig"]["RestartPolicy"]["Name"],
-                    cpu_allocation=self._get_cpu_allocation(container.attrs["HostConfig"]),
-                    network=container.attrs["NetworkSettings"]["Networks"],
-                    command=self._format_command(container.attrs["Config"]["Cmd"]),
-                    tag=container.image.tags[0].split(":")[1]
-                    if container.image.tags and ":" in container.image.tags[0]
-                    else None,
+                    **self._container_fields(attrs, images[summary["ImageID"]])
                 )
+                for summary, attrs in zip(summaries, inspected)
+                if attrs is not None
+            ]
+        except DockerError as e:
+            raise HTTPException(
+                status_code=500, detail=f"Failed to list containers: {str(e)}"
+            )
+
+    async def list_container_states(self) -> List[Dict[str, str]]:
+        """List ID, name, image and state of all containers with a single API call"""
+        try:
+            containers = await self._get_json("/containers/json", params={"all": 1})
+            return [
+                {
+                    "id": container["Id"],
+                    "name": container["Names"][0].lstrip("/")
+                    if container.get("Names")
+                    else container["Id"][:12],
+                    "image": container["Image"],
+                    "state": container["State"],
+                }
                 for container in containers
             ]
-        except DockerException as e:
-            raise HTTPException(status_code=500, detail=f"Failed to list containers: {str(e)}")
+        except DockerError as e:
+            raise HTTPException(
+                status_code=500, detail=f"Failed to list containers: {str(e)}"
+            )
 
     async def create_container(
         self,
@@ -95,7 +446,7 @@ class DockerClient:
         network: Optional[str] = None,
         ports: Optional[Dict[str, str]] = None,
         volumes: Optional[Dict[str, str]] = None,
-        environment: Optional[Dict[str, str]] = None,
+        environment: Optional[Union[Dict[str, str], List[str]]] = None,
         devices: Optional[List[str]] = None,
         command: Optional[str] = None,
         privileged: bool = False,
@@ -108,102 +459,149 @@ class DockerClient:
             image_with_tag = f"{image}:{tag}" if tag else image
 
             # Convert CPU allocation to shares
-            cpu_shares = {"low": 512, "medium": 1024, "high": 2048}.get(cpu_allocation.lower(), 1024)
+            cpu_shares = {"low": 512, "medium": 1024, "high": 2048}.get(
+                cpu_allocation.lower(), 1024
+            )
 
-            # Convert environment dict to list of strings
-            env_list = [f"{k}={v}" for k, v in (environment or {}).items()]
+            # Convert environment dict to list of strings (the API schema already sends a list)
+            if isinstance(environment, dict):
+                env_list = [f"{k}={v}" for k, v in environment.items()]
+            else:
+                env_list = list(environment or [])
 
-            # Prepare host config
-            host_config = self.client.api.create_host_config(
-                privileged=privileged,
-                cpu_shares=cpu_shares,
-                restart_policy={"Name": restart_policy},
-                devices=devices if devices else None,
-                port_bindings=ports if ports else None,
-                binds=volumes if volumes else None,
-                network_mode=network if network else None,
-            )
+            # Prepare host config, in the shape the docker SDK's create_host_config produces
+            host_config: Dict[str, Any] = {
+                "Privileged": privileged,
+                "CpuShares": cpu_shares,
+                "RestartPolicy": {"Name": restart_policy},
+            }
+            if devices:
+                host_config["Devices"] = parse_devices(devices)
+            if ports:
+                host_config["PortBindings"] = convert_port_bindings(ports)
+            if volumes:
+                host_config["Binds"] = convert_volume_binds(volumes)
+            if network:
+                host_config["NetworkMode"] = network
 
             # Create container
-            container = self.client.containers.create(
-                image=image_with_tag,
-                name=name,
-                command=command.split() if command else None,
-                environment=env_list,
-                host_config=host_config,
-                detach=True,
-            )
+            created = (
+                await self._request(
+                    "POST",
+                    "/containers/create",
+                    params={"name": name},
+                    json={
+                        "Image": image_with_tag,
+                        "Cmd": command.split() if command else None,
+                        "Env": env_list,
+                        "HostConfig": host_config,
+                    },
+                )
+            ).json()
 
-            return await self.get_container(container.id)
-        except DockerException as e:
-            raise HTTPException(status_code=500, detail=f"Failed to create container: {str(e)}")
+            return await self.get_container(created["Id"])
+        except DockerError as e:
+            raise HTTPException(
+                status_code=500, detail=f"Failed to create container: {str(e)}"
+            )
 
     async def get_container(self, container_id: str) -> ContainerDetailResponse:
         """Get container details"""
         try:
-            container = self.client.containers.get(container_id)
-            attrs = container.attrs
-            return ContainerDetailResponse(
-                id=container.id,
-                name=container.name,
-                status=container.status,
-                image=container.image.tags[0] if container.image.tags else container.image.id,
-                created=attrs["Created"],
-                ports=self._format_ports(container.ports),
-                environment=self._format_environment(attrs["Config"]["Env"]),
-                volumes=self._format_volumes(attrs["Mounts"]),
-                devices=attrs["HostConfig"]["Devices"] if attrs["HostConfig"].get("Devices") else [],
-                privileged=attrs["HostConfig"]["Privileged"],
-                restart_policy=attrs["HostConfig"]["RestartPolicy"]["Name"],
-                cpu_allocation=self._get_cpu_allocation(attrs["HostConfig"]),
-                network=attrs["NetworkSettings"]["Networks"],
-                command=self._format_command(attrs["Config"]["Cmd"]),
-                tag=container.image.tags[0].split(":")[1] if container.image.tags and ":" in container.image.tags[0] else None,
-            )
-        except DockerException as e:
-            raise HTTPException(status_code=404, detail=f"Container not found: {str(e)}")
-
-    async def update_container(self, container_id: str, **kwargs) -> ContainerDetailResponse:
-        """Update container configuration"""
+            attrs = await self._inspect(container_id)
+            image = await self._image(attrs["Image"])
+            return ContainerDetailResponse(**self._container_fields(attrs, image))
+        except DockerError as e:
+            raise HTTPException(
+                status_code=404, detail=f"Container not found: {str(e)}"
+            )
+
+    async def update_container(
+        self, container_id: str, **kwargs
+    ) -> ContainerDetailResponse:
+        """
+        Update container configuration.
+        Docker can only rename a container and change its resources and restart policy in place;
+        the other fields (image, ports, volumes, ...) would need the container recreated and are ignored.
+        """
+        changes: Dict[str, Any] = {}
+        if kwargs.get("restart_policy"):
+            changes["RestartPolicy"] = {"Name": kwargs["restart_policy"]}
+        if kwargs.get("cpu_allocation"):
+            changes["CpuShares"] = {"low": 512, "medium": 1024, "high": 2048}.get(
+                kwargs["cpu_allocation"].lower(), 1024
+            )
         try:
-            container = self.client.containers.get(container_id)
-            container.update(**kwargs)
+            path = f"/containers/{quote(container_id, safe='')}"
+            if changes:
+                await self._request("POST", f"{path}/update", json=changes)
+            name = kwargs.get("name")
+            if name and name != (await self._inspect(container_id))["Name"].lstrip("/"):
+                await self._request("POST", f"{path}/rename", params={"name": name})
+                container_id = name
             return await self.get_container(container_id)
-        except DockerException as e:
-            raise HTTPException(status_code=500, detail=f"Failed to update container: {str(e)}")
+        except DockerError as e:
+            raise HTTPException(
+                status_code=500, detail=f"Failed to update container: {str(e)}"
+            )
 
-    async def delete_container(self, container_id: str, force: bool = False) -> ContainerOperationResponse:
+    async def delete_container(
+        self, container_id: str, force: bool = False
+    ) -> ContainerOperationResponse:
         """Delete a container"""
         try:
-            container = self.client.containers.get(container_id)
-            container.remove(force=force)
-            return ContainerOperationResponse(message=f"Container {container_id} successfully deleted")
-        except DockerException as e:
-            raise HTTPException(status_code=500, detail=f"Failed to delete container: {str(e)}")
+            await self._request(
+                "DELETE",
+                f"/containers/{quote(container_id, safe='')}",
+                params={"force": int(force)},
+            )
+            return ContainerOperationResponse(
+                message=f"Container {container_id} successfully deleted"
+            )
+        except DockerError as e:
+            raise HTTPException(
+                status_code=500, detail=f"Failed to delete container: {str(e)}"
+            )
 
     async def start_container(self, container_id: str) -> ContainerDetailResponse:
         """Start a container"""
         try:
-            container = self.client.containers.get(container_id)
-            container.start()
+            await self._request(
+                "POST", f"/containers/{quote(container_id, safe='')}/start"
+            )
             return await self.get_container(container_id)
-        except DockerException as e:
-            raise HTTPException(status_code=500, detail=f"Failed to start container: {str(e)}")
+        except DockerError as e:
+            raise HTTPException(
+                status_code=500, detail=f"Failed to start container: {str(e)}"
+            )
 
     async def stop_container(self, container_id: str) -> ContainerDetailResponse:
         """Stop a container"""
         try:
-            container = self.client.containers.get(container_id)
-            container.stop()
+            # dockerd answers only after the container exited, up to STOP_TIMEOUT seconds later
+            await self._request(
+                "POST",
+                f"/containers/{quote(container_id, safe='')}/stop",
+                params={"t": STOP_TIMEOUT},
+                timeout=self.timeout + STOP_TIMEOUT,
+            )
             return await self.get_container(container_id)
-        except DockerException as e:
-            raise HTTPException(status_code=500, detail=f"Failed to stop container: {str(e)}")
+        except DockerError as e:
+            raise HTTPException(
+                status_code=500, detail=f"Failed to stop container: {str(e)}"
+            )
 
     async def restart_container(self, container_id: str) -> ContainerDetailResponse:
         """Restart a container"""
         try:
-            container = self.client.containers.get(container_id)
-            container.restart()
+            await self._request(
+                "POST",
+                f"/containers/{quote(container_id, safe='')}/restart",
+                params={"t": STOP_TIMEOUT},
+                timeout=self.timeout + STOP_TIMEOUT,
+            )
             return await self.get_container(container_id)
-        except DockerException as e:
-            raise HTTPException(status_code=500, detail=f"Failed to restart container: {str(e)}")
+        except DockerError as e:
+            raise HTTPException(
+                status_code=500, detail=f"Failed to restart container: {str(e)}"
+            )
@@ -0,0 +1,131 @@
+import asyncio
+import time
+from typing import Optional, Set
+
+from fastapi import HTTPException, status
+from loguru import logger
+
+from ..settings import settings
+from .clients import DockerClient, DockerError
+from .clients.docker import STOP_TIMEOUT
+
+
+class DockerConnection:
+    """
+    The process-wide DockerClient, created in the lifespan instead of per request.
+    Its HTTP connection pool is sized by DOCKER_POOL_SIZE. A background probe queries the
+    daemon every DOCKER_HEALTH_INTERVAL seconds and retires the client when it stops
+    answering (e.g. dockerd restarted): the next caller gets a new client, and the old one is
+    closed once the requests still using it had time to finish.
+    """
+
+    def __init__(self):
+        self._client: Optional[DockerClient] = None
+        self._lock = asyncio.Lock()
+        self._retry_at = 0.0
+        self._error: Optional[str] = None
+        self._task: Optional[asyncio.Task] = None
+        self._retiring: Set[asyncio.Task] = set()
+
+    @property
+    def connected(self) -> bool:
+        return self._client is not None
+
+    async def start(self) -> None:
+        try:
+            await self.client()
+        except HTTPException as e:
+            # Docker is optional; its endpoints answer 503 until the daemon is reachable
+            logger.warning(f"Docker unavailable at startup: {e.detail}")
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        for task in self._retiring:
+            task.cancel()
+        await asyncio.gather(*self._retiring, return_exceptions=True)
+        client, self._client = self._client, None
+        if client is not None:
+            await client.close()
+
+    async def client(self) -> DockerClient:
+        """The shared client, connecting first if needed; 503 while the daemon is unreachable."""
+        if self._client is not None:
+            return self._client
+        async with self._lock:
+            if self._client is None:
+                # Don't let every request retry the connection while the daemon is down
+                if time.monotonic() < self._retry_at:
+                    raise self._unavailable()
+                client = DockerClient(
+                    settings.DOCKER_POOL_SIZE, settings.DOCKER_TIMEOUT
+                )
+                try:
+                    await client.version()
+                except DockerError as e:
+                    await client.close()
+                    self._error = f"Failed to connect to Docker at {settings.DOCKER_HOST}: {str(e)}"
+                    self._retry_at = (
+                        time.monotonic() + settings.DOCKER_RECONNECT_INTERVAL
+                    )
+                    raise self._unavailable()
+                self._client, self._error = client, None
+                logger.info(
+                    f"Connected to Docker with a pool of {settings.DOCKER_POOL_SIZE} connections"
+                )
+        return self._client
+
+    def _unavailable(self) -> HTTPException:
+        return HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=f"Docker unavailable: {self._error}",
+            headers={
+                "Retry-After": str(max(1, round(settings.DOCKER_RECONNECT_INTERVAL)))
+            },
+        )
+
+    def _retire(self) -> None:
+        client, self._client = self._client, None
+        if client is not None:
+            task = asyncio.create_task(self._close_later(client))
+            self._retiring.add(task)
+            task.add_done_callback(self._retiring.discard)
+
+    @staticmethod
+    async def _close_later(client: DockerClient) -> None:
+        """Close a retired client after the longest a request on it may take; right away on shutdown."""
+        try:
+            await asyncio.sleep(settings.DOCKER_TIMEOUT + STOP_TIMEOUT)
+        finally:
+            await client.close()
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(settings.DOCKER_HEALTH_INTERVAL)
+            client = self._client
+            if client is None:
+                try:
+                    await self.client()
+                except HTTPException:
+                    pass
+                continue
+            try:
+                await asyncio.wait_for(
+                    client.version(), timeout=settings.DOCKER_HEALTH_INTERVAL
+                )
+            except (DockerError, asyncio.TimeoutError) as e:
+                self._error = str(e) or "Health probe timed out"
+                logger.warning(
+                    f"Docker health probe failed, reconnecting: {self._error}"
+                )
+                if self._client is client:
+                    self._retire()
+
+
+docker_connection = DockerConnection()
@@ -0,0 +1,257 @@
+import asyncio
+import uuid
+from typing import Callable, Dict, List, Optional, Set
+
+from fastapi import HTTPException
+from loguru import logger
+
+from ..settings import settings
+from .clients import DockerClient, DockerError
+from .connection import docker_connection
+from .schemas import ContainerListResponse
+
+# Container events that can change a listed field; "destroy" removes the container
+EVENT_FILTERS = {
+    "type": ["container"],
+    "event": [
+        "create",
+        "start",
+        "die",
+        "destroy",
+        "rename",
+        "update",
+        "pause",
+        "unpause",
+    ],
+}
+
+# States `docker ps` lists without --all
+RUNNING_STATES = ("running", "paused", "restarting")
+
+
+def _dump(containers: Dict[str, ContainerListResponse]) -> Dict[str, Dict]:
+    return {
+        container_id: container.model_dump()
+        for container_id, container in containers.items()
+    }
+
+
+class ContainerInventory:
+    """
+    The containers of the local daemon, held in memory so reads don't go to dockerd.
+    Loaded with one full listing, then kept current from Docker's /events stream; every
+    reconnection of the stream reloads it. `version` increases with each change.
+    """
+
+    def __init__(self):
+        self.version = 0
+        self.ready = False
+        self.events = 0
+        self.resyncs = 0
+        self._containers: Dict[str, ContainerListResponse] = {}
+        # Sequence number of the last write per container, so a slow inspect can't overwrite a newer result
+        self._written: Dict[str, int] = {}
+        self._seq = 0
+        self._listing: Optional[List[ContainerListResponse]] = None
+        # Distinguishes versions of other processes and of earlier runs in ETags
+        self._epoch = uuid.uuid4().hex[:8]
+        self._error: Optional[str] = None
+        self._task: Optional[asyncio.Task] = None
+        self._listeners: List[Callable[[], None]] = []
+        # Starts after a die seen since startup, per container; a container restarting repeatedly climbs fast
+        self._restarts: Dict[str, int] = {}
+        self._died: Set[str] = set()
+
+    @property
+    def etag(self) -> str:
+        return f'W/"{self._epoch}-{self.version}"'
+
+    def add_listener(self, listener: Callable[[], None]) -> None:
+        """Called after every change and after every reload, which may have missed changes."""
+        self._listeners.append(listener)
+
+    async def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self.ready = False
+        self._containers.clear()
+        self._written.clear()
+        self._restarts.clear()
+        self._died.clear()
+        self._listing = None
+
+    def list(self, all_containers: bool = False) -> List[ContainerListResponse]:
+        """Containers newest first, as dockerd lists them; only running ones unless all_containers."""
+        if self._listing is None:
+            self._listing = sorted(
+                self._containers.values(),
+                key=lambda c: (c.created or "", c.id),
+                reverse=True,
+            )
+        if all_containers:
+            return self._listing
+        return [
+            container
+            for container in self._listing
+            if container.status in RUNNING_STATES
+        ]
+
+    def find(self, ref: str) -> Optional[ContainerListResponse]:
+        """A container by ID, name or unique ID prefix; None when not ready or not known."""
+        if not self.ready or not ref:
+            return None
+        container = self._containers.get(ref)
+        if container is not None:
+            return container
+        for container in self._containers.values():
+            if container.name == ref:
+                return container
+        matches = [
+            container
+            for container in self._containers.values()
+            if container.id.startswith(ref)
+        ]
+        return matches[0] if len(matches) == 1 else None
+
+    def put(self, container: ContainerListResponse) -> None:
+        """Record a container's state, e.g. as returned by an operation that just changed it."""
+        self._mark(container.id)
+        current = self._containers.get(container.id)
+        # Compared by value: operations return the detail model, listings the list model
+        if current is None or current.model_dump() != container.model_dump():
+            self._containers[container.id] = container
+            self._changed()
+
+    def discard(self, ref: str) -> None:
+        container = self.find(ref)
+        if container is None:
+            return
+        self._mark(container.id)
+        del self._containers[container.id]
+        self._changed()
+
+    def restart_series(self) -> Dict[str, float]:
+        """Cumulative restart count of every known container, as containers.<name>.restarts series."""
+        return {
+            f"containers.{container.name}.restarts": float(
+                self._restarts.get(container_id, 0)
+            )
+            for container_id, container in self._containers.items()
+        }
+
+    def _count_restart(self, container_id: str, action: str) -> None:
+        if action == "die":
+            self._died.add(container_id)
+        elif action == "start" and container_id in self._died:
+            self._died.discard(container_id)
+            self._restarts[container_id] = self._restarts.get(container_id, 0) + 1
+        elif action == "destroy":
+            self._died.discard(container_id)
+            self._restarts.pop(container_id, None)
+
+    def _mark(self, container_id: str) -> None:
+        self._seq += 1
+        self._written[container_id] = self._seq
+
+    def _changed(self) -> None:
+        self.version += 1
+        self._listing = None
+        self._notify()
+
+    def _notify(self) -> None:
+        for listener in self._listeners:
+            try:
+                listener()
+            except Exception:
+                logger.exception("Container inventory listener failed")
+
+    async def _resync(self, client: DockerClient) -> None:
+        seq = self._seq
+        containers = {
+            c.id: c
+            for c in await client.list_containers(all_containers=True, detail="full")
+        }
+        # Keep what operations wrote while the listing was in flight
+        for container_id, written in self._written.items():
+            if written > seq:
+                if container_id in self._containers:
+                    containers[container_id] = self._containers[container_id]
+                else:
+                    containers.pop(container_id, None)
+        self._written.clear()
+        for container_id in set(self._restarts) - containers.keys():
+            del self._restarts[container_id]
+        self.resyncs += 1
+        if _dump(containers) != _dump(self._containers):
+            self._containers = containers
+            self._changed()
+        else:
+            self._notify()
+
+    async def _refresh(self, client: DockerClient, container_id: str) -> None:
+        seq = self._seq
+        try:
+            container = await client.get_container(container_id)
+        except HTTPException:
+            # Removed before it could be inspected; a failing daemon also breaks the stream and forces a resync
+            container = None
+        if self._written.get(container_id, 0) > seq:
+            return
+        if container is None:
+            self.discard(container_id)
+        else:
+            self.put(container)
+
+    async def _apply(self, client: DockerClient, event: Dict) -> None:
+        self.events += 1
+        container_id = (event.get("Actor") or {}).get("ID") or event.get("id")
+        if not container_id:
+            return
+        action = event.get("Action", event.get("status"))
+        self._count_restart(container_id, action)
+        if action == "destroy":
+            self.discard(container_id)
+        else:
+            await self._refresh(client, container_id)
+
+    def _failed(self, error: str) -> None:
+        # Logged once per distinct failure, not on every retry while Docker is down
+        if error != self._error:
+            logger.warning(f"Container inventory unavailable: {error}")
+        self._error = error
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                client = await docker_connection.client()
+                async with client.events(EVENT_FILTERS) as events:
+                    await self._resync(client)
+                    self.ready, self._error = True, None
+                    logger.info(
+                        f"Container inventory loaded with {len(self._containers)} containers"
+                    )
+                    async for event in events:
+                        await self._apply(client, event)
+                self._failed("Docker event stream ended")
+            except HTTPException as e:
+                self._failed(e.detail)
+            except DockerError as e:
+                self._failed(f"Docker event stream failed: {str(e)}")
+            except Exception:
+                # e.g. an unexpected response; the inventory must keep retrying regardless
+                logger.exception("Container inventory failed")
+            finally:
+                # Events may be missed until the stream is back; reads go to dockerd meanwhile
+                self.ready = False
+            await asyncio.sleep(settings.DOCKER_RECONNECT_INTERVAL)
+
+
+container_inventory = ContainerInventory()
@@ -0,0 +1,153 @@
+from contextlib import AsyncExitStack
+from typing import AsyncIterator, Dict, Literal, Optional, Tuple
+
+from fastapi import HTTPException, status
+from fastapi.responses import StreamingResponse
+from loguru import logger
+from starlette.background import BackgroundTask
+
+from ..settings import settings
+from .clients import DockerClient, DockerError
+
+# Longest partial line held back for the rest of it; longer lines are split across events
+MAX_LINE_BYTES = 64 * 1024
+
+
+def _event(name: str, lines: bytes) -> str:
+    """An SSE event with one data field per line; clients receive the lines joined by newlines."""
+    # A bare CR would end a data field early
+    text = lines.decode(errors="replace").replace("\r", "")
+    return f"event: {name}\ndata: {text.replace(chr(10), chr(10) + 'data: ')}\n\n"
+
+
+async def _sse_events(pieces: AsyncIterator[Tuple[str, bytes]]) -> AsyncIterator[str]:
+    """
+    Complete log lines as events named after their stream, all the lines of a piece in one event.
+    Holds at most one partial line per stream.
+    """
+    partial: Dict[str, bytes] = {}
+    async for stream, data in pieces:
+        buffer = partial.pop(stream, b"") + data
+        end = buffer.rfind(b"\n")
+        if end >= 0:
+            yield _event(stream, buffer[:end])
+        rest = buffer[end + 1 :]
+        while len(rest) > MAX_LINE_BYTES:
+            yield _event(stream, rest[:MAX_LINE_BYTES])
+            rest = rest[MAX_LINE_BYTES:]
+        if rest:
+            partial[stream] = rest
+    for stream, rest in partial.items():
+        yield _event(stream, rest)
+
+
+class _LogStream:
+    """An open log request, closed once whether the response finishes, fails or is never sent."""
+
+    def __init__(self, logs: "ContainerLogs", follow: bool):
+        self.logs = logs
+        self.follow = follow
+        self.exit_stack = AsyncExitStack()
+        self.closed = False
+
+    async def close(self) -> None:
+        if self.closed:
+            return
+        self.closed = True
+        if self.follow:
+            self.logs.followers -= 1
+        await self.exit_stack.aclose()
+
+
+class ContainerLogs:
+    """
+    Streams container logs from dockerd to clients, piece by piece as they arrive: nothing is
+    buffered beyond the chunk in flight, however large the log. A disconnecting client cancels
+    its response, which closes the request to dockerd. At most DOCKER_LOGS_MAX_FOLLOWERS
+    requests follow a log at once; more get an immediate 503 with Retry-After.
+    Log requests can be long-lived, so they use a connection pool of their own.
+    """
+
+    def __init__(self):
+        self.followers = 0
+        self.rejected = 0
+        self._client: Optional[DockerClient] = None
+
+    def _docker(self) -> DockerClient:
+        if self._client is None:
+            self._client = DockerClient(
+                settings.DOCKER_POOL_SIZE, settings.DOCKER_TIMEOUT
+            )
+        return self._client
+
+    async def stop(self) -> None:
+        if self._client is not None:
+            await self._client.close()
+            self._client = None
+
+    async def stream(
+        self,
+        container_id: str,
+        tail: Optional[int],
+        since: Optional[float],
+        follow: bool,
+        timestamps: bool,
+        format: Literal["text", "sse"],
+    ) -> StreamingResponse:
+        if follow:
+            if self.followers >= settings.DOCKER_LOGS_MAX_FOLLOWERS:
+                self.rejected += 1
+                raise HTTPException(
+                    status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                    detail="Too many clients following logs, retry shortly",
+                    headers={"Retry-After": "5"},
+                )
+            self.followers += 1
+        log = _LogStream(self, follow)
+        try:
+            # Opened before the response starts, so a missing container is still a 404
+            pieces = await log.exit_stack.enter_async_context(
+                self._docker().logs(container_id, tail, since, follow, timestamps)
+            )
+        except DockerError as e:
+            await log.close()
+            if e.status_code == 404:
+                raise HTTPException(
+                    status_code=404, detail=f"Container not found: {str(e)}"
+                )
+            raise HTTPException(
+                status_code=500, detail=f"Failed to read container logs: {str(e)}"
+            )
+        except BaseException:
+            await log.close()
+            raise
+
+        async def body():
+            try:
+                if format == "sse":
+                    async for event in _sse_events(pieces):
+                        yield event
+                else:
+                    async for _, data in pieces:
+                        yield data
+            except DockerError as e:
+                logger.warning(
+                    f"Log stream of container {container_id} failed: {str(e)}"
+                )
+                if format == "sse":
+                    yield _event("error", str(e).encode())
+            finally:
+                await log.close()
+
+        return StreamingResponse(
+            body(),
+            media_type="text/event-stream"
+            if format == "sse"
+            else "text/plain; charset=utf-8",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+            # Also runs when the client left before the body was started
+            background=BackgroundTask(log.close),
+        )
+
+
+container_logs = ContainerLogs()
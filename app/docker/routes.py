@@ -1,27 +1,84 @@
-from typing import List
+import asyncio
+import json
+from typing import List, Literal, Optional
 
-from fastapi import APIRouter, Depends
+from fastapi import (
+    APIRouter,
+    Depends,
+    Header,
+    HTTPException,
+    Query,
+    Response,
+    WebSocket,
+    WebSocketDisconnect,
+    status,
+)
+from fastapi.responses import StreamingResponse
 
-from ..auth.utils import get_current_user
+from ..auth.utils import authenticate_token, get_current_user
 from ..models import User
+from ..auth.ratelimit import rate_limit
 from .clients import DockerClient
-from .schemas import ContainerCreate, ContainerDetailResponse, ContainerListResponse, ContainerOperationResponse, ContainerUpdate
+from .connection import docker_connection
+from .inventory import container_inventory
+from .logs import container_logs
+from .schemas import (
+    ContainerCreate,
+    ContainerDetailResponse,
+    ContainerListResponse,
+    ContainerOperationResponse,
+    ContainerStatsResponse,
+    ContainerUpdate,
+)
+from .stats import container_stats
 
 router = APIRouter(prefix="/docker", tags=["docker"])
 
 
 async def get_docker_client() -> DockerClient:
-    return DockerClient()
+    return await docker_connection.client()
 
 
-@router.get("/containers", response_model=List[ContainerListResponse])
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    # Weak comparison, as If-None-Match requires
+    tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return "*" in tags or etag.removeprefix("W/") in tags
+
+
+@router.get(
+    "/containers",
+    response_model=List[ContainerListResponse],
+    dependencies=[Depends(rate_limit("containers"))],
+)
 async def list_containers(
+    response: Response,
     all_containers: bool = False,
-    client: DockerClient = Depends(get_docker_client),
+    detail: Literal["summary", "full"] = Query(
+        "full",
+        description="summary skips the per-container inspect; environment, devices, privileged, "
+        "restart_policy and cpu_allocation are then null. Ignored while the inventory is loaded, "
+        "which always has every field",
+    ),
+    if_none_match: Optional[str] = Header(None),
     _: User = Depends(get_current_user),
 ):
-    """List all Docker containers"""
-    return await client.list_containers(all_containers)
+    """
+    List all Docker containers.
+    Served from the container inventory when it is loaded, with an ETag of its version:
+    a poll with a matching If-None-Match gets 304 Not Modified.
+    """
+    if not container_inventory.ready:
+        # Only resolved here, so inventory reads keep working while dockerd is unreachable
+        client = await get_docker_client()
+        return await client.list_containers(all_containers, detail)
+    etag = container_inventory.etag
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if _etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    response.headers.update(headers)
+    return container_inventory.list(all_containers)
 
 
 @router.post("/containers", response_model=ContainerDetailResponse)
@@ -31,7 +88,7 @@ async def create_container(
     _: User = Depends(get_current_user),
 ):
     """Create a new Docker container"""
-    return await client.create_container(
+    created = await client.create_container(
         image=container.image,
         name=container.name,
         tag=container.tag,
@@ -46,15 +103,20 @@ async def create_container(
         cpu_allocation=container.cpu_allocation,
         restart_policy=container.restart_policy,
     )
+    container_inventory.put(created)
+    return created
 
 
 @router.get("/containers/{container_id}", response_model=ContainerDetailResponse)
 async def get_container(
     container_id: str,
-    client: DockerClient = Depends(get_docker_client),
     _: User = Depends(get_current_user),
 ):
     """Get details of a specific container"""
+    container = container_inventory.find(container_id)
+    if container is not None:
+        return container
+    client = await get_docker_client()
     return await client.get_container(container_id)
 
 
@@ -66,7 +128,11 @@ async def update_container(
     _: User = Depends(get_current_user),
 ):
     """Update container configuration"""
-    return await client.update_container(container_id, **container.dict(exclude_unset=True))
+    updated = await client.update_container(
+        container_id, **container.dict(exclude_unset=True)
+    )
+    container_inventory.put(updated)
+    return updated
 
 
 @router.delete("/containers/{container_id}", response_model=ContainerOperationResponse)
@@ -77,7 +143,9 @@ async def delete_container(
     _: User = Depends(get_current_user),
 ):
     """Delete a container"""
-    return await client.delete_container(container_id, force)
+    result = await client.delete_container(container_id, force)
+    container_inventory.discard(container_id)
+    return result
 
 
 @router.post("/containers/{container_id}/start", response_model=ContainerDetailResponse)
@@ -87,7 +155,10 @@ async def start_container(
     _: User = Depends(get_current_user),
 ):
     """Start a container"""
-    return await client.start_container(container_id)
+    # Recorded right away, so reads agree with this response before the event arrives
+    container = await client.start_container(container_id)
+    container_inventory.put(container)
+    return container
 
 
 @router.post("/containers/{container_id}/stop", response_model=ContainerDetailResponse)
@@ -97,14 +168,130 @@ async def stop_container(
     _: User = Depends(get_current_user),
 ):
     """Stop a container"""
-    return await client.stop_container(container_id)
+    container = await client.stop_container(container_id)
+    container_inventory.put(container)
+    return container
 
 
-@router.post("/containers/{container_id}/restart", response_model=ContainerDetailResponse)
+@router.post(
+    "/containers/{container_id}/restart", response_model=ContainerDetailResponse
+)
 async def restart_container(
     container_id: str,
     client: DockerClient = Depends(get_docker_client),
     _: User = Depends(get_current_user),
 ):
     """Restart a container"""
-    return await client.restart_container(container_id)
+    container = await client.restart_container(container_id)
+    container_inventory.put(container)
+    return container
+
+
+@router.get("/containers/{container_id}/logs", response_class=StreamingResponse)
+async def get_container_logs(
+    container_id: str,
+    tail: Optional[int] = Query(
+        None, ge=0, description="Only the last N lines (default: the whole log)"
+    ),
+    since: Optional[float] = Query(
+        None, ge=0, description="Only output written after this Unix time"
+    ),
+    follow: bool = Query(
+        False, description="Keep streaming new output until the client disconnects"
+    ),
+    timestamps: bool = Query(
+        False, description="Prefix every line with its RFC 3339 timestamp"
+    ),
+    format: Literal["text", "sse"] = Query(
+        "text",
+        description="text: plain output, stdout and stderr interleaved; sse: events named after their stream",
+    ),
+    _: User = Depends(get_current_user),
+):
+    """Stream the logs of a container"""
+    return await container_logs.stream(
+        container_id, tail, since, follow, timestamps, format
+    )
+
+
+@router.get("/stats", response_model=List[ContainerStatsResponse])
+async def get_container_stats(
+    history: bool = Query(
+        False, description="Return every kept sample instead of only the latest"
+    ),
+    _: User = Depends(get_current_user),
+):
+    """Resource usage of the running containers, from the live stats streams"""
+    return container_stats.snapshot(history)
+
+
+@router.websocket("/stats/stream")
+async def stream_container_stats(
+    websocket: WebSocket,
+    token: Optional[str] = Query(
+        None, description="Access token, for clients that cannot set headers"
+    ),
+):
+    """
+    Stream resource usage of the containers a client subscribes to.
+    The client sends {"subscribe": [...]} or {"unsubscribe": [...]} with container IDs, names or
+    "*" for all; it receives {"type": "stats", "id", "name", "sample"} messages, {"type": "stopped",
+    "id"} when a container stops, and {"type": "error", "detail"} for requests it could not serve.
+    """
+    authorization = websocket.headers.get("authorization", "")
+    if not token and authorization.lower().startswith("bearer "):
+        token = authorization[7:]
+    try:
+        await authenticate_token(token or "")
+    except HTTPException:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+
+    await websocket.accept()
+    subscriber = container_stats.add_subscriber()
+
+    async def pump():
+        async for message in subscriber.messages():
+            await websocket.send_text(message)
+
+    async def receive():
+        try:
+            while True:
+                try:
+                    request = json.loads(await websocket.receive_text())
+                    refs = request.get("subscribe", request.get("unsubscribe"))
+                    if isinstance(refs, str):
+                        refs = [refs]
+                    if not isinstance(refs, list) or not all(
+                        isinstance(ref, str) for ref in refs
+                    ):
+                        raise ValueError(
+                            'expected {"subscribe": [...]} or {"unsubscribe": [...]}'
+                        )
+                except (ValueError, AttributeError) as e:
+                    subscriber.offer(
+                        "error",
+                        json.dumps(
+                            {"type": "error", "detail": f"Invalid request: {str(e)}"}
+                        ),
+                    )
+                    continue
+                if "subscribe" in request:
+                    unknown = container_stats.subscribe(subscriber, refs)
+                    if unknown:
+                        detail = f"Unknown containers: {', '.join(unknown)}"
+                        subscriber.offer(
+                            "error", json.dumps({"type": "error", "detail": detail})
+                        )
+                else:
+                    container_stats.unsubscribe(subscriber, refs)
+        except WebSocketDisconnect:
+            pass
+
+    tasks = [asyncio.create_task(pump()), asyncio.create_task(receive())]
+    try:
+        await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        for task in tasks:
+            task.cancel()
+        container_stats.remove_subscriber(subscriber)
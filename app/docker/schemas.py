@@ -20,15 +20,23 @@ class ContainerBase(BaseModel):
     tag: Optional[str] = Field(None, description="Image tag/version")
     icon_url: Optional[str] = Field(None, description="URL for the container's icon")
     web_ui: Optional[WebUIConfig] = Field(None, description="Web UI configuration")
-    network: Optional[Union[str, Dict[str, Any]]] = Field(None, description="Network name or configuration")
+    network: Optional[Union[str, Dict[str, Any]]] = Field(
+        None, description="Network name or configuration"
+    )
     ports: Optional[Dict[str, Any]] = Field(None, description="Port mappings")
     volumes: Optional[List[Dict[str, Any]]] = Field(None, description="Volume mappings")
     environment: Optional[List[str]] = Field(None, description="Environment variables")
     devices: Optional[List[str]] = Field(None, description="Device mappings")
-    command: Optional[Union[str, List[str]]] = Field(None, description="Container command")
+    command: Optional[Union[str, List[str]]] = Field(
+        None, description="Container command"
+    )
     privileged: Optional[bool] = Field(False, description="Privileged mode")
-    cpu_allocation: Optional[str] = Field("low", description="CPU allocation (low/medium/high)")
-    restart_policy: Optional[str] = Field("unless-stopped", description="Restart policy")
+    cpu_allocation: Optional[str] = Field(
+        "low", description="CPU allocation (low/medium/high)"
+    )
+    restart_policy: Optional[str] = Field(
+        "unless-stopped", description="Restart policy"
+    )
 
 
 class ContainerCreate(ContainerBase):
@@ -70,3 +78,45 @@ class ContainerOperationResponse(BaseModel):
     """Model for container operation responses"""
 
     message: str = Field(..., description="Operation result message")
+
+
+class ContainerStatsSample(BaseModel):
+    """Resource usage of a container, derived from two consecutive stats frames"""
+
+    timestamp: float = Field(..., description="Unix time the frame was received")
+    cpu_percent: Optional[float] = Field(
+        None, description="CPU usage in percent of one core; null for the first frame"
+    )
+    online_cpus: Optional[int] = Field(
+        None, description="CPUs available to the container"
+    )
+    memory_usage: Optional[int] = Field(
+        None, description="Memory used in bytes, excluding inactive page cache"
+    )
+    memory_limit: Optional[int] = Field(None, description="Memory limit in bytes")
+    memory_percent: Optional[float] = Field(
+        None, description="Memory usage in percent of the limit"
+    )
+    network_rx_bytes_per_sec: Optional[float] = Field(
+        None, description="Bytes received per second, all interfaces"
+    )
+    network_tx_bytes_per_sec: Optional[float] = Field(
+        None, description="Bytes sent per second, all interfaces"
+    )
+    block_read_bytes_per_sec: Optional[float] = Field(
+        None, description="Bytes read from block devices per second"
+    )
+    block_write_bytes_per_sec: Optional[float] = Field(
+        None, description="Bytes written to block devices per second"
+    )
+    pids: Optional[int] = Field(None, description="Number of processes and threads")
+
+
+class ContainerStatsResponse(BaseModel):
+    """Recent resource usage of a running container"""
+
+    id: str = Field(..., description="Container ID")
+    name: str = Field(..., description="Name of the container")
+    samples: List[ContainerStatsSample] = Field(
+        ..., description="Samples, oldest first"
+    )
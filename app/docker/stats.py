@@ -0,0 +1,308 @@
+import asyncio
+import json
+import time
+from collections import deque
+from typing import AsyncIterator, Deque, Dict, Iterable, List, Optional, Set
+
+from loguru import logger
+
+from ..settings import settings
+from ..system.utils.rates import counter_delta
+from .clients import DockerClient, DockerError
+from .inventory import RUNNING_STATES, container_inventory
+
+
+def _memory_usage(memory: Dict) -> Optional[int]:
+    """Usage as `docker stats` reports it: without the inactive page cache (cgroup v1 or v2 key)."""
+    usage = memory.get("usage")
+    if usage is None:
+        return None
+    stats = memory.get("stats") or {}
+    inactive = stats.get("total_inactive_file", stats.get("inactive_file", 0))
+    return usage - inactive if inactive < usage else usage
+
+
+def _io_counters(frame: Dict) -> Dict[str, int]:
+    counters = {"rx": 0, "tx": 0, "read": 0, "write": 0}
+    for network in (frame.get("networks") or {}).values():
+        counters["rx"] += network.get("rx_bytes", 0)
+        counters["tx"] += network.get("tx_bytes", 0)
+    for entry in (frame.get("blkio_stats") or {}).get(
+        "io_service_bytes_recursive"
+    ) or []:
+        # "Read"/"Write" with cgroup v1, "read"/"write" with v2
+        op = entry.get("op", "").lower()
+        if op in ("read", "write"):
+            counters[op] += entry.get("value", 0)
+    return counters
+
+
+class _Stream:
+    """Rates state and recent samples of one container's stats stream."""
+
+    __slots__ = ("name", "task", "samples", "cpu", "io", "received_at")
+
+    def __init__(self, name: str):
+        self.name = name
+        self.task: Optional[asyncio.Task] = None
+        self.samples: Deque[Dict] = deque(maxlen=settings.DOCKER_STATS_HISTORY)
+        self.cpu: Optional[Dict] = None
+        self.io: Optional[Dict[str, int]] = None
+        self.received_at: Optional[float] = None
+
+    def reset(self) -> None:
+        # A new stream starts over: its first frame has nothing to be compared with
+        self.cpu = self.io = self.received_at = None
+
+    def sample(self, frame: Dict) -> Dict:
+        """Derive a sample from a frame and the one before it."""
+        now = time.time()
+        cpu_stats = frame.get("cpu_stats") or {}
+        cpu_usage = cpu_stats.get("cpu_usage") or {}
+        memory = frame.get("memory_stats") or {}
+        online_cpus = (
+            cpu_stats.get("online_cpus")
+            or len(cpu_usage.get("percpu_usage") or [])
+            or None
+        )
+        cpu_percent = None
+        if self.cpu is not None:
+            # The same formula as `docker stats`: 100% is one core fully used
+            cpu_delta = cpu_usage.get("total_usage", 0) - (
+                self.cpu.get("cpu_usage") or {}
+            ).get("total_usage", 0)
+            system_delta = cpu_stats.get("system_cpu_usage", 0) - self.cpu.get(
+                "system_cpu_usage", 0
+            )
+            if system_delta > 0 and cpu_delta >= 0:
+                cpu_percent = round(
+                    cpu_delta / system_delta * (online_cpus or 1) * 100, 2
+                )
+        usage, limit = _memory_usage(memory), memory.get("limit")
+        io = _io_counters(frame)
+        rates: Dict[str, Optional[float]] = dict.fromkeys(io)
+        elapsed = now - self.received_at if self.received_at is not None else 0.0
+        if self.io is not None and elapsed > 0:
+            for key, value in io.items():
+                delta = counter_delta(self.io[key], value)
+                rates[key] = round(delta / elapsed, 2) if delta is not None else None
+        self.cpu, self.io, self.received_at = cpu_stats, io, now
+        return {
+            "timestamp": now,
+            "cpu_percent": cpu_percent,
+            "online_cpus": online_cpus,
+            "memory_usage": usage,
+            "memory_limit": limit,
+            "memory_percent": round(usage / limit * 100, 2)
+            if usage is not None and limit
+            else None,
+            "network_rx_bytes_per_sec": rates["rx"],
+            "network_tx_bytes_per_sec": rates["tx"],
+            "block_read_bytes_per_sec": rates["read"],
+            "block_write_bytes_per_sec": rates["write"],
+            "pids": (frame.get("pids_stats") or {}).get("current"),
+        }
+
+
+def _stats_message(container_id: str, stream: _Stream, sample: Dict) -> Dict:
+    return {"type": "stats", "id": container_id, "name": stream.name, "sample": sample}
+
+
+def _encode(message: Dict) -> str:
+    return json.dumps(message, separators=(",", ":"))
+
+
+class StatsSubscriber:
+    """
+    One multiplexed stream client. Only the newest unsent message per container is kept,
+    so a slow client skips samples instead of queueing them.
+    """
+
+    __slots__ = ("ids", "all", "pending", "wakeup")
+
+    def __init__(self):
+        self.ids: Set[str] = set()
+        self.all = False
+        self.pending: Dict[str, str] = {}
+        self.wakeup = asyncio.Event()
+
+    def wants(self, container_id: str) -> bool:
+        return self.all or container_id in self.ids
+
+    def offer(self, key: str, message: str) -> None:
+        self.pending[key] = message
+        self.wakeup.set()
+
+    async def messages(self) -> AsyncIterator[str]:
+        while True:
+            await self.wakeup.wait()
+            self.wakeup.clear()
+            pending, self.pending = self.pending, {}
+            for message in pending.values():
+                yield message
+
+
+class ContainerStats:
+    """
+    Live resource usage of the running containers.
+    Holds one streaming stats request per running container (at most DOCKER_STATS_MAX_STREAMS),
+    started and stopped as the container inventory sees containers start and die. The streams
+    use their own connection pool so they never take connections from API requests.
+    """
+
+    def __init__(self):
+        self._streams: Dict[str, _Stream] = {}
+        self._subscribers: Set[StatsSubscriber] = set()
+        self._client: Optional[DockerClient] = None
+        self._capped = False
+        container_inventory.add_listener(self.sync)
+
+    @property
+    def stream_count(self) -> int:
+        return len(self._streams)
+
+    async def start(self) -> None:
+        self._client = DockerClient(
+            settings.DOCKER_STATS_MAX_STREAMS, settings.DOCKER_TIMEOUT
+        )
+        self.sync()
+
+    async def stop(self) -> None:
+        streams, self._streams = self._streams, {}
+        tasks = [stream.task for stream in streams.values() if stream.task]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        if self._client is not None:
+            await self._client.close()
+            self._client = None
+
+    def sync(self) -> None:
+        """Inventory listener: follow every running container and only those."""
+        if self._client is None:
+            return
+        running = {
+            c.id: c.name
+            for c in container_inventory.list(all_containers=True)
+            if c.status in RUNNING_STATES
+        }
+        for container_id in list(self._streams):
+            if container_id not in running:
+                self._stream_stopped(container_id)
+        for container_id, name in running.items():
+            stream = self._streams.get(container_id)
+            if stream is not None:
+                stream.name = name
+            elif len(self._streams) < settings.DOCKER_STATS_MAX_STREAMS:
+                stream = self._streams[container_id] = _Stream(name)
+                stream.task = asyncio.create_task(self._follow(container_id, stream))
+            elif not self._capped:
+                self._capped = True
+                logger.warning(
+                    f"More than {settings.DOCKER_STATS_MAX_STREAMS} running containers, not streaming stats of the rest"
+                )
+        if len(running) <= settings.DOCKER_STATS_MAX_STREAMS:
+            self._capped = False
+
+    def _stream_stopped(self, container_id: str) -> None:
+        stream = self._streams.pop(container_id)
+        if stream.task:
+            stream.task.cancel()
+        self._publish(container_id, {"type": "stopped", "id": container_id})
+
+    async def _follow(self, container_id: str, stream: _Stream) -> None:
+        while True:
+            try:
+                async with self._client.stats(container_id) as frames:
+                    stream.reset()
+                    async for frame in frames:
+                        sample = stream.sample(frame)
+                        stream.samples.append(sample)
+                        self._publish(
+                            container_id, _stats_message(container_id, stream, sample)
+                        )
+            except DockerError as e:
+                logger.debug(
+                    f"Stats stream of container {container_id[:12]} failed: {str(e)}"
+                )
+            except Exception:
+                # e.g. a malformed frame; the stream must keep following the container regardless
+                logger.exception(
+                    f"Stats stream of container {container_id[:12]} failed"
+                )
+            # Ended while the container still runs (e.g. dockerd restarted); the inventory cancels us otherwise
+            await asyncio.sleep(settings.DOCKER_RECONNECT_INTERVAL)
+
+    def _publish(self, container_id: str, message: Dict) -> None:
+        subscribers = [
+            subscriber
+            for subscriber in self._subscribers
+            if subscriber.wants(container_id)
+        ]
+        if not subscribers:
+            return
+        # Encoded once however many clients receive it
+        encoded = _encode(message)
+        for subscriber in subscribers:
+            subscriber.offer(container_id, encoded)
+
+    def snapshot(self, history: bool = False) -> List[Dict]:
+        """Latest sample, or every kept sample, of each container whose stats are streamed."""
+        return [
+            {
+                "id": container_id,
+                "name": stream.name,
+                "samples": list(stream.samples)[0 if history else -1 :],
+            }
+            for container_id, stream in self._streams.items()
+        ]
+
+    def add_subscriber(self) -> StatsSubscriber:
+        subscriber = StatsSubscriber()
+        self._subscribers.add(subscriber)
+        return subscriber
+
+    def remove_subscriber(self, subscriber: StatsSubscriber) -> None:
+        self._subscribers.discard(subscriber)
+
+    def subscribe(self, subscriber: StatsSubscriber, refs: Iterable[str]) -> List[str]:
+        """
+        Add containers, by ID, name or ID prefix, or "*" for all of them, to a subscription.
+        The latest sample of each is sent right away. Returns the references that matched nothing.
+        """
+        unknown = []
+        added = set()
+        for ref in refs:
+            if ref == "*":
+                subscriber.all = True
+                added.update(self._streams)
+                continue
+            container = container_inventory.find(ref)
+            if container is None:
+                unknown.append(ref)
+                continue
+            subscriber.ids.add(container.id)
+            added.add(container.id)
+        for container_id in added:
+            stream = self._streams.get(container_id)
+            if stream is not None and stream.samples:
+                subscriber.offer(
+                    container_id,
+                    _encode(_stats_message(container_id, stream, stream.samples[-1])),
+                )
+        return unknown
+
+    def unsubscribe(self, subscriber: StatsSubscriber, refs: Iterable[str]) -> None:
+        for ref in refs:
+            if ref == "*":
+                subscriber.all = False
+                subscriber.ids.clear()
+                continue
+            container = container_inventory.find(ref)
+            container_id = container.id if container is not None else ref
+            subscriber.ids.discard(container_id)
+            if not subscriber.wants(container_id):
+                subscriber.pending.pop(container_id, None)
+
+
+container_stats = ContainerStats()
@@ -0,0 +1,6 @@
+from .agent import fleet_agent
+from .client import close_http_client
+from .registry import fleet_registry
+from .router import router
+
+__all__ = ["fleet_agent", "fleet_registry", "close_http_client", "router"]
@@ -0,0 +1,126 @@
+import asyncio
+import gzip
+import json
+import math
+import time
+from collections import deque
+from typing import Deque, Dict, List, Optional, Tuple
+
+from fastapi import HTTPException
+from fastapi.encoders import jsonable_encoder
+from loguru import logger
+
+from ..alerts.engine import alert_series
+from ..docker.connection import docker_connection
+from ..settings import settings
+from .client import fleet_headers, http_client
+
+
+class FleetAgent:
+    """
+    Pushes this instance's metrics to a central SnakeOS instance.
+    Samples are buffered between pushes and sent as one gzip-compressed batch together with
+    the latest full snapshot and, every FLEET_INVENTORY_INTERVAL, the container inventory.
+    """
+
+    def __init__(self):
+        # Enough for the samples between two pushes, plus headroom while the central is unreachable
+        capacity = 10 * max(
+            1, math.ceil(settings.FLEET_PUSH_INTERVAL / settings.SYSTEM_SAMPLE_INTERVAL)
+        )
+        # (sequence number, sample), so a push drops exactly what it sent even if the deque rotated
+        self._samples: Deque[Tuple[int, Dict]] = deque(maxlen=capacity)
+        self._sequence = 0
+        self._snapshot: Optional[Dict] = None
+        self._containers: Optional[List[Dict]] = None
+        self._inventory_due = 0.0
+        self._task: Optional[asyncio.Task] = None
+
+    def record_snapshot(self, snapshot: Dict) -> None:
+        """Sampler listener."""
+        self._snapshot = snapshot
+        self._sequence += 1
+        self._samples.append(
+            (
+                self._sequence,
+                {
+                    "sampled_at": snapshot["sampled_at"],
+                    "values": alert_series(snapshot),
+                },
+            )
+        )
+
+    async def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+        logger.info(
+            f"Fleet agent '{settings.FLEET_NODE_NAME}' pushing to {settings.FLEET_CENTRAL_URL}"
+        )
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+            logger.info("Fleet agent stopped")
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(settings.FLEET_PUSH_INTERVAL)
+            try:
+                await self.push()
+            except Exception as e:
+                logger.warning(
+                    f"Fleet push to {settings.FLEET_CENTRAL_URL} failed: {e}"
+                )
+
+    async def _inventory(self) -> Optional[List[Dict]]:
+        """Container inventory when one is due, otherwise None (the central keeps the last one)."""
+        if time.monotonic() < self._inventory_due:
+            return None
+        self._inventory_due = time.monotonic() + settings.FLEET_INVENTORY_INTERVAL
+        try:
+            client = await docker_connection.client()
+            return await client.list_container_states()
+        except HTTPException as e:
+            logger.debug(f"Fleet agent container inventory unavailable: {e.detail}")
+            return None
+
+    async def push(self) -> None:
+        pending = list(self._samples)
+        samples = [sample for _, sample in pending]
+        batch = {
+            "node": settings.FLEET_NODE_NAME,
+            "version": settings.PROJECT_VERSION,
+            "samples": samples,
+            "snapshot": self._snapshot,
+            "containers": await self._inventory(),
+        }
+        body = await asyncio.to_thread(_encode, batch)
+        response = await http_client().post(
+            f"{settings.FLEET_CENTRAL_URL.rstrip('/')}{settings.API_V1_STR}/fleet/ingest",
+            content=body,
+            headers={
+                **fleet_headers(),
+                "Content-Type": "application/json",
+                "Content-Encoding": "gzip",
+            },
+        )
+        response.raise_for_status()
+        # Only drop what was sent; samples taken during the request go out with the next push
+        if pending:
+            sent = pending[-1][0]
+            while self._samples and self._samples[0][0] <= sent:
+                self._samples.popleft()
+
+
+def _encode(batch: Dict) -> bytes:
+    return gzip.compress(
+        json.dumps(jsonable_encoder(batch), separators=(",", ":")).encode(),
+        compresslevel=6,
+    )
+
+
+fleet_agent = FleetAgent()
@@ -0,0 +1,26 @@
+from typing import Dict, Optional
+
+import httpx
+
+from ..settings import settings
+
+_client: Optional[httpx.AsyncClient] = None
+
+
+def http_client() -> httpx.AsyncClient:
+    """HTTP client shared by agent pushes and live fleet queries, so connections are reused."""
+    global _client
+    if _client is None:
+        _client = httpx.AsyncClient(timeout=settings.FLEET_NODE_TIMEOUT)
+    return _client
+
+
+async def close_http_client() -> None:
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+def fleet_headers() -> Dict[str, str]:
+    return {"Authorization": f"Bearer {settings.FLEET_TOKEN}"}
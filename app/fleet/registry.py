@@ -0,0 +1,269 @@
+import asyncio
+import json
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+import httpx
+from fastapi.encoders import jsonable_encoder
+from loguru import logger
+from redis.exceptions import RedisError
+
+from .. import cache
+from ..alerts import alert_engine
+from ..connections import get_redis
+from ..settings import settings
+from ..system.utils import sampler
+from ..system.utils.system_monitor import select_fields
+from .client import fleet_headers, http_client
+from .schemas import FleetBatch, FleetSample
+
+SAMPLES_CHANNEL = "snakeos_fleet_samples"
+
+# Live query kind -> agent endpoint serving it
+LIVE_ENDPOINTS = {
+    "system": "/fleet/local/system",
+    "containers": "/fleet/local/containers",
+}
+
+
+class _Node:
+    __slots__ = ("name", "version", "system", "containers", "last_seen", "pushes")
+
+    def __init__(self, name: str):
+        self.name = name
+        self.version: Optional[str] = None
+        self.system: Optional[Dict] = None
+        self.containers: Optional[List[Dict]] = None
+        self.last_seen: Optional[datetime] = None
+        self.pushes = 0
+
+    @classmethod
+    def from_shared(cls, name: str, fields: Dict[str, str]) -> "_Node":
+        node = cls(name)
+        for field in ("version", "system", "containers"):
+            if field in fields:
+                setattr(node, field, json.loads(fields[field]))
+        if "last_seen" in fields:
+            node.last_seen = datetime.fromisoformat(json.loads(fields["last_seen"]))
+        node.pushes = int(fields.get("pushes", 0))
+        return node
+
+    @property
+    def url(self) -> Optional[str]:
+        # Only URLs configured on the central instance are queried, as they receive FLEET_TOKEN
+        url = settings.FLEET_NODE_URLS.get(self.name)
+        return url.rstrip("/") if url else None
+
+    @property
+    def stale(self) -> bool:
+        # Wall clock, so every worker agrees on a node pushed to another one
+        if self.last_seen is None:
+            return True
+        age = (datetime.now(timezone.utc) - self.last_seen).total_seconds()
+        return age > settings.FLEET_NODE_STALE_AFTER
+
+
+def _node_key(name: str) -> str:
+    return cache.key("fleet", "node", name)
+
+
+def _encode(value: Any) -> str:
+    return json.dumps(jsonable_encoder(value), separators=(",", ":"))
+
+
+class FleetRegistry:
+    """
+    Aggregate of the nodes pushing to this (central) instance.
+    Fleet queries answer from the latest push of every node, or fan out to the nodes
+    concurrently with a per-node deadline and fall back to the cached data per node.
+    With Redis, nodes are stored there so every worker answers alike whichever one received
+    a push, and pushed samples are broadcast to the sampler leaseholder, which evaluates alerts.
+    """
+
+    def __init__(self):
+        self._nodes: Dict[str, _Node] = {}
+        self._listener: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        if settings.ALERTS_ENABLED:
+            self._listener = asyncio.create_task(
+                cache.subscribe(SAMPLES_CHANNEL, self._received, lambda: None)
+            )
+
+    async def stop(self) -> None:
+        if self._listener:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+            self._listener = None
+
+    async def nodes(self) -> List[Dict]:
+        return [
+            {
+                "name": node.name,
+                "url": node.url,
+                "version": node.version,
+                "last_seen": node.last_seen,
+                "stale": node.stale,
+                "pushes": node.pushes,
+            }
+            for node in await self._load()
+        ]
+
+    async def ingest(self, batch: FleetBatch) -> None:
+        node = self._nodes.get(batch.node)
+        if node is None:
+            node = self._nodes[batch.node] = _Node(batch.node)
+        node.version = batch.version
+        if batch.snapshot is not None:
+            node.system = batch.snapshot
+        if batch.containers is not None:
+            node.containers = [container.model_dump() for container in batch.containers]
+        node.last_seen = datetime.now(timezone.utc)
+        node.pushes += 1
+
+        shared = await self._share(batch, node)
+        if settings.ALERTS_ENABLED and batch.samples:
+            message = _encode({"node": batch.node, "samples": batch.samples})
+            if not (shared and await cache.publish(SAMPLES_CHANNEL, message)):
+                self._observe(batch.node, batch.samples)
+
+    async def _share(self, batch: FleetBatch, node: _Node) -> bool:
+        """Store the push in Redis; False when Redis is not available or the write failed."""
+        redis = get_redis()
+        if redis is None:
+            return False
+        fields = {
+            "version": _encode(node.version),
+            "last_seen": _encode(node.last_seen),
+        }
+        # Fields the batch omits keep the value of an earlier push, possibly to another worker
+        if batch.snapshot is not None:
+            fields["system"] = _encode(node.system)
+        if batch.containers is not None:
+            fields["containers"] = _encode(node.containers)
+        try:
+            async with redis.pipeline(transaction=True) as pipe:
+                pipe.sadd(cache.key("fleet", "nodes"), batch.node)
+                pipe.hset(_node_key(batch.node), mapping=fields)
+                pipe.hincrby(_node_key(batch.node), "pushes", 1)
+                await pipe.execute()
+        except RedisError as e:
+            logger.warning(f"Failed to share fleet push of '{batch.node}': {e}")
+            return False
+        return True
+
+    async def _load(self) -> List[_Node]:
+        """Every node, sorted by name: from Redis when available, otherwise this worker's."""
+        redis = get_redis()
+        if redis is not None:
+            try:
+                names = sorted(await redis.smembers(cache.key("fleet", "nodes")))
+                async with redis.pipeline(transaction=False) as pipe:
+                    for name in names:
+                        pipe.hgetall(_node_key(name))
+                    shared = await pipe.execute()
+                return [
+                    _Node.from_shared(name, fields)
+                    for name, fields in zip(names, shared)
+                    if fields
+                ]
+            except RedisError as e:
+                logger.warning(
+                    f"Shared fleet nodes unavailable, using this worker's: {e}"
+                )
+        return sorted(self._nodes.values(), key=lambda node: node.name)
+
+    async def _update(self, node: _Node, kind: str, data: Any) -> None:
+        """Keep the result of a live query as the node's latest data."""
+        setattr(node, kind, data)
+        if node.name in self._nodes:
+            setattr(self._nodes[node.name], kind, data)
+        redis = get_redis()
+        if redis is None:
+            return
+        try:
+            await redis.hset(_node_key(node.name), kind, _encode(data))
+        except RedisError as e:
+            logger.warning(f"Failed to share live fleet data of '{node.name}': {e}")
+
+    def _received(self, message: str) -> None:
+        # Alert windows live on the leaseholder only, like those of local samples
+        if not sampler.leader:
+            return
+        data = json.loads(message)
+        samples = [FleetSample.model_validate(sample) for sample in data["samples"]]
+        self._observe(data["node"], samples)
+
+    @staticmethod
+    def _observe(name: str, samples: List[FleetSample]) -> None:
+        # Every sample of the batch is evaluated, so alert windows keep the agent's resolution
+        prefix = f"fleet.{name}."
+        for sample in samples:
+            alert_engine.observe(
+                sample.sampled_at,
+                {prefix + series: value for series, value in sample.values.items()},
+                source=prefix,
+            )
+
+    def _cached(self, node: _Node, kind: str, include: Optional[List[str]]) -> Dict:
+        data = getattr(node, kind)
+        if kind == "system" and include and data is not None:
+            data = select_fields(data, include)
+        return {
+            "status": "stale" if node.stale else "ok",
+            "error": None,
+            "last_seen": node.last_seen,
+            kind: data,
+        }
+
+    async def query(
+        self, kind: str, live: bool = False, include: Optional[List[str]] = None
+    ) -> Dict[str, Dict]:
+        """System information or container inventory per node."""
+        nodes = await self._load()
+        if not live:
+            return {node.name: self._cached(node, kind, include) for node in nodes}
+        results = await asyncio.gather(
+            *(self._query_node(node, kind, include) for node in nodes)
+        )
+        return dict(zip((node.name for node in nodes), results))
+
+    async def _query_node(
+        self, node: _Node, kind: str, include: Optional[List[str]]
+    ) -> Dict:
+        if node.url is None:
+            return {**self._cached(node, kind, include), "status": "cached"}
+        params = {"include": ",".join(include)} if include else None
+        try:
+            response = await asyncio.wait_for(
+                http_client().get(
+                    f"{node.url}{settings.API_V1_STR}{LIVE_ENDPOINTS[kind]}",
+                    params=params,
+                    headers=fleet_headers(),
+                ),
+                timeout=settings.FLEET_NODE_TIMEOUT,
+            )
+            response.raise_for_status()
+            data = response.json()
+        except (asyncio.TimeoutError, httpx.TimeoutException):
+            error = f"Timed out after {settings.FLEET_NODE_TIMEOUT}s"
+            return {
+                **self._cached(node, kind, include),
+                "status": "timeout",
+                "error": error,
+            }
+        except (httpx.HTTPError, ValueError) as e:
+            return {
+                **self._cached(node, kind, include),
+                "status": "error",
+                "error": str(e) or type(e).__name__,
+            }
+        if not include:
+            await self._update(node, kind, data)
+        return {"status": "ok", "error": None, "last_seen": node.last_seen, kind: data}
+
+
+fleet_registry = FleetRegistry()
@@ -0,0 +1,142 @@
+import asyncio
+import json
+import secrets
+import zlib
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from pydantic import ValidationError
+
+from ..auth.utils import get_current_user
+from ..docker.connection import docker_connection
+from ..models import User
+from ..settings import settings
+from ..system.utils import sampler
+from ..system.utils.system_monitor import select_fields
+from . import schemas
+from .registry import fleet_registry
+
+router = APIRouter(prefix="/fleet", tags=["Fleet"])
+
+Live = Query(
+    False, description="Query every node now instead of answering from their last push"
+)
+Include = Query(
+    None, description="Comma-separated dotted paths of system information to return"
+)
+
+
+def _check_fleet_token(request: Request) -> None:
+    """Agent-to-central and central-to-agent calls authenticate with the shared FLEET_TOKEN."""
+    if not settings.FLEET_TOKEN:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Fleet mode is not enabled"
+        )
+    authorization = request.headers.get("authorization", "")
+    if not secrets.compare_digest(authorization, f"Bearer {settings.FLEET_TOKEN}"):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid fleet token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+
+def _batch_too_large() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail="Batch too large"
+    )
+
+
+async def _read_body(request: Request) -> bytes:
+    """The request body, refused as soon as it is known to exceed FLEET_MAX_BATCH_BYTES."""
+    length = request.headers.get("content-length", "")
+    if length.isdigit() and int(length) > settings.FLEET_MAX_BATCH_BYTES:
+        raise _batch_too_large()
+    # Chunked bodies have no length up front, so the cap also applies while reading
+    body = bytearray()
+    async for chunk in request.stream():
+        body += chunk
+        if len(body) > settings.FLEET_MAX_BATCH_BYTES:
+            raise _batch_too_large()
+    return bytes(body)
+
+
+def _decode_batch(body: bytes, encoding: str) -> schemas.FleetBatch:
+    if encoding == "gzip":
+        # Bounded decompression, so a small body cannot expand without limit
+        decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        body = decompressor.decompress(body, settings.FLEET_MAX_BATCH_BYTES)
+        if decompressor.unconsumed_tail:
+            raise _batch_too_large()
+    return schemas.FleetBatch.model_validate(json.loads(body))
+
+
+def _parse_include(include: Optional[str]) -> Optional[List[str]]:
+    if not include:
+        return None
+    return [field.strip() for field in include.split(",") if field.strip()]
+
+
+@router.post(
+    "/ingest",
+    status_code=status.HTTP_204_NO_CONTENT,
+    dependencies=[Depends(_check_fleet_token)],
+)
+async def ingest(request: Request):
+    """Receive a batch pushed by an agent"""
+    body = await _read_body(request)
+    try:
+        batch = await asyncio.to_thread(
+            _decode_batch, body, request.headers.get("content-encoding", "")
+        )
+    except (zlib.error, ValueError, ValidationError) as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail=f"Invalid batch: {str(e)}"
+        )
+    await fleet_registry.ingest(batch)
+
+
+@router.get("/nodes", response_model=List[schemas.FleetNode])
+async def list_nodes(_: User = Depends(get_current_user)):
+    """List the nodes pushing to this instance"""
+    return await fleet_registry.nodes()
+
+
+@router.get("/system", response_model=schemas.FleetSystem)
+async def get_fleet_system(
+    live: bool = Live,
+    include: Optional[str] = Include,
+    _: User = Depends(get_current_user),
+):
+    """Get system information of every node; nodes that fail a live query return their last push"""
+    return {
+        "nodes": await fleet_registry.query("system", live, _parse_include(include))
+    }
+
+
+@router.get("/containers", response_model=schemas.FleetContainers)
+async def get_fleet_containers(live: bool = Live, _: User = Depends(get_current_user)):
+    """Get the container inventory of every node; nodes that fail a live query return their last push"""
+    return {"nodes": await fleet_registry.query("containers", live)}
+
+
+@router.get(
+    "/local/system", dependencies=[Depends(_check_fleet_token)], include_in_schema=False
+)
+async def get_local_system(include: Optional[str] = Include):
+    """This node's system information, for live fleet queries from the central instance"""
+    snapshot = await sampler.get_snapshot()
+    fields = _parse_include(include)
+    return select_fields(snapshot, fields) if fields else snapshot
+
+
+@router.get(
+    "/local/containers",
+    response_model=List[schemas.ContainerState],
+    dependencies=[Depends(_check_fleet_token)],
+    include_in_schema=False,
+)
+async def get_local_containers():
+    """This node's container inventory, for live fleet queries from the central instance"""
+    client = await docker_connection.client()
+    return await client.list_container_states()
@@ -0,0 +1,86 @@
+from datetime import datetime
+from typing import Any, Dict, List, Literal, Optional
+
+from pydantic import BaseModel, Field
+
+NodeStatus = Literal["ok", "stale", "cached", "timeout", "error"]
+
+
+class ContainerState(BaseModel):
+    id: str = Field(description="Container ID")
+    name: str = Field(description="Container name")
+    image: str = Field(description="Image the container runs")
+    state: str = Field(description="Container state (running, exited, ...)")
+
+
+class FleetSample(BaseModel):
+    sampled_at: datetime = Field(description="Time the sample was taken on the agent")
+    values: Dict[str, float] = Field(
+        description="Numeric series of the sample, keyed by dotted path"
+    )
+
+
+class FleetBatch(BaseModel):
+    node: str = Field(
+        ..., min_length=1, max_length=255, description="Name of the pushing node"
+    )
+    version: Optional[str] = Field(None, description="SnakeOS version of the node")
+    samples: List[FleetSample] = Field(
+        default_factory=list, description="Samples taken since the previous push"
+    )
+    snapshot: Optional[Dict[str, Any]] = Field(
+        None, description="Latest full system snapshot"
+    )
+    containers: Optional[List[ContainerState]] = Field(
+        None,
+        description="Container inventory, omitted when unchanged since it was last sent",
+    )
+
+
+class FleetNode(BaseModel):
+    name: str = Field(description="Node name")
+    url: Optional[str] = Field(
+        None, description="Base URL used for live queries, from FLEET_NODE_URLS"
+    )
+    version: Optional[str] = Field(None, description="SnakeOS version of the node")
+    last_seen: datetime = Field(description="Time of the last push")
+    stale: bool = Field(
+        description="Whether the node missed pushes for longer than FLEET_NODE_STALE_AFTER"
+    )
+    pushes: int = Field(description="Batches received from the node")
+
+
+class FleetNodeSystem(BaseModel):
+    status: NodeStatus = Field(
+        description="ok (live or fresh), stale, cached (no URL in FLEET_NODE_URLS), timeout or error"
+    )
+    error: Optional[str] = Field(None, description="Why live data is missing")
+    last_seen: Optional[datetime] = Field(
+        None, description="Time of the node's last push"
+    )
+    system: Optional[Dict[str, Any]] = Field(
+        None, description="System information, live or from the last push"
+    )
+
+
+class FleetNodeContainers(BaseModel):
+    status: NodeStatus = Field(
+        description="ok (live or fresh), stale, cached (no URL in FLEET_NODE_URLS), timeout or error"
+    )
+    error: Optional[str] = Field(None, description="Why live data is missing")
+    last_seen: Optional[datetime] = Field(
+        None, description="Time of the node's last push"
+    )
+    containers: Optional[List[ContainerState]] = Field(
+        None, description="Container inventory, live or from the last push"
+    )
+
+
+class FleetSystem(BaseModel):
+    nodes: Dict[str, FleetNodeSystem] = Field(description="System information per node")
+
+
+class FleetContainers(BaseModel):
+    nodes: Dict[str, FleetNodeContainers] = Field(
+        description="Container inventory per node"
+    )
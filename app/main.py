@@ -1,22 +1,77 @@
 from fastapi import FastAPI
 from contextlib import asynccontextmanager
 from loguru import logger
+from .alerts import router as alerts_router
 from .auth import router as auth_router
 from .system import router as system_router
 from .docker import router as docker_router
+from .fleet import router as fleet_router
+from .metrics import RequestMetricsMiddleware
+from .metrics import router as metrics_router
 from .settings import settings
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     from . import connections
+    from .alerts import alert_engine
+    from .auth.cache import session_cache
+    from .auth.hashing import password_hasher
+    from .auth.sweeper import session_sweeper
+    from .docker.connection import docker_connection
+    from .docker.inventory import container_inventory
+    from .docker.logs import container_logs
+    from .docker.stats import container_stats
+    from .fleet import close_http_client, fleet_agent, fleet_registry
+    from .system.utils import broadcaster, history, metric_store, sampler
 
     logger.info(f"Starting up server '{app.title}'")
     await connections.init_external_clients(app)
+    await session_cache.start()
+    await password_hasher.start()
+    await session_sweeper.start()
+    await docker_connection.start()
+    if settings.DOCKER_INVENTORY_ENABLED:
+        await container_inventory.start()
+        if settings.DOCKER_STATS_ENABLED:
+            await container_stats.start()
+    sampler.add_listener(history.record_snapshot)
+    sampler.add_listener(broadcaster.publish)
+    if settings.METRICS_PERSIST_ENABLED:
+        sampler.add_listener(metric_store.record_snapshot, leader_only=True)
+        await metric_store.start()
+    if settings.ALERTS_ENABLED:
+        await alert_engine.start()
+        sampler.add_listener(alert_engine.record_snapshot, leader_only=True)
+    if settings.FLEET_TOKEN:
+        await fleet_registry.start()
+    if settings.FLEET_CENTRAL_URL:
+        sampler.add_listener(fleet_agent.record_snapshot, leader_only=True)
+        await fleet_agent.start()
+    await sampler.start()
     logger.info(f"Completed startup routines for '{app.title}'")
 
     yield
 
+    await sampler.stop()
+    if settings.METRICS_PERSIST_ENABLED:
+        await metric_store.stop()
+    if settings.ALERTS_ENABLED:
+        await alert_engine.stop()
+    if settings.FLEET_CENTRAL_URL:
+        await fleet_agent.stop()
+    if settings.FLEET_TOKEN:
+        await fleet_registry.stop()
+    await close_http_client()
+    if settings.DOCKER_INVENTORY_ENABLED:
+        if settings.DOCKER_STATS_ENABLED:
+            await container_stats.stop()
+        await container_inventory.stop()
+    await container_logs.stop()
+    await docker_connection.stop()
+    await session_sweeper.stop()
+    await session_cache.stop()
+    password_hasher.stop()
     await connections.shutdown()
 
 
@@ -36,3 +91,9 @@ app = FastAPI(
 app.include_router(auth_router, prefix=settings.API_V1_STR)
 app.include_router(system_router, prefix=settings.API_V1_STR)
 app.include_router(docker_router, prefix=settings.API_V1_STR)
+app.include_router(alerts_router, prefix=settings.API_V1_STR)
+app.include_router(fleet_router, prefix=settings.API_V1_STR)
+
+if settings.METRICS_ENABLED:
+    app.add_middleware(RequestMetricsMiddleware)
+    app.include_router(metrics_router)
@@ -0,0 +1,4 @@
+from .instrumentation import RequestMetricsMiddleware
+from .router import router
+
+__all__ = ["RequestMetricsMiddleware", "router"]
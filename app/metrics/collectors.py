@@ -0,0 +1,325 @@
+from typing import Dict, List, Optional
+
+from tortoise import connections
+
+from ..auth.cache import session_cache
+from ..auth.ratelimit import rate_limiter
+from ..system.utils import broadcaster, sampler, system_monitor
+from .exposition import MetricsWriter, labels
+
+# Snapshot field -> (metric name, help) for per-interface network counters
+NETWORK_COUNTERS = {
+    "bytes_recv": (
+        "snakeos_network_receive_bytes_total",
+        "Bytes received per interface",
+    ),
+    "bytes_sent": ("snakeos_network_transmit_bytes_total", "Bytes sent per interface"),
+    "packets_recv": (
+        "snakeos_network_receive_packets_total",
+        "Packets received per interface",
+    ),
+    "packets_sent": (
+        "snakeos_network_transmit_packets_total",
+        "Packets sent per interface",
+    ),
+    "errors_in": (
+        "snakeos_network_receive_errors_total",
+        "Receive errors per interface",
+    ),
+    "errors_out": (
+        "snakeos_network_transmit_errors_total",
+        "Transmit errors per interface",
+    ),
+    "drop_in": (
+        "snakeos_network_receive_drops_total",
+        "Inbound packets dropped per interface",
+    ),
+    "drop_out": (
+        "snakeos_network_transmit_drops_total",
+        "Outbound packets dropped per interface",
+    ),
+}
+
+DISK_IO_COUNTERS = {
+    "read_count": (
+        "snakeos_disk_reads_completed_total",
+        "Reads completed per block device",
+    ),
+    "write_count": (
+        "snakeos_disk_writes_completed_total",
+        "Writes completed per block device",
+    ),
+    "read_bytes": ("snakeos_disk_read_bytes_total", "Bytes read per block device"),
+    "write_bytes": (
+        "snakeos_disk_written_bytes_total",
+        "Bytes written per block device",
+    ),
+}
+
+DISK_USAGE_GAUGES = {
+    "total": ("snakeos_filesystem_size_gigabytes", "Filesystem size in GB"),
+    "used": ("snakeos_filesystem_used_gigabytes", "Filesystem space used in GB"),
+    "free": ("snakeos_filesystem_free_gigabytes", "Filesystem space free in GB"),
+    "percentage": ("snakeos_filesystem_usage_percent", "Filesystem usage percentage"),
+}
+
+MEMORY_GAUGES = {
+    "total": ("snakeos_memory_total_gigabytes", "Total RAM in GB"),
+    "available": ("snakeos_memory_available_gigabytes", "Available RAM in GB"),
+    "used": ("snakeos_memory_used_gigabytes", "Used RAM in GB"),
+    "percentage": ("snakeos_memory_usage_percent", "RAM usage percentage"),
+}
+
+SWAP_GAUGES = {
+    "total": ("snakeos_swap_total_gigabytes", "Total swap in GB"),
+    "used": ("snakeos_swap_used_gigabytes", "Used swap in GB"),
+    "percentage": ("snakeos_swap_usage_percent", "Swap usage percentage"),
+}
+
+CGROUP_GAUGES = {
+    "cpu_usage": (
+        "snakeos_cgroup_cpu_usage_percent",
+        "CPU usage of the SnakeOS cgroup, relative to its limit",
+    ),
+    "cpu_limit": (
+        "snakeos_cgroup_cpu_limit_cores",
+        "CPU quota of the SnakeOS cgroup in cores",
+    ),
+    "memory_used": (
+        "snakeos_cgroup_memory_used_gigabytes",
+        "Memory used by the SnakeOS cgroup in GB",
+    ),
+    "memory_limit": (
+        "snakeos_cgroup_memory_limit_gigabytes",
+        "Memory limit of the SnakeOS cgroup in GB",
+    ),
+    "memory_percentage": (
+        "snakeos_cgroup_memory_usage_percent",
+        "Memory usage of the SnakeOS cgroup, relative to its limit",
+    ),
+}
+
+
+def _per_device(
+    writer: MetricsWriter,
+    kind: str,
+    fields: Dict,
+    label_name: str,
+    devices: Dict[str, Dict],
+) -> None:
+    """Write one family per field with a sample per device."""
+    for field, (name, help_text) in fields.items():
+        writer.family(name, kind, help_text)
+        for device, values in devices.items():
+            if isinstance(values, dict):
+                writer.sample(name, labels((label_name, device)), values.get(field))
+
+
+def render_host(writer: MetricsWriter, snapshot: Dict) -> None:
+    cpu = snapshot.get("cpu")
+    if cpu:
+        writer.gauge(
+            "snakeos_cpu_usage_percent",
+            "Total CPU usage percentage",
+            cpu["total_cpu_usage"],
+        )
+        writer.family(
+            "snakeos_cpu_core_usage_percent",
+            "gauge",
+            "CPU usage percentage per logical core",
+        )
+        for core, usage in enumerate(cpu["cpu_usage_per_core"]):
+            writer.sample(
+                "snakeos_cpu_core_usage_percent", labels(("core", str(core))), usage
+            )
+        writer.gauge(
+            "snakeos_cpu_frequency_mhz",
+            "Current CPU frequency in MHz",
+            cpu["cpu_freq_current"],
+        )
+        writer.gauge(
+            "snakeos_cpu_logical_cores",
+            "Number of logical CPU cores",
+            cpu["total_cores"],
+        )
+
+    memory = snapshot.get("memory")
+    if memory:
+        for field, (name, help_text) in MEMORY_GAUGES.items():
+            writer.gauge(name, help_text, memory[field])
+        for field, (name, help_text) in SWAP_GAUGES.items():
+            writer.gauge(name, help_text, memory["swap"][field])
+
+    disks = snapshot.get("disks")
+    if disks:
+        for field, (name, help_text) in DISK_USAGE_GAUGES.items():
+            writer.family(name, "gauge", help_text)
+            for disk in disks:
+                writer.sample(
+                    name,
+                    labels(
+                        ("device", disk["device"]),
+                        ("mountpoint", disk["mountpoint"]),
+                        ("fstype", disk["filesystem_type"]),
+                    ),
+                    disk[field],
+                )
+
+    if snapshot.get("disk_io"):
+        _per_device(writer, "counter", DISK_IO_COUNTERS, "device", snapshot["disk_io"])
+
+    network = snapshot.get("network")
+    if network:
+        _per_device(
+            writer, "counter", NETWORK_COUNTERS, "interface", network["io_counters"]
+        )
+
+    cgroup = snapshot.get("cgroup")
+    if cgroup:
+        for field, (name, help_text) in CGROUP_GAUGES.items():
+            writer.gauge(name, help_text, cgroup[field])
+
+    writer.family(
+        "snakeos_collector_up",
+        "gauge",
+        "Whether the last collection of a section succeeded",
+    )
+    for section, status in snapshot.get("sections", {}).items():
+        writer.sample(
+            "snakeos_collector_up",
+            labels(("section", section)),
+            1 if status["status"] == "ok" else 0,
+        )
+
+    writer.gauge(
+        "snakeos_sampler_snapshot_age_seconds",
+        "Age of the latest host snapshot",
+        round(sampler.age or 0.0, 3),
+    )
+
+
+def render_containers(writer: MetricsWriter, containers: Optional[List[Dict]]) -> None:
+    writer.gauge(
+        "snakeos_docker_up",
+        "Whether the Docker engine answered the last inventory request",
+        int(containers is not None),
+    )
+    if containers is None:
+        return
+    counts: Dict[str, int] = {}
+    writer.family(
+        "snakeos_container_info", "gauge", "Container inventory; the value is always 1"
+    )
+    for container in containers:
+        counts[container["state"]] = counts.get(container["state"], 0) + 1
+        writer.sample(
+            "snakeos_container_info",
+            labels(
+                ("id", container["id"][:12]),
+                ("name", container["name"]),
+                ("image", container["image"]),
+                ("state", container["state"]),
+            ),
+            1,
+        )
+    writer.family("snakeos_containers", "gauge", "Number of containers per state")
+    for state, count in counts.items():
+        writer.sample("snakeos_containers", labels(("state", state)), count)
+
+
+def render_backend(writer: MetricsWriter) -> None:
+    pool = None
+    try:
+        pool = getattr(connections.get("default"), "_pool", None)
+    except Exception:
+        pass
+    # asyncpg exposes pool sizes; other backends (e.g. SQLite) have no pool to report
+    if pool is not None and hasattr(pool, "get_size"):
+        writer.gauge(
+            "snakeos_db_pool_connections", "Open database connections", pool.get_size()
+        )
+        writer.gauge(
+            "snakeos_db_pool_idle_connections",
+            "Idle database connections",
+            pool.get_idle_size(),
+        )
+        writer.gauge(
+            "snakeos_db_pool_max_connections",
+            "Maximum database connections",
+            pool.get_max_size(),
+        )
+
+    writer.gauge(
+        "snakeos_auth_session_cache_entries",
+        "Validated sessions cached in this worker",
+        len(session_cache),
+    )
+    for name, help_text, value in (
+        (
+            "snakeos_auth_session_cache_hits_total",
+            "Requests authenticated from the session cache",
+            session_cache.hits,
+        ),
+        (
+            "snakeos_auth_session_cache_shared_hits_total",
+            "Requests authenticated from the Redis session store",
+            session_cache.shared_hits,
+        ),
+        (
+            "snakeos_auth_session_cache_misses_total",
+            "Requests not found in this worker's session cache",
+            session_cache.misses,
+        ),
+        (
+            "snakeos_auth_session_cache_evictions_total",
+            "Sessions evicted to respect the cache size",
+            session_cache.evictions,
+        ),
+        (
+            "snakeos_auth_session_cache_invalidations_total",
+            "Sessions dropped by logout or user changes",
+            session_cache.invalidations,
+        ),
+    ):
+        writer.family(name, "counter", help_text)
+        writer.sample(name, "", value)
+
+    writer.family(
+        "snakeos_rate_limited_requests_total",
+        "counter",
+        "Requests rejected by a rate limit",
+    )
+    for name, count in rate_limiter.rejected.items():
+        writer.sample(
+            "snakeos_rate_limited_requests_total", labels(("limit", name)), count
+        )
+
+    writer.gauge(
+        "snakeos_stream_subscribers",
+        "Connected live metric stream clients",
+        broadcaster.subscriber_count,
+    )
+
+    stats = system_monitor.get_cache_stats()
+    writer.family(
+        "snakeos_collector_cache_hits_total",
+        "counter",
+        "Collector calls served from cache",
+    )
+    for name, collector in stats.items():
+        writer.sample(
+            "snakeos_collector_cache_hits_total",
+            labels(("collector", name)),
+            collector["hits"],
+        )
+    writer.family(
+        "snakeos_collector_cache_misses_total",
+        "counter",
+        "Collector calls that ran the collector",
+    )
+    for name, collector in stats.items():
+        writer.sample(
+            "snakeos_collector_cache_misses_total",
+            labels(("collector", name)),
+            collector["misses"],
+        )
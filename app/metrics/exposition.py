@@ -0,0 +1,66 @@
+from functools import lru_cache
+from typing import List, Tuple, Union
+
+OPENMETRICS_CONTENT_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+@lru_cache(maxsize=8192)
+def labels(*pairs: Tuple[str, str]) -> str:
+    """
+    Render a label set as '{name="value",...}'.
+    Results are cached, so a scrape reuses the strings built by previous scrapes.
+    """
+    if not pairs:
+        return ""
+    return (
+        "{" + ",".join(f'{name}="{_escape(str(value))}"' for name, value in pairs) + "}"
+    )
+
+
+class MetricsWriter:
+    """Accumulates metric families in Prometheus text or OpenMetrics format."""
+
+    def __init__(self, openmetrics: bool = False):
+        self.openmetrics = openmetrics
+        self._lines: List[str] = []
+
+    @property
+    def content_type(self) -> str:
+        return OPENMETRICS_CONTENT_TYPE if self.openmetrics else PROMETHEUS_CONTENT_TYPE
+
+    def family(self, name: str, kind: str, help_text: str) -> None:
+        # OpenMetrics names counter families without the _total suffix of their samples
+        if kind == "counter" and self.openmetrics and name.endswith("_total"):
+            name = name[: -len("_total")]
+        self._lines.append(f"# HELP {name} {help_text}")
+        self._lines.append(f"# TYPE {name} {kind}")
+
+    def sample(
+        self, name: str, label_string: str, value: Union[int, float, None]
+    ) -> None:
+        if value is None:
+            return
+        self._lines.append(f"{name}{label_string} {value}")
+
+    def gauge(
+        self,
+        name: str,
+        help_text: str,
+        value: Union[int, float, None],
+        label_string: str = "",
+    ) -> None:
+        """Write a single-sample gauge family."""
+        if value is None:
+            return
+        self.family(name, "gauge", help_text)
+        self.sample(name, label_string, value)
+
+    def render(self) -> str:
+        if self.openmetrics:
+            self._lines.append("# EOF")
+        return "\n".join(self._lines) + "\n"
@@ -0,0 +1,97 @@
+import time
+from bisect import bisect_left
+from typing import Dict, List, Sequence
+
+from .exposition import MetricsWriter, labels
+
+DEFAULT_LATENCY_BUCKETS = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+
+class Histogram:
+    """Cumulative histogram keyed by a pre-rendered label string."""
+
+    def __init__(self, name: str, help_text: str, buckets: Sequence[float]):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = tuple(buckets)
+        self._bucket_labels = tuple(repr(float(bound)) for bound in self.buckets) + (
+            "+Inf",
+        )
+        # label string -> [per-bucket counts..., +Inf count, sum]
+        self._series: Dict[str, List[float]] = {}
+
+    def observe(self, label_string: str, value: float) -> None:
+        series = self._series.get(label_string)
+        if series is None:
+            series = self._series[label_string] = [0] * (len(self.buckets) + 1) + [0.0]
+        series[bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def render(self, writer: MetricsWriter) -> None:
+        writer.family(self.name, "histogram", self.help_text)
+        for label_string, series in self._series.items():
+            # Label strings are rendered as '{a="b"}' (or ''), so le is appended inside the braces
+            prefix = label_string[:-1] + "," if label_string else "{"
+            cumulative = 0
+            for bound, count in zip(self._bucket_labels, series):
+                cumulative += count
+                writer.sample(
+                    f"{self.name}_bucket", f'{prefix}le="{bound}"}}', cumulative
+                )
+            writer.sample(f"{self.name}_sum", label_string, series[-1])
+            writer.sample(f"{self.name}_count", label_string, cumulative)
+
+
+request_latency = Histogram(
+    "snakeos_http_request_duration_seconds",
+    "HTTP request latency by route template",
+    DEFAULT_LATENCY_BUCKETS,
+)
+
+
+class RequestMetricsMiddleware:
+    """Pure ASGI middleware recording request latency per method, route template and status."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+        start = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            # Raw paths would create a series per ID; unmatched requests share one label
+            path = getattr(route, "path", "unmatched")
+            request_latency.observe(
+                labels(
+                    ("method", scope["method"]),
+                    ("route", path),
+                    ("status", str(status_code)),
+                ),
+                time.perf_counter() - start,
+            )
@@ -0,0 +1,70 @@
+import secrets
+import time
+from typing import Dict, List, Optional
+
+from fastapi import APIRouter, HTTPException, Request, Response, status
+from loguru import logger
+
+from .. import cache
+from ..docker.connection import docker_connection
+from ..settings import settings
+from ..system.utils import sampler
+from .collectors import render_backend, render_containers, render_host
+from .exposition import MetricsWriter
+from .instrumentation import request_latency
+
+router = APIRouter(tags=["Metrics"])
+
+CONTAINERS_KEY = "docker:containers"
+
+_containers: Optional[List[Dict]] = None
+_containers_expire_at = 0.0
+
+
+async def _container_states() -> Optional[List[Dict]]:
+    """
+    Container inventory for scrapes, cached for METRICS_CONTAINER_CACHE_TTL seconds.
+    With Redis the inventory is shared, so only one worker per TTL asks the Docker daemon.
+    """
+    global _containers, _containers_expire_at
+    if time.monotonic() < _containers_expire_at:
+        return _containers
+    _containers = await cache.get_json(CONTAINERS_KEY)
+    if _containers is None:
+        try:
+            client = await docker_connection.client()
+            _containers = await client.list_container_states()
+            await cache.set_json(
+                CONTAINERS_KEY, _containers, settings.METRICS_CONTAINER_CACHE_TTL
+            )
+        except HTTPException as e:
+            logger.warning(f"Container metrics unavailable: {e.detail}")
+            _containers = None
+    _containers_expire_at = time.monotonic() + settings.METRICS_CONTAINER_CACHE_TTL
+    return _containers
+
+
+def _check_token(request: Request) -> None:
+    if not settings.METRICS_TOKEN:
+        return
+    authorization = request.headers.get("authorization", "")
+    if not secrets.compare_digest(authorization, f"Bearer {settings.METRICS_TOKEN}"):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid metrics token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+
+@router.get("/metrics", include_in_schema=False)
+async def metrics(request: Request):
+    """Expose host, container and backend metrics in Prometheus or OpenMetrics text format."""
+    _check_token(request)
+    writer = MetricsWriter(
+        openmetrics="application/openmetrics-text" in request.headers.get("accept", "")
+    )
+    render_host(writer, await sampler.get_snapshot())
+    render_containers(writer, await _container_states())
+    render_backend(writer)
+    request_latency.render(writer)
+    return Response(content=writer.render(), media_type=writer.content_type)
@@ -1,4 +1,6 @@
+from .alerts import AlertRule
 from .base import BaseModel
+from .metrics import MetricRollup, MetricSample
 from .user import User, Session
 
-__all__ = ["BaseModel", "User", "Session"]
+__all__ = ["BaseModel", "User", "Session", "MetricSample", "MetricRollup", "AlertRule"]
@@ -0,0 +1,27 @@
+from tortoise import fields
+
+from .base import BaseModel
+
+
+class AlertRule(BaseModel):
+    """
+    A condition on a windowed aggregate of a metric series.
+    The rule fires when the aggregate crosses threshold and resolves once it is back past
+    clear_threshold (threshold when unset), which keeps a noisy series from flapping.
+    """
+
+    name = fields.CharField(max_length=100, unique=True)
+    metric = fields.CharField(max_length=255)
+    aggregation = fields.CharField(max_length=10, default="avg")
+    operator = fields.CharField(max_length=2, default=">")
+    threshold = fields.FloatField()
+    clear_threshold = fields.FloatField(null=True)
+    window = fields.IntField(default=60)
+    notifiers = fields.JSONField(default=list)
+    enabled = fields.BooleanField(default=True)
+
+    class Meta:
+        table = "alert_rules"
+
+    def __str__(self):
+        return f"{self.name}: {self.aggregation}({self.metric}, {self.window}s) {self.operator} {self.threshold}"
@@ -0,0 +1,41 @@
+from tortoise import fields, models
+
+
+class MetricSample(models.Model):
+    """
+    Raw value of one host metric series at one sample.
+    Does not extend BaseModel: these rows are written in bulk and never updated, so the
+    created_at/updated_at columns would only add width to the largest table.
+    """
+
+    id = fields.BigIntField(pk=True)
+    timestamp = fields.DatetimeField(index=True)
+    metric = fields.CharField(max_length=255)
+    value = fields.FloatField()
+
+    class Meta:
+        table = "metric_samples"
+        indexes = (("metric", "timestamp"),)
+
+    def __str__(self):
+        return f"{self.metric}@{self.timestamp}={self.value}"
+
+
+class MetricRollup(models.Model):
+    """Aggregate of a metric series over a 1m, 1h or 1d bucket."""
+
+    id = fields.BigIntField(pk=True)
+    resolution = fields.CharField(max_length=4)
+    bucket = fields.DatetimeField()
+    metric = fields.CharField(max_length=255)
+    min = fields.FloatField()
+    max = fields.FloatField()
+    avg = fields.FloatField()
+    count = fields.IntField()
+
+    class Meta:
+        table = "metric_rollups"
+        unique_together = (("resolution", "metric", "bucket"),)
+
+    def __str__(self):
+        return f"{self.metric}@{self.resolution}:{self.bucket}"
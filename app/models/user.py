@@ -17,12 +17,19 @@ class User(BaseModel):
 
 class Session(BaseModel):
     user = fields.ForeignKeyField("models.User", related_name="sessions")
-    token = fields.CharField(max_length=500)
+    token_hash = fields.CharField(
+        max_length=64, unique=True
+    )  # SHA-256 hex digest of the JWT
     is_active = fields.BooleanField(default=True)
-    expires_at = fields.DatetimeField()
+    expires_at = fields.DatetimeField(index=True)
 
     class Meta:
         table = "sessions"
+        # The first matches the authentication lookup, the second the expired session sweeper
+        indexes = (
+            ("token_hash", "is_active", "expires_at"),
+            ("is_active", "expires_at"),
+        )
 
     def __str__(self):
         return f"{self.user.email} - {self.created_at}"
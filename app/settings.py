@@ -1,3 +1,5 @@
+import socket
+import sys
 from typing import Optional
 from pydantic_settings import BaseSettings
 from functools import lru_cache
@@ -19,20 +21,179 @@ class Settings(BaseSettings):
     POSTGRES_PASSWORD: str = "snakeos"
     POSTGRES_DB: str = "snakeos"
     POSTGRES_PORT: str = "5432"
-    DB_URL: str = (
-        f"postgres://{POSTGRES_USER}:{POSTGRES_PASSWORD}@{POSTGRES_SERVER}:{POSTGRES_PORT}/{POSTGRES_DB}"
-    )
+    DB_URL: str = f"postgres://{POSTGRES_USER}:{POSTGRES_PASSWORD}@{POSTGRES_SERVER}:{POSTGRES_PORT}/{POSTGRES_DB}"
 
     # JWT Settings
     SECRET_KEY: str = "your-secret-key-here"  # Change this in production
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     ALGORITHM: str = "HS256"
+    BCRYPT_ROUNDS: int = (
+        12  # bcrypt cost; stored hashes with another cost are upgraded on login
+    )
+    PASSWORD_HASH_WORKERS: Optional[int] = (
+        None  # Processes hashing passwords (default: available cores)
+    )
+    PASSWORD_HASH_MAX_PENDING: int = (
+        64  # Queued password operations before requests get 503
+    )
+    PASSWORD_HASH_BULK_CHUNK: int = (
+        8  # Passwords per bulk hashing task; a login waits for at most one
+    )
+    AUTH_SESSION_CACHE_SIZE: int = 10000  # Validated sessions kept in memory per worker
+    AUTH_SESSION_CACHE_TTL: float = (
+        60.0  # Seconds a validated session is trusted without a database check
+    )
+    SESSION_SWEEP_INTERVAL: float = (
+        3600.0  # Seconds between deletions of expired and logged-out sessions
+    )
+    SESSION_SWEEP_BATCH_SIZE: int = (
+        1000  # Sessions deleted per statement by the sweeper
+    )
+    ADMIN_EMAILS: list[
+        str
+    ] = []  # Users allowed to use admin endpoints such as bulk registration
+    BULK_REGISTER_BATCH_SIZE: int = (
+        500  # Rows checked, hashed and inserted together by bulk registration
+    )
+
+    # Rate Limiting Settings
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_BACKEND: str = "memory"  # "memory" (per worker) or "redis" (shared between workers, needs Redis)
+    RATE_LIMITS: dict[
+        str, str
+    ] = {  # Requests per period for each limited route; bursts of up to the count are allowed
+        "login": "10/minute",
+        "register": "5/minute",
+        "system": "60/minute",
+        "containers": "60/minute",
+    }
+    RATE_LIMIT_MAX_KEYS: int = 100000  # Buckets kept per worker by the memory backend before full ones are dropped
+
+    # System Monitoring Settings
+    SYSTEM_SAMPLE_INTERVAL: float = 2.0  # Seconds between background metric samples
+    SYSTEM_BACKEND: str = (
+        "procfs" if sys.platform.startswith("linux") else "psutil"
+    )  # "procfs" or "psutil"
+    SYSTEM_HISTORY_RETENTION: int = 86400  # Seconds of metric history kept in memory
+    SYSTEM_HISTORY_MAX_SERIES: int = (
+        1000  # Series kept in memory; each takes 8 bytes per sample of retention
+    )
+    SYSTEM_HISTORY_MAX_POINTS: int = (
+        2000  # Upper bound on points per series in a history response
+    )
+    SYSTEM_PARTITIONS_CACHE_TTL: float = (
+        300.0  # Seconds to cache the disk partition list
+    )
+    SYSTEM_INTERFACES_CACHE_TTL: float = (
+        300.0  # Seconds to cache network interface addresses
+    )
+    SYSTEM_COLLECTOR_WORKERS: int = 4  # Threads used to run collectors concurrently
+    SYSTEM_COLLECTOR_TIMEOUT: float = 5.0  # Deadline for each collector in seconds
+    SYSTEM_MOUNT_TIMEOUT: float = (
+        2.0  # Deadline for reading usage of a single mountpoint
+    )
+    SYSTEM_PROCESS_REFRESH_INTERVAL: float = (
+        2.0  # Minimum seconds between process table refreshes
+    )
+    SYSTEM_PROCESS_WARMUP: float = (
+        0.25  # Seconds measured by the first process table refresh
+    )
+
+    # Docker Settings
+    DOCKER_HOST: str = "unix:///var/run/docker.sock"  # Docker daemon address: unix:// socket or plain tcp://
+    DOCKER_POOL_SIZE: int = (
+        32  # Connections to the Docker daemon kept by the shared client
+    )
+    DOCKER_TIMEOUT: int = 60  # Seconds before a Docker API call times out
+    DOCKER_IMAGE_CACHE_TTL: float = (
+        60.0  # Seconds image tags are reused before the image list is fetched again
+    )
+    DOCKER_HEALTH_INTERVAL: float = 10.0  # Seconds between pings of the Docker daemon
+    DOCKER_RECONNECT_INTERVAL: float = (
+        5.0  # Minimum seconds between reconnection attempts while Docker is down
+    )
+    DOCKER_INVENTORY_ENABLED: bool = (
+        True  # Serve container reads from memory, kept current by Docker's event stream
+    )
+    DOCKER_STATS_ENABLED: bool = True  # Stream resource usage of running containers; needs DOCKER_INVENTORY_ENABLED
+    DOCKER_STATS_HISTORY: int = (
+        60  # Stats samples kept per container, one about every second
+    )
+    DOCKER_STATS_MAX_STREAMS: int = (
+        100  # Most containers whose stats are streamed at the same time
+    )
+    DOCKER_LOGS_MAX_FOLLOWERS: int = (
+        20  # Most clients following container logs at the same time
+    )
+
+    # Metrics Settings
+    METRICS_ENABLED: bool = True  # Expose /metrics for Prometheus
+    METRICS_TOKEN: Optional[str] = None  # Bearer token required by /metrics when set
+    METRICS_CONTAINER_CACHE_TTL: float = (
+        15.0  # Seconds to reuse the container inventory between scrapes
+    )
+
+    # Metric Persistence Settings
+    METRICS_PERSIST_ENABLED: bool = True  # Store samples and rollups in the database
+    METRICS_PERSIST_PREFIXES: list[
+        str
+    ] = [  # Series (or prefixes) written to the database
+        "cpu.total_cpu_usage",
+        "memory.percentage",
+        "memory.used",
+        "memory.swap.percentage",
+        "rates.network",
+        "rates.disks",
+    ]
+    METRICS_FLUSH_INTERVAL: float = 10.0  # Seconds between batched writes
+    METRICS_FLUSH_BATCH_SIZE: int = 5000  # Rows per insert batch
+    METRICS_BUFFER_LIMIT: int = (
+        100000  # Unflushed rows kept while the database is unavailable
+    )
+    METRICS_RETENTION_INTERVAL: float = 600.0  # Seconds between retention runs
+    METRICS_RAW_RETENTION_HOURS: int = 24  # Hours of raw samples kept
+    METRICS_ROLLUP_RETENTION_DAYS: dict[str, int] = {
+        "1m": 7,
+        "1h": 90,
+        "1d": 1825,
+    }  # Days kept per rollup
+
+    # Alert Settings
+    ALERTS_ENABLED: bool = True  # Evaluate alert rules against every sample
+    ALERTS_WEBHOOK_TIMEOUT: float = (
+        5.0  # Seconds before a webhook notification is abandoned
+    )
+
+    # Fleet Settings
+    FLEET_TOKEN: Optional[str] = (
+        None  # Shared secret between agents and the central instance; enables fleet endpoints
+    )
+    FLEET_CENTRAL_URL: Optional[str] = (
+        None  # Base URL of the central instance; setting it runs this instance as an agent
+    )
+    FLEET_NODE_NAME: str = socket.gethostname()  # Name this agent reports under
+    FLEET_PUSH_INTERVAL: float = 10.0  # Seconds between agent pushes
+    FLEET_INVENTORY_INTERVAL: float = (
+        30.0  # Seconds between container inventories sent by an agent
+    )
+    FLEET_NODE_URLS: dict[
+        str, str
+    ] = {}  # Node name -> base URL the central instance queries live, e.g. {"web1": "http://10.0.0.5:8000"}
+    FLEET_NODE_TIMEOUT: float = 3.0  # Per-node deadline for live fleet queries
+    FLEET_NODE_STALE_AFTER: float = (
+        60.0  # Seconds without a push before a node is reported stale
+    )
+    FLEET_MAX_BATCH_BYTES: int = (
+        8 * 1024 * 1024
+    )  # Largest batch accepted from an agent, compressed or decompressed
 
     # Optional Redis Settings
     REDIS_HOST: Optional[str] = None
     REDIS_PORT: Optional[int] = None
     REDIS_PASSWORD: Optional[str] = None
     REDIS_DB: Optional[int] = 0
+    REDIS_MAX_CONNECTIONS: int = 20  # Connection pool size per worker
+    REDIS_KEY_PREFIX: str = "snakeos"  # Namespace of every key and channel, for Redis servers shared between deployments
 
     class Config:
         case_sensitive = True
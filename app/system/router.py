@@ -1,39 +1,316 @@
-from fastapi import APIRouter, Depends
+import asyncio
+from datetime import datetime, timedelta, timezone
+from typing import List, Literal, Optional
 
-from ..auth.utils import get_current_user
+from fastapi import (
+    APIRouter,
+    Depends,
+    HTTPException,
+    Query,
+    Response,
+    WebSocket,
+    WebSocketDisconnect,
+    status,
+)
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, StreamingResponse
+
+from ..auth.utils import authenticate_token, get_current_user
 from ..models.user import User
+from ..auth.ratelimit import rate_limit
 from ..settings import settings
 from . import schemas
-from .utils import system_monitor
+from .utils import (
+    broadcaster,
+    history,
+    metric_store,
+    process_table,
+    sampler,
+    system_monitor,
+)
 
 router = APIRouter(prefix=f"{settings.API_V1_STR}/system", tags=["System"])
 
+MaxAge = Query(
+    None, ge=0, description="Maximum acceptable age of the sampled metrics in seconds"
+)
+StreamInterval = Query(
+    settings.SYSTEM_SAMPLE_INTERVAL,
+    ge=0.1,
+    description="Minimum seconds between frames sent to this client",
+)
+StreamDelta = Query(
+    True, description="Send only changed fields after the first full frame"
+)
+
+
+def _section(snapshot: dict, name: str):
+    """Return a snapshot section, or 503 when its collector failed or timed out."""
+    if snapshot.get(name) is None:
+        error = snapshot.get("sections", {}).get(name, {}).get("error")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=f"{name} unavailable: {error}",
+        )
+    return snapshot[name]
+
 
-@router.get("/", response_model=schemas.SystemInfo)
-async def get_system_info(_: User = Depends(get_current_user)):
-    """Get complete system information including CPU, memory, disk, and network."""
-    return system_monitor.get_system_info()
+def _parse_fields(include: str) -> List[str]:
+    fields = [field.strip() for field in include.split(",") if field.strip()]
+    unknown = [
+        field
+        for field in fields
+        if field.split(".", 1)[0] not in schemas.SystemInfo.model_fields
+    ]
+    if unknown:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown fields: {', '.join(unknown)}",
+        )
+    return fields
+
+
+@router.get(
+    "/", response_model=schemas.SystemInfo, dependencies=[Depends(rate_limit("system"))]
+)
+async def get_system_info(
+    max_age: Optional[float] = MaxAge,
+    include: Optional[str] = Query(
+        None,
+        description="Comma-separated dotted paths to return, e.g. memory,network.io_counters (default: everything)",
+    ),
+    fields: Optional[str] = Query(None, description="Alias of include"),
+    _: User = Depends(get_current_user),
+):
+    """
+    Get complete system information including CPU, memory, disk, and network.
+    With include, only the requested parts of the latest sample are returned, even when it is
+    older than max_age: collectors keep state between samples, so only the sampler runs them.
+    """
+    include = include or fields
+    if not include:
+        return await sampler.get_snapshot(max_age)
+
+    paths = _parse_fields(include)
+    # Sampled here only before the first background sample
+    snapshot = sampler.peek() or await sampler.get_snapshot()
+    # Returned as-is so the unrequested parts of SystemInfo are never built or validated
+    return JSONResponse(jsonable_encoder(system_monitor.select_fields(snapshot, paths)))
 
 
 @router.get("/cpu", response_model=schemas.CpuInfo)
-async def get_cpu_info(_: User = Depends(get_current_user)):
+async def get_cpu_info(
+    max_age: Optional[float] = MaxAge, _: User = Depends(get_current_user)
+):
     """Get CPU information including usage and frequency."""
-    return system_monitor.get_cpu_info()
+    snapshot = await sampler.get_snapshot(max_age)
+    return {**_section(snapshot, "cpu"), "sampled_at": snapshot["sampled_at"]}
 
 
 @router.get("/memory", response_model=schemas.MemoryInfo)
-async def get_memory_info(_: User = Depends(get_current_user)):
+async def get_memory_info(
+    max_age: Optional[float] = MaxAge, _: User = Depends(get_current_user)
+):
     """Get memory information including RAM and swap usage."""
-    return system_monitor.get_memory_info()
+    snapshot = await sampler.get_snapshot(max_age)
+    return {**_section(snapshot, "memory"), "sampled_at": snapshot["sampled_at"]}
 
 
 @router.get("/disk", response_model=list[schemas.DiskPartition])
-async def get_disk_info(_: User = Depends(get_current_user)):
+async def get_disk_info(
+    response: Response,
+    max_age: Optional[float] = MaxAge,
+    _: User = Depends(get_current_user),
+):
     """Get disk information for all partitions."""
-    return system_monitor.get_disk_info()
+    snapshot = await sampler.get_snapshot(max_age)
+    disks = _section(snapshot, "disks")
+    response.headers["X-Sampled-At"] = snapshot["sampled_at"].isoformat()
+    return disks
 
 
 @router.get("/network", response_model=schemas.NetworkInfo)
-async def get_network_info(_: User = Depends(get_current_user)):
+async def get_network_info(
+    max_age: Optional[float] = MaxAge, _: User = Depends(get_current_user)
+):
     """Get network information including interfaces and IO statistics."""
-    return system_monitor.get_network_info()
+    snapshot = await sampler.get_snapshot(max_age)
+    return {**_section(snapshot, "network"), "sampled_at": snapshot["sampled_at"]}
+
+
+@router.get("/cgroup", response_model=schemas.CgroupInfo)
+async def get_cgroup_info(
+    max_age: Optional[float] = MaxAge, _: User = Depends(get_current_user)
+):
+    """Get CPU and memory usage and limits of the container (cgroup) SnakeOS runs in."""
+    snapshot = await sampler.get_snapshot(max_age)
+    return {**_section(snapshot, "cgroup"), "sampled_at": snapshot["sampled_at"]}
+
+
+@router.get("/rates", response_model=schemas.ThroughputRates)
+async def get_throughput_rates(
+    max_age: Optional[float] = MaxAge, _: User = Depends(get_current_user)
+):
+    """Get per-interface network and per-device disk rates between the last two samples."""
+    snapshot = await sampler.get_snapshot(max_age)
+    return {**_section(snapshot, "rates"), "sampled_at": snapshot["sampled_at"]}
+
+
+@router.get("/processes", response_model=schemas.ProcessList)
+async def get_processes(
+    sort: Literal["cpu", "mem", "io"] = Query(
+        "cpu", description="Sort by CPU, resident memory or disk I/O"
+    ),
+    limit: int = Query(10, ge=1, le=500, description="Number of processes to return"),
+    _: User = Depends(get_current_user),
+):
+    """Get the top processes by CPU, memory or I/O usage."""
+    processes = await process_table.top(sort, limit)
+    return {
+        "sort": sort,
+        "total": len(process_table),
+        "processes": processes,
+        "sampled_at": process_table.sampled_at,
+    }
+
+
+@router.get("/cache", response_model=dict[str, schemas.CollectorCacheStats])
+async def get_collector_cache_stats(_: User = Depends(get_current_user)):
+    """Get hit/miss statistics of the cached system collectors."""
+    return system_monitor.get_cache_stats()
+
+
+@router.get("/history", response_model=schemas.MetricHistory)
+async def get_metric_history(
+    metric: str = Query(
+        ..., description="Series name or prefix, e.g. cpu.total_cpu_usage or memory"
+    ),
+    start: Optional[datetime] = Query(
+        None, alias="from", description="Window start (default: one hour before end)"
+    ),
+    end: Optional[datetime] = Query(
+        None, alias="to", description="Window end (default: now)"
+    ),
+    step: Optional[float] = Query(None, gt=0, description="Bucket width in seconds"),
+    aggregation: Literal["buckets", "lttb"] = Query(
+        "buckets", description="Downsampling method"
+    ),
+    points: int = Query(
+        500,
+        ge=3,
+        le=settings.SYSTEM_HISTORY_MAX_POINTS,
+        description="Target points for LTTB",
+    ),
+    _: User = Depends(get_current_user),
+):
+    """
+    Get downsampled history of a metric.
+    Served from the in-memory ring buffer when it covers the window at the requested step,
+    otherwise from the coarsest persisted rollup that fits the step (or raw samples).
+    """
+    end = end or datetime.now(timezone.utc)
+    start = start or end - timedelta(hours=1)
+    if start >= end:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="'from' must be earlier than 'to'",
+        )
+
+    span = (end - start).total_seconds()
+    # Never return more buckets than the configured maximum, nor finer than the sampling resolution
+    min_step = max(
+        settings.SYSTEM_SAMPLE_INTERVAL, span / settings.SYSTEM_HISTORY_MAX_POINTS
+    )
+    step = max(step or min_step, min_step)
+
+    start_ts, end_ts = start.timestamp(), end.timestamp()
+    in_memory = history.oldest is not None and history.oldest <= start_ts
+    series = []
+    if settings.METRICS_PERSIST_ENABLED and (
+        metric_store.resolution_for(step) or not in_memory
+    ):
+        series = await metric_store.query(
+            metric, start_ts, end_ts, step, aggregation, points
+        )
+    if not series:
+        # Nothing persisted yet (fresh install, or the series is not in METRICS_PERSIST_PREFIXES)
+        series = history.query(metric, start_ts, end_ts, step, aggregation, points)
+    elif in_memory:
+        # A prefix may cover series that are not persisted; the ring buffer has them for this window
+        persisted = {item["metric"] for item in series}
+        series = sorted(
+            series
+            + [
+                item
+                for item in history.query(
+                    metric, start_ts, end_ts, step, aggregation, points
+                )
+                if item["metric"] not in persisted
+            ],
+            key=lambda item: item["metric"],
+        )
+    return {
+        "start": start,
+        "end": end,
+        "step": step if aggregation == "buckets" else None,
+        "aggregation": aggregation,
+        "series": series,
+    }
+
+
+@router.get("/stream")
+async def stream_system_info_sse(
+    interval: float = StreamInterval,
+    delta: bool = StreamDelta,
+    _: User = Depends(get_current_user),
+):
+    """Stream system snapshots as Server-Sent Events."""
+
+    async def events():
+        async for frame in broadcaster.frames(interval, delta):
+            yield f"data: {frame}\n\n"
+
+    return StreamingResponse(
+        events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"}
+    )
+
+
+@router.websocket("/stream")
+async def stream_system_info_ws(
+    websocket: WebSocket,
+    token: Optional[str] = Query(
+        None, description="Access token, for clients that cannot set headers"
+    ),
+    interval: float = StreamInterval,
+    delta: bool = StreamDelta,
+):
+    """Stream system snapshots over a WebSocket."""
+    authorization = websocket.headers.get("authorization", "")
+    if not token and authorization.lower().startswith("bearer "):
+        token = authorization[7:]
+    try:
+        await authenticate_token(token or "")
+    except HTTPException:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+
+    await websocket.accept()
+
+    async def pump():
+        async for frame in broadcaster.frames(interval, delta):
+            await websocket.send_text(frame)
+
+    async def drain():
+        # Client messages are ignored; receiving is how a disconnect is noticed while idle
+        try:
+            while True:
+                await websocket.receive_text()
+        except WebSocketDisconnect:
+            pass
+
+    tasks = [asyncio.create_task(pump()), asyncio.create_task(drain())]
+    try:
+        await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        for task in tasks:
+            task.cancel()
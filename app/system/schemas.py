@@ -1,4 +1,5 @@
-from typing import Dict, List, Optional
+from datetime import datetime
+from typing import Dict, List, Literal, Optional
 
 from pydantic import BaseModel, Field
 
@@ -16,12 +17,23 @@ class PlatformInfo(BaseModel):
 
 class CpuInfo(BaseModel):
     physical_cores: int = Field(description="Number of physical CPU cores")
-    total_cores: int = Field(description="Total number of CPU cores (including logical cores)")
-    cpu_freq_current: Optional[float] = Field(None, description="Current CPU frequency in MHz")
-    cpu_freq_min: Optional[float] = Field(None, description="Minimum CPU frequency in MHz")
-    cpu_freq_max: Optional[float] = Field(None, description="Maximum CPU frequency in MHz")
+    total_cores: int = Field(
+        description="Total number of CPU cores (including logical cores)"
+    )
+    cpu_freq_current: Optional[float] = Field(
+        None, description="Current CPU frequency in MHz"
+    )
+    cpu_freq_min: Optional[float] = Field(
+        None, description="Minimum CPU frequency in MHz"
+    )
+    cpu_freq_max: Optional[float] = Field(
+        None, description="Maximum CPU frequency in MHz"
+    )
     cpu_usage_per_core: List[float] = Field(description="CPU usage percentage per core")
     total_cpu_usage: float = Field(description="Total CPU usage percentage")
+    sampled_at: Optional[datetime] = Field(
+        None, description="Time the metrics were sampled"
+    )
 
 
 class SwapMemory(BaseModel):
@@ -37,6 +49,9 @@ class MemoryInfo(BaseModel):
     used: float = Field(description="Used RAM in GB")
     percentage: float = Field(description="RAM usage percentage")
     swap: SwapMemory = Field(description="Swap memory information")
+    sampled_at: Optional[datetime] = Field(
+        None, description="Time the metrics were sampled"
+    )
 
 
 class DiskPartition(BaseModel):
@@ -67,16 +82,192 @@ class NetworkIOCounters(BaseModel):
 
 
 class NetworkInfo(BaseModel):
-    interfaces: Dict[str, List[NetworkAddress]] = Field(description="Network interfaces information")
+    interfaces: Dict[str, List[NetworkAddress]] = Field(
+        description="Network interfaces information"
+    )
     io_counters: Dict[str, NetworkIOCounters | Dict[str, str]] = Field(
         description="Network I/O statistics per interface or error message if not available"
     )
+    sampled_at: Optional[datetime] = Field(
+        None, description="Time the metrics were sampled"
+    )
+
+
+class DiskIOCounters(BaseModel):
+    read_count: int = Field(description="Number of completed reads")
+    write_count: int = Field(description="Number of completed writes")
+    read_bytes: int = Field(description="Number of bytes read")
+    write_bytes: int = Field(description="Number of bytes written")
+
+
+class NetworkInterfaceRates(BaseModel):
+    rx_bytes_per_sec: Optional[float] = Field(
+        None, description="Bytes received per second"
+    )
+    tx_bytes_per_sec: Optional[float] = Field(None, description="Bytes sent per second")
+    rx_packets_per_sec: Optional[float] = Field(
+        None, description="Packets received per second"
+    )
+    tx_packets_per_sec: Optional[float] = Field(
+        None, description="Packets sent per second"
+    )
+    rx_errors_per_sec: Optional[float] = Field(
+        None, description="Incoming errors per second"
+    )
+    tx_errors_per_sec: Optional[float] = Field(
+        None, description="Outgoing errors per second"
+    )
+    rx_drops_per_sec: Optional[float] = Field(
+        None, description="Incoming packets dropped per second"
+    )
+    tx_drops_per_sec: Optional[float] = Field(
+        None, description="Outgoing packets dropped per second"
+    )
+
+
+class DiskIORates(BaseModel):
+    read_iops: Optional[float] = Field(None, description="Reads completed per second")
+    write_iops: Optional[float] = Field(None, description="Writes completed per second")
+    read_bytes_per_sec: Optional[float] = Field(
+        None, description="Bytes read per second"
+    )
+    write_bytes_per_sec: Optional[float] = Field(
+        None, description="Bytes written per second"
+    )
+
+
+class ThroughputRates(BaseModel):
+    interval: Optional[float] = Field(
+        None, description="Seconds between the two samples the rates derive from"
+    )
+    network: Dict[str, NetworkInterfaceRates] = Field(
+        description="Rates per network interface"
+    )
+    disks: Dict[str, DiskIORates] = Field(description="Rates per block device")
+    sampled_at: Optional[datetime] = Field(
+        None, description="Time the metrics were sampled"
+    )
+
+
+class CgroupInfo(BaseModel):
+    version: int = Field(description="cgroup hierarchy version (1 or 2)")
+    path: str = Field(description="cgroup of the SnakeOS process")
+    cpu_usage: Optional[float] = Field(
+        None,
+        description="CPU usage percentage relative to the CPU limit (or all host cores)",
+    )
+    cpu_cores_used: Optional[float] = Field(
+        None, description="Average number of cores used since the previous sample"
+    )
+    cpu_limit: Optional[float] = Field(
+        None, description="CPU quota in cores, null when unlimited"
+    )
+    memory_used: float = Field(
+        description="Memory used in GB, excluding reclaimable page cache"
+    )
+    memory_limit: Optional[float] = Field(
+        None, description="Memory limit in GB, null when unlimited"
+    )
+    memory_percentage: float = Field(
+        description="Memory usage percentage relative to the limit (or host RAM)"
+    )
+    sampled_at: Optional[datetime] = Field(
+        None, description="Time the metrics were sampled"
+    )
+
+
+class SectionStatus(BaseModel):
+    status: Literal["ok", "partial", "timeout", "error"] = Field(
+        description="Collection outcome"
+    )
+    error: Optional[str] = Field(
+        None, description="Reason the section is missing or incomplete"
+    )
 
 
 class SystemInfo(BaseModel):
-    platform: PlatformInfo = Field(description="Platform and OS information")
+    platform: Optional[PlatformInfo] = Field(
+        None, description="Platform and OS information"
+    )
     boot_time: str = Field(description="System boot time")
-    cpu: CpuInfo = Field(description="CPU information")
-    memory: MemoryInfo = Field(description="Memory information")
-    disks: List[DiskPartition] = Field(description="Disk partitions information")
-    network: NetworkInfo = Field(description="Network information")
+    cpu: Optional[CpuInfo] = Field(None, description="CPU information")
+    memory: Optional[MemoryInfo] = Field(None, description="Memory information")
+    disks: Optional[List[DiskPartition]] = Field(
+        None, description="Disk partitions information"
+    )
+    disk_io: Optional[Dict[str, DiskIOCounters]] = Field(
+        None, description="I/O counters per block device"
+    )
+    network: Optional[NetworkInfo] = Field(None, description="Network information")
+    cgroup: Optional[CgroupInfo] = Field(
+        None, description="CPU and memory usage and limits of the SnakeOS cgroup"
+    )
+    rates: Optional[ThroughputRates] = Field(
+        None, description="Network and disk throughput rates"
+    )
+    sections: Dict[str, SectionStatus] = Field(
+        default_factory=dict, description="Collection status per section"
+    )
+    sampled_at: Optional[datetime] = Field(
+        None, description="Time the metrics were sampled"
+    )
+
+
+class HistorySeries(BaseModel):
+    metric: str = Field(
+        description="Series name as a dotted path into the system info response"
+    )
+    timestamps: List[float] = Field(
+        description="Unix timestamps of the bucket starts or selected points"
+    )
+    values: List[float] = Field(
+        description="Average value per bucket, or the selected points for LTTB"
+    )
+    min: Optional[List[float]] = Field(None, description="Minimum value per bucket")
+    max: Optional[List[float]] = Field(None, description="Maximum value per bucket")
+
+
+class MetricHistory(BaseModel):
+    start: datetime = Field(description="Start of the requested window")
+    end: datetime = Field(description="End of the requested window")
+    step: Optional[float] = Field(None, description="Bucket width in seconds")
+    aggregation: str = Field(description="Downsampling method (buckets or lttb)")
+    series: List[HistorySeries] = Field(description="Matching metric series")
+
+
+class CollectorCacheStats(BaseModel):
+    ttl: Optional[float] = Field(
+        None, description="Cache lifetime in seconds, or null when cached forever"
+    )
+    hits: int = Field(description="Number of calls served from the cache")
+    misses: int = Field(description="Number of calls that ran the collector")
+
+
+class ProcessInfo(BaseModel):
+    pid: int = Field(description="Process ID")
+    name: str = Field(description="Process name")
+    username: Optional[str] = Field(None, description="Owner of the process")
+    status: str = Field(description="Process status")
+    cpu_percent: float = Field(
+        description="CPU usage percentage since the previous refresh (can exceed 100 on multiple cores)"
+    )
+    memory_rss: float = Field(description="Resident memory in MB")
+    memory_percent: float = Field(
+        description="Resident memory as a percentage of total RAM"
+    )
+    num_threads: int = Field(description="Number of threads")
+    io_bytes_per_sec: float = Field(
+        description="Disk bytes read and written per second"
+    )
+    container_id: Optional[str] = Field(
+        None, description="ID of the Docker container the process runs in"
+    )
+
+
+class ProcessList(BaseModel):
+    sort: str = Field(description="Sort key")
+    total: int = Field(description="Number of processes in the table")
+    processes: List[ProcessInfo] = Field(description="Top processes by the sort key")
+    sampled_at: Optional[datetime] = Field(
+        None, description="Time the process table was refreshed"
+    )
@@ -1 +1,15 @@
 from . import system_monitor
+from .sampler import sampler
+from .history import history
+from .stream import broadcaster
+from .processes import process_table
+from .persistence import metric_store
+
+__all__ = [
+    "system_monitor",
+    "sampler",
+    "history",
+    "broadcaster",
+    "process_table",
+    "metric_store",
+]
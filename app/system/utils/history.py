@@ -0,0 +1,279 @@
+import math
+from array import array
+from bisect import bisect_left, bisect_right
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from loguru import logger
+
+from ...settings import settings
+
+NAN = float("nan")
+
+# Snapshot sections kept in history, as dotted paths into the system info response
+HISTORY_SECTIONS = (
+    "cpu",
+    "memory",
+    "cgroup",
+    "network.io_counters",
+    "rates.network",
+    "rates.disks",
+)
+
+
+def flatten_numeric(prefix: str, value, out: Dict[str, float]) -> Dict[str, float]:
+    """Flatten nested dicts and lists into dotted-path keys, keeping only numeric leaves."""
+    if isinstance(value, bool):
+        return out
+    if isinstance(value, (int, float)):
+        out[prefix] = float(value)
+    elif isinstance(value, dict):
+        for key, item in value.items():
+            flatten_numeric(f"{prefix}.{key}" if prefix else str(key), item, out)
+    elif isinstance(value, list):
+        for index, item in enumerate(value):
+            flatten_numeric(f"{prefix}.{index}", item, out)
+    return out
+
+
+def _resolve(snapshot: Dict, path: str):
+    value = snapshot
+    for key in path.split("."):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(key)
+    return value
+
+
+def extract_series(snapshot: Dict) -> Dict[str, float]:
+    """Numeric fields of the history sections of a snapshot, keyed by series name."""
+    values: Dict[str, float] = {}
+    for path in HISTORY_SECTIONS:
+        section = _resolve(snapshot, path)
+        if isinstance(section, dict):
+            flatten_numeric(path, section, values)
+    return values
+
+
+def match_metric(name: str, metric: str) -> bool:
+    """Whether a series name equals metric or is nested under it."""
+    return name == metric or name.startswith(f"{metric}.")
+
+
+def downsample_buckets(
+    timestamps: array, values: array, start: float, step: float
+) -> Tuple[array, array, array, array]:
+    """
+    Aggregate points into fixed-width buckets aligned to start.
+    Bucket bounds are located with bisect and each bucket is reduced with the C-level
+    min/max/sum builtins over an array slice, so the Python loop runs once per bucket
+    rather than once per point. Empty buckets are omitted.
+    """
+    out_ts, out_min, out_max, out_avg = array("d"), array("d"), array("d"), array("d")
+    count = len(timestamps)
+    lo = 0
+    while lo < count:
+        bucket = start + math.floor((timestamps[lo] - start) / step) * step
+        # Float rounding can put the bucket end at or before timestamps[lo]; always make progress
+        hi = max(bisect_left(timestamps, bucket + step, lo), lo + 1)
+        chunk = values[lo:hi]
+        total = math.fsum(chunk)
+        if total != total:
+            # NaN marks samples where the series was absent; only then pay for filtering
+            chunk = array("d", (v for v in chunk if v == v))
+            total = math.fsum(chunk)
+        if chunk:
+            out_ts.append(bucket)
+            out_min.append(min(chunk))
+            out_max.append(max(chunk))
+            out_avg.append(total / len(chunk))
+        lo = hi
+    return out_ts, out_min, out_max, out_avg
+
+
+def downsample_lttb(
+    timestamps: array, values: array, threshold: int
+) -> Tuple[array, array]:
+    """Largest-Triangle-Three-Buckets downsampling, preserving the visual shape of a series."""
+    points = [(t, v) for t, v in zip(timestamps, values) if v == v]
+    count = len(points)
+    if threshold >= count or threshold < 3:
+        return array("d", (p[0] for p in points)), array("d", (p[1] for p in points))
+
+    out_ts, out_values = array("d", [points[0][0]]), array("d", [points[0][1]])
+    every = (count - 2) / (threshold - 2)
+    selected = 0
+    for i in range(threshold - 2):
+        # Average of the next bucket is the third vertex of the triangle
+        next_start = int((i + 1) * every) + 1
+        next_end = min(int((i + 2) * every) + 1, count)
+        next_points = points[next_start:next_end]
+        avg_t = math.fsum(p[0] for p in next_points) / len(next_points)
+        avg_v = math.fsum(p[1] for p in next_points) / len(next_points)
+
+        ax, ay = points[selected]
+        best_area, best = -1.0, selected
+        for j in range(int(i * every) + 1, next_start):
+            bx, by = points[j]
+            area = abs((ax - avg_t) * (by - ay) - (ax - bx) * (avg_v - ay))
+            if area > best_area:
+                best_area, best = area, j
+        out_ts.append(points[best][0])
+        out_values.append(points[best][1])
+        selected = best
+
+    out_ts.append(points[-1][0])
+    out_values.append(points[-1][1])
+    return out_ts, out_values
+
+
+class MetricHistory:
+    """
+    Bounded in-memory history of numeric system metrics.
+    All series share one timestamp ring; each series is a fixed-size array of doubles
+    written at the same slot, with NaN marking samples where the series was absent.
+    A series absent for a whole ring (e.g. the interface of a removed container) is dropped,
+    and at most max_series are kept: a new series replaces the one written least recently,
+    or is not recorded while every series kept is still being written.
+    """
+
+    def __init__(self, capacity: int, max_series: int):
+        self.capacity = capacity
+        self.max_series = max_series
+        self._timestamps = array("d", [NAN]) * capacity
+        self._series: Dict[str, array] = {}
+        # Series name -> number of the last sample that had a value for it
+        self._written: Dict[str, int] = {}
+        self._count = 0  # Samples recorded so far
+        self._head = 0  # Next slot to write
+        self._size = 0
+        self._capped = False
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def names(self) -> List[str]:
+        return sorted(self._series)
+
+    @property
+    def oldest(self) -> Optional[float]:
+        """Timestamp of the oldest sample still held, or None when empty."""
+        if not self._size:
+            return None
+        return self._timestamps[(self._head - self._size) % self.capacity]
+
+    def record_snapshot(self, snapshot: Dict) -> None:
+        """Sampler listener that appends the numeric fields of a snapshot."""
+        self.record(snapshot["sampled_at"].timestamp(), extract_series(snapshot))
+
+    def record(self, timestamp: float, values: Dict[str, float]) -> None:
+        slot = self._head
+        count = self._count = self._count + 1
+        self._timestamps[slot] = timestamp
+        expired = []
+        for name, series in self._series.items():
+            value = series[slot] = values.pop(name, NAN)
+            if value == value:
+                self._written[name] = count
+            elif count - self._written[name] >= self.capacity:
+                # Every slot of the ring is NaN now
+                expired.append(name)
+        for name in expired:
+            self._drop(name)
+        for name, value in values.items():
+            if len(self._series) >= self.max_series and not self._evict(count):
+                if not self._capped:
+                    logger.warning(
+                        f"More than {self.max_series} metric series, not keeping history of the new ones"
+                    )
+                    self._capped = True
+                break
+            series = array("d", [NAN]) * self.capacity
+            series[slot] = value
+            self._series[name] = series
+            self._written[name] = count
+        self._head = (slot + 1) % self.capacity
+        self._size = min(self._size + 1, self.capacity)
+
+    def _drop(self, name: str) -> None:
+        del self._series[name]
+        del self._written[name]
+
+    def _evict(self, count: int) -> bool:
+        """Make room by dropping the series written least recently, unless it is still written."""
+        name = min(self._written, key=self._written.get)
+        if self._written[name] == count:
+            return False
+        self._drop(name)
+        return True
+
+    def _ordered_slice(self, data: array, lo: int, hi: int) -> array:
+        """Slice [lo, hi) of the ring in chronological order."""
+        oldest = (self._head - self._size) % self.capacity
+        lo, hi = oldest + lo, oldest + hi
+        if hi <= self.capacity:
+            return data[lo:hi]
+        if lo >= self.capacity:
+            return data[lo - self.capacity : hi - self.capacity]
+        return data[lo:] + data[: hi - self.capacity]
+
+    def match(self, metric: str) -> Iterator[str]:
+        """Series names equal to metric or nested under it."""
+        for name in self.names:
+            if match_metric(name, metric):
+                yield name
+
+    def window(
+        self, metric: str, start: float, end: float
+    ) -> Iterator[Tuple[str, array, array]]:
+        """Yield (name, timestamps, values) for every matching series within [start, end]."""
+        timestamps = self._ordered_slice(self._timestamps, 0, self._size)
+        lo = bisect_left(timestamps, start)
+        hi = bisect_right(timestamps, end)
+        timestamps = timestamps[lo:hi]
+        for name in self.match(metric):
+            yield name, timestamps, self._ordered_slice(self._series[name], lo, hi)
+
+    def query(
+        self,
+        metric: str,
+        start: float,
+        end: float,
+        step: float,
+        aggregation: str = "buckets",
+        points: int = 500,
+    ) -> List[Dict]:
+        series = []
+        for name, timestamps, values in self.window(metric, start, end):
+            if aggregation == "lttb":
+                out_ts, out_values = downsample_lttb(timestamps, values, points)
+                series.append(
+                    {
+                        "metric": name,
+                        "timestamps": out_ts.tolist(),
+                        "values": out_values.tolist(),
+                    }
+                )
+            else:
+                out_ts, out_min, out_max, out_avg = downsample_buckets(
+                    timestamps, values, start, step
+                )
+                series.append(
+                    {
+                        "metric": name,
+                        "timestamps": out_ts.tolist(),
+                        "values": out_avg.tolist(),
+                        "min": out_min.tolist(),
+                        "max": out_max.tolist(),
+                    }
+                )
+        return series
+
+
+history = MetricHistory(
+    max(
+        1,
+        math.ceil(settings.SYSTEM_HISTORY_RETENTION / settings.SYSTEM_SAMPLE_INTERVAL),
+    ),
+    settings.SYSTEM_HISTORY_MAX_SERIES,
+)
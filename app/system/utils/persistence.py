@@ -0,0 +1,454 @@
+import asyncio
+import math
+import time
+from array import array
+from collections import deque
+from datetime import datetime, timedelta, timezone
+from typing import Deque, Dict, List, Optional, Tuple
+
+from loguru import logger
+from tortoise import connections
+from tortoise.expressions import Q
+from tortoise.transactions import in_transaction
+
+try:
+    from tortoise.backends.asyncpg import AsyncpgDBClient
+except ImportError:  # asyncpg not installed
+    AsyncpgDBClient = None
+
+from ...models import MetricRollup, MetricSample
+from ...settings import settings
+from .history import (
+    downsample_buckets,
+    downsample_lttb,
+    extract_series,
+    history,
+    match_metric,
+)
+from .sampler import sampler
+
+# Rollup resolutions in seconds, finest first
+RESOLUTIONS = {"1m": 60, "1h": 3600, "1d": 86400}
+
+# Rollup rows per upsert statement; 7 parameters each stays under the 32767 parameters PostgreSQL allows
+ROLLUP_BATCH_ROWS = 1000
+
+
+class _Aggregate:
+    __slots__ = ("min", "max", "sum", "count")
+
+    def __init__(self, value: float):
+        self.min = self.max = self.sum = value
+        self.count = 1
+
+    def add(self, value: float) -> None:
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+        self.sum += value
+        self.count += 1
+
+    def merged(self, other: "_Aggregate") -> "_Aggregate":
+        """A new aggregate of both; neither is changed, so a failed write can requeue them."""
+        result = _Aggregate(self.min if self.min < other.min else other.min)
+        result.max = self.max if self.max > other.max else other.max
+        result.sum = self.sum + other.sum
+        result.count = self.count + other.count
+        return result
+
+
+def _utc(timestamp: float) -> datetime:
+    return datetime.fromtimestamp(timestamp, timezone.utc)
+
+
+def _timestamp(value: datetime) -> float:
+    # Backends without timezone support hand back naive datetimes, which are stored as UTC
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+def _rollup_upsert_sql(rows: int, postgres: bool) -> str:
+    """Multi-row rollup insert that merges into an existing row of the same bucket (PostgreSQL and SQLite)."""
+    table = f'"{MetricRollup._meta.db_table}"'
+    columns = ("resolution", "bucket", "metric", "min", "max", "avg", "count")
+    quoted = ", ".join(f'"{column}"' for column in columns)
+    if postgres:
+        placeholders = [f"${i}" for i in range(1, rows * len(columns) + 1)]
+        least, greatest = "LEAST", "GREATEST"
+    else:
+        placeholders = ["?"] * (rows * len(columns))
+        least, greatest = "MIN", "MAX"
+    values = ", ".join(
+        "(" + ", ".join(placeholders[i : i + len(columns)]) + ")"
+        for i in range(0, len(placeholders), len(columns))
+    )
+    return (
+        f"INSERT INTO {table} ({quoted}) VALUES {values} "
+        'ON CONFLICT ("resolution", "metric", "bucket") DO UPDATE SET '
+        f'"min" = {least}({table}."min", EXCLUDED."min"), '
+        f'"max" = {greatest}({table}."max", EXCLUDED."max"), '
+        f'"avg" = ({table}."avg" * {table}."count" + EXCLUDED."avg" * EXCLUDED."count") / ({table}."count" + EXCLUDED."count"), '
+        f'"count" = {table}."count" + EXCLUDED."count"'
+    )
+
+
+def _live_rollups(
+    metric: str, bucket: float
+) -> Dict[str, Tuple[float, float, float, int]]:
+    """(min, max, avg, count) of the persisted series under metric since bucket, from the history."""
+    rollups = {}
+    for name, _, values in history.window(metric, bucket, math.inf):
+        present = [value for value in values if value == value]
+        if present and _persisted(name):
+            rollups[name] = (
+                min(present),
+                max(present),
+                math.fsum(present) / len(present),
+                len(present),
+            )
+    return rollups
+
+
+def _merge_live(
+    a: Tuple[float, float, float, int], b: Tuple[float, float, float, int]
+) -> Tuple[float, float, float, int]:
+    count = a[3] + b[3]
+    return min(a[0], b[0]), max(a[1], b[1]), (a[2] * a[3] + b[2] * b[3]) / count, count
+
+
+def _persisted(name: str) -> bool:
+    return any(
+        match_metric(name, prefix) for prefix in settings.METRICS_PERSIST_PREFIXES
+    )
+
+
+class MetricStore:
+    """
+    Persists sampler snapshots to the database.
+    Raw values are buffered and written in batches by a background flusher (COPY on
+    PostgreSQL, multi-row bulk_create elsewhere). 1m/1h/1d rollups are aggregated in memory
+    as samples arrive and written once their bucket closes, so no job ever rescans raw rows.
+    Only the sampler leaseholder records snapshots and applies retention. Rollups are upserted,
+    so the partial buckets of a previous leaseholder merge with those of the next one.
+    """
+
+    def __init__(self):
+        self._buffer: Deque[Tuple[datetime, str, float]] = deque(
+            maxlen=settings.METRICS_BUFFER_LIMIT
+        )
+        self._closed: List[Tuple[str, datetime, str, _Aggregate]] = []
+        # resolution -> (bucket start, metric -> aggregate)
+        self._open: Dict[str, Tuple[float, Dict[str, _Aggregate]]] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._flush_lock = asyncio.Lock()
+
+    def record_snapshot(self, snapshot: Dict) -> None:
+        """Sampler listener buffering the persisted series of a snapshot."""
+        timestamp = snapshot["sampled_at"].timestamp()
+        sampled_at = _utc(timestamp)
+        values = {
+            name: value
+            for name, value in extract_series(snapshot).items()
+            if _persisted(name)
+        }
+        if len(self._buffer) + len(values) > self._buffer.maxlen:
+            logger.warning("Metric buffer full, dropping oldest unflushed samples")
+        for name, value in values.items():
+            self._buffer.append((sampled_at, name, value))
+
+        for resolution, width in RESOLUTIONS.items():
+            bucket = math.floor(timestamp / width) * width
+            current = self._open.get(resolution)
+            if current is None or current[0] != bucket:
+                if current is not None:
+                    bucket_start = _utc(current[0])
+                    self._closed.extend(
+                        (resolution, bucket_start, name, agg)
+                        for name, agg in current[1].items()
+                    )
+                current = self._open[resolution] = (bucket, {})
+            aggregates = current[1]
+            for name, value in values.items():
+                aggregate = aggregates.get(name)
+                if aggregate is None:
+                    aggregates[name] = _Aggregate(value)
+                else:
+                    aggregate.add(value)
+
+    async def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+        logger.info(
+            f"Metric persistence started with {settings.METRICS_FLUSH_INTERVAL}s flush interval"
+        )
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        # Open rollup buckets are incomplete; they are merged with the rest of the bucket after a restart
+        for resolution, (bucket, aggregates) in self._open.items():
+            self._closed.extend(
+                (resolution, _utc(bucket), name, agg)
+                for name, agg in aggregates.items()
+            )
+        self._open.clear()
+        await self.flush()
+        logger.info("Metric persistence stopped")
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        next_retention = loop.time()
+        while True:
+            await asyncio.sleep(settings.METRICS_FLUSH_INTERVAL)
+            try:
+                await self.flush()
+                if sampler.leader and loop.time() >= next_retention:
+                    await self.apply_retention()
+                    next_retention = loop.time() + settings.METRICS_RETENTION_INTERVAL
+            except Exception:
+                logger.exception("Failed to persist metrics")
+
+    async def flush(self) -> None:
+        async with self._flush_lock:
+            while self._buffer:
+                batch = [
+                    self._buffer.popleft()
+                    for _ in range(
+                        min(len(self._buffer), settings.METRICS_FLUSH_BATCH_SIZE)
+                    )
+                ]
+                try:
+                    await self._insert_samples(batch)
+                except Exception:
+                    # Put the batch back so the next flush retries it
+                    self._buffer.extendleft(reversed(batch))
+                    raise
+            if self._closed:
+                closed, self._closed = self._closed, []
+                try:
+                    await self._upsert_rollups(closed)
+                except Exception:
+                    self._closed = closed + self._closed
+                    raise
+
+    async def _insert_samples(self, rows: List[Tuple[datetime, str, float]]) -> None:
+        client = connections.get("default")
+        if AsyncpgDBClient is not None and isinstance(client, AsyncpgDBClient):
+            # asyncpg: COPY is the cheapest way to load many rows
+            async with client.acquire_connection() as connection:
+                await connection.copy_records_to_table(
+                    MetricSample._meta.db_table,
+                    records=rows,
+                    columns=["timestamp", "metric", "value"],
+                )
+        else:
+            await MetricSample.bulk_create(
+                [
+                    MetricSample(timestamp=timestamp, metric=metric, value=value)
+                    for timestamp, metric, value in rows
+                ],
+                batch_size=settings.METRICS_FLUSH_BATCH_SIZE,
+            )
+
+    async def _upsert_rollups(
+        self, closed: List[Tuple[str, datetime, str, _Aggregate]]
+    ) -> None:
+        """
+        Write closed buckets with INSERT ... ON CONFLICT, merging in the database with any row already
+        there for the same bucket (from a previous run or a previous leaseholder), so concurrent
+        writers neither fail on the unique key nor lose counts.
+        """
+        merged: Dict[Tuple[str, datetime, str], _Aggregate] = {}
+        for resolution, bucket, metric, agg in closed:
+            # A statement can't update the same row twice, so duplicate buckets are merged first
+            current = merged.get((resolution, bucket, metric))
+            merged[(resolution, bucket, metric)] = (
+                agg if current is None else current.merged(agg)
+            )
+        client = connections.get("default")
+        postgres = AsyncpgDBClient is not None and isinstance(client, AsyncpgDBClient)
+        rows = [
+            (
+                resolution,
+                bucket,
+                metric,
+                agg.min,
+                agg.max,
+                agg.sum / agg.count,
+                agg.count,
+            )
+            for (resolution, bucket, metric), agg in merged.items()
+        ]
+        # One transaction, so a failed write can be retried without double counting
+        async with in_transaction() as connection:
+            for offset in range(0, len(rows), ROLLUP_BATCH_ROWS):
+                batch = rows[offset : offset + ROLLUP_BATCH_ROWS]
+                await connection.execute_query(
+                    _rollup_upsert_sql(len(batch), postgres),
+                    [v for row in batch for v in row],
+                )
+
+    async def apply_retention(self) -> None:
+        now = datetime.now(timezone.utc)
+        deleted = await MetricSample.filter(
+            timestamp__lt=now - timedelta(hours=settings.METRICS_RAW_RETENTION_HOURS)
+        ).delete()
+        for resolution, days in settings.METRICS_ROLLUP_RETENTION_DAYS.items():
+            deleted += await MetricRollup.filter(
+                resolution=resolution, bucket__lt=now - timedelta(days=days)
+            ).delete()
+        if deleted:
+            logger.info(f"Metric retention removed {deleted} rows")
+
+    @staticmethod
+    def resolution_for(step: float) -> Optional[str]:
+        """Coarsest rollup whose buckets still fit in the requested step."""
+        best = None
+        for resolution, width in RESOLUTIONS.items():
+            if width <= step:
+                best = resolution
+        return best
+
+    async def query(
+        self,
+        metric: str,
+        start: float,
+        end: float,
+        step: float,
+        aggregation: str = "buckets",
+        points: int = 500,
+    ) -> List[Dict]:
+        """
+        Same contract as MetricHistory.query, served from rollups or raw rows. The bucket still open
+        is not persisted yet; it is aggregated from the in-memory history, which every worker holds.
+        """
+        metric_filter = Q(metric=metric) | Q(metric__startswith=f"{metric}.")
+        resolution = self.resolution_for(step)
+        series: Dict[str, List[array]] = {}
+        if resolution:
+            rows = (
+                await MetricRollup.filter(
+                    metric_filter,
+                    resolution=resolution,
+                    bucket__gte=_utc(start),
+                    bucket__lte=_utc(end),
+                )
+                .order_by("bucket")
+                .values_list("metric", "bucket", "min", "max", "avg", "count")
+            )
+            open_bucket = (
+                math.floor(time.time() / RESOLUTIONS[resolution])
+                * RESOLUTIONS[resolution]
+            )
+            live = (
+                _live_rollups(metric, open_bucket)
+                if start <= open_bucket <= end
+                else {}
+            )
+            # A row for the open bucket holds a previous run's part of it, which the history may also hold
+            covered = history.oldest is not None and history.oldest <= open_bucket
+            for name, bucket, low, high, avg, count in rows:
+                bucket = _timestamp(bucket)
+                if name in live and bucket >= open_bucket:
+                    if covered:
+                        continue
+                    live[name] = _merge_live(live[name], (low, high, avg, count))
+                    continue
+                columns = series.setdefault(name, [array("d") for _ in range(5)])
+                for column, value in zip(columns, (bucket, low, high, avg, count)):
+                    column.append(value)
+            for name, row in live.items():
+                columns = series.setdefault(name, [array("d") for _ in range(5)])
+                for column, value in zip(columns, (open_bucket, *row)):
+                    column.append(value)
+        else:
+            rows = (
+                await MetricSample.filter(
+                    metric_filter, timestamp__gte=_utc(start), timestamp__lte=_utc(end)
+                )
+                .order_by("timestamp")
+                .values_list("metric", "timestamp", "value")
+            )
+            for name, timestamp, value in rows:
+                columns = series.setdefault(name, [array("d") for _ in range(5)])
+                for column, item in zip(
+                    columns, (_timestamp(timestamp), value, value, value, 1)
+                ):
+                    column.append(item)
+
+        result = []
+        for name in sorted(series):
+            timestamps, lows, highs, avgs, counts = series[name]
+            if aggregation == "lttb":
+                out_ts, out_values = downsample_lttb(timestamps, avgs, points)
+                result.append(
+                    {
+                        "metric": name,
+                        "timestamps": out_ts.tolist(),
+                        "values": out_values.tolist(),
+                    }
+                )
+            elif resolution is None:
+                out_ts, out_min, out_max, out_avg = downsample_buckets(
+                    timestamps, avgs, start, step
+                )
+                result.append(
+                    {
+                        "metric": name,
+                        "timestamps": out_ts.tolist(),
+                        "values": out_avg.tolist(),
+                        "min": out_min.tolist(),
+                        "max": out_max.tolist(),
+                    }
+                )
+            else:
+                result.append(
+                    {
+                        "metric": name,
+                        **_merge_rollups(
+                            timestamps, lows, highs, avgs, counts, start, step
+                        ),
+                    }
+                )
+        return result
+
+
+def _merge_rollups(
+    timestamps: array,
+    lows: array,
+    highs: array,
+    avgs: array,
+    counts: array,
+    start: float,
+    step: float,
+) -> Dict[str, List[float]]:
+    """Combine consecutive rollup rows into step-wide buckets, weighting averages by sample count."""
+    out: Dict[str, List[float]] = {"timestamps": [], "values": [], "min": [], "max": []}
+    current = None
+    total = weight = 0.0
+    for timestamp, low, high, avg, count in zip(timestamps, lows, highs, avgs, counts):
+        bucket = start + math.floor((timestamp - start) / step) * step
+        if bucket != current:
+            if current is not None:
+                out["values"].append(total / weight)
+            current = bucket
+            total = weight = 0.0
+            out["timestamps"].append(bucket)
+            out["min"].append(low)
+            out["max"].append(high)
+        out["min"][-1] = min(out["min"][-1], low)
+        out["max"][-1] = max(out["max"][-1], high)
+        total += avg * count
+        weight += count
+    if current is not None:
+        out["values"].append(total / weight)
+    return out
+
+
+metric_store = MetricStore()
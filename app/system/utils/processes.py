@@ -0,0 +1,160 @@
+import asyncio
+import heapq
+import re
+import threading
+import time
+from datetime import datetime, timezone
+from operator import itemgetter
+from typing import Dict, List, Optional
+
+import psutil
+
+from ...settings import settings
+
+SORT_KEYS = {
+    "cpu": "cpu_percent",
+    "mem": "memory_rss",
+    "io": "io_bytes_per_sec",
+}
+
+# Matches the 64-hex container ID in cgroup paths such as
+# "0::/system.slice/docker-<id>.scope" (systemd driver) or "12:cpu:/docker/<id>" (cgroupfs)
+_CONTAINER_ID_RE = re.compile(r"(?:docker[-/]|/)([0-9a-f]{64})(?:\.scope)?$")
+
+
+def get_container_id(pid: int) -> Optional[str]:
+    """Resolve the Docker container a process belongs to from its cgroup path."""
+    try:
+        with open(f"/proc/{pid}/cgroup") as f:
+            for line in f:
+                match = _CONTAINER_ID_RE.search(line.rstrip())
+                if match:
+                    return match.group(1)
+    except OSError:
+        pass
+    return None
+
+
+class _Tracked:
+    """A process kept across refreshes, with the attributes that never change read once."""
+
+    __slots__ = ("process", "name", "username", "container_id", "io_bytes", "row")
+
+    def __init__(self, process: psutil.Process):
+        self.process = process
+        with process.oneshot():
+            self.name = process.name()
+            try:
+                self.username = process.username()
+            except (psutil.AccessDenied, KeyError):
+                self.username = None
+        self.container_id = get_container_id(process.pid)
+        self.io_bytes: Optional[int] = None
+        self.row: Optional[Dict] = None
+        # The first call only establishes the baseline for the next one
+        process.cpu_percent(None)
+
+
+class ProcessTable:
+    """
+    Process table updated incrementally between requests.
+    Process objects are reused so cpu_percent is measured between refreshes without a
+    blocking interval; only new PIDs are inspected in full and dead PIDs are pruned.
+    """
+
+    def __init__(self):
+        self._tracked: Dict[int, _Tracked] = {}
+        self._refreshed_at: Optional[float] = None
+        self.sampled_at: Optional[datetime] = None
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._tracked)
+
+    def refresh(self, max_age: Optional[float] = None) -> None:
+        with self._lock:
+            # A concurrent caller may have refreshed the table while we waited for the lock
+            if max_age is not None and not self._is_stale(max_age):
+                return
+            warming_up = not self._tracked
+            pids = set(psutil.pids())
+            for pid in self._tracked.keys() - pids:
+                del self._tracked[pid]
+            for pid in pids - self._tracked.keys():
+                try:
+                    self._tracked[pid] = _Tracked(psutil.Process(pid))
+                except (psutil.NoSuchProcess, psutil.AccessDenied):
+                    continue
+
+            if warming_up:
+                # Give the freshly primed CPU counters something to measure on the very first call
+                time.sleep(settings.SYSTEM_PROCESS_WARMUP)
+
+            now = time.monotonic()
+            elapsed = (
+                now - self._refreshed_at
+                if self._refreshed_at and not warming_up
+                else None
+            )
+            for pid, tracked in list(self._tracked.items()):
+                try:
+                    tracked.row = self._read(tracked, elapsed)
+                except (psutil.NoSuchProcess, psutil.ZombieProcess):
+                    del self._tracked[pid]
+                except psutil.AccessDenied:
+                    tracked.row = None
+            self._refreshed_at = now
+            self.sampled_at = datetime.now(timezone.utc)
+
+    def _read(self, tracked: _Tracked, elapsed: Optional[float]) -> Dict:
+        process = tracked.process
+        with process.oneshot():
+            cpu_percent = process.cpu_percent(None)
+            memory = process.memory_info()
+            memory_percent = process.memory_percent()
+            status = process.status()
+            num_threads = process.num_threads()
+            try:
+                io = process.io_counters()
+                io_bytes = io.read_bytes + io.write_bytes
+            except (psutil.AccessDenied, AttributeError):
+                io_bytes = None
+
+        io_rate = 0.0
+        if io_bytes is not None and tracked.io_bytes is not None and elapsed:
+            io_rate = max(0, io_bytes - tracked.io_bytes) / elapsed
+        tracked.io_bytes = io_bytes
+
+        return {
+            "pid": process.pid,
+            "name": tracked.name,
+            "username": tracked.username,
+            "status": status,
+            "cpu_percent": round(cpu_percent, 2),
+            "memory_rss": round(memory.rss / (1024**2), 2),  # MB
+            "memory_percent": round(memory_percent, 2),
+            "num_threads": num_threads,
+            "io_bytes_per_sec": round(io_rate, 2),
+            "container_id": tracked.container_id,
+        }
+
+    def _is_stale(self, max_age: float) -> bool:
+        return (
+            self._refreshed_at is None
+            or time.monotonic() - self._refreshed_at > max_age
+        )
+
+    async def top(self, sort: str, limit: int) -> List[Dict]:
+        """Return the top processes by the given sort key, refreshing the table if stale."""
+        max_age = settings.SYSTEM_PROCESS_REFRESH_INTERVAL
+        if self._is_stale(max_age):
+            await asyncio.to_thread(self.refresh, max_age)
+        rows = [
+            tracked.row
+            for tracked in list(self._tracked.values())
+            if tracked.row is not None
+        ]
+        return heapq.nlargest(limit, rows, key=itemgetter(SORT_KEYS[sort]))
+
+
+process_table = ProcessTable()
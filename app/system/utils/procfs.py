@@ -0,0 +1,307 @@
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+# /proc/stat fields that are already counted in user and nice
+_GUEST_FIELDS = slice(8, 10)
+# cgroup v1 reports "no limit" as a page-aligned LONG_MAX
+_V1_UNLIMITED = 1 << 62
+
+
+class ProcFile:
+    """
+    A /proc or /sys file kept open and re-read from offset 0 with pread.
+    The kernel regenerates the content on every read, so this avoids an open/close per sample.
+    """
+
+    __slots__ = ("path", "_fd", "_size")
+
+    def __init__(self, path: str):
+        self.path = path
+        self._fd = os.open(path, os.O_RDONLY | os.O_CLOEXEC)
+        self._size = 4096
+
+    def read(self) -> bytes:
+        while True:
+            data = os.pread(self._fd, self._size, 0)
+            if len(data) < self._size:
+                return data
+            # Content did not fit; grow the buffer once and keep it for later reads
+            self._size *= 2
+
+    def close(self) -> None:
+        os.close(self._fd)
+
+
+def open_file(path: str) -> Optional[ProcFile]:
+    try:
+        return ProcFile(path)
+    except OSError:
+        return None
+
+
+def read_int(file: Optional[ProcFile]) -> Optional[int]:
+    """Read a single-integer file; "max" and missing files are None."""
+    if file is None:
+        return None
+    value = file.read().strip()
+    return None if value == b"max" else int(value)
+
+
+def field(data: bytes, key: bytes) -> Optional[int]:
+    """Integer following key in a "key value" file such as /proc/meminfo, without splitting the file."""
+    start = data.find(key)
+    if start < 0:
+        return None
+    start += len(key)
+    end = data.find(b"\n", start)
+    return int(data[start:end].split()[0])
+
+
+def _cpu_times(line: bytes) -> Tuple[int, int]:
+    """(total, idle) jiffies of a /proc/stat cpu line, counted the way psutil does."""
+    values = [int(value) for value in line.split()[1:]]
+    total = sum(values) - sum(values[_GUEST_FIELDS])
+    return total, values[3] + values[4]  # idle + iowait
+
+
+def _percent(previous: Optional[Tuple[int, int]], current: Tuple[int, int]) -> float:
+    if previous is None:
+        return 0.0
+    total = current[0] - previous[0]
+    if total <= 0:
+        return 0.0
+    busy = total - (current[1] - previous[1])
+    return min(100.0, max(0.0, busy / total * 100))
+
+
+class CgroupReader:
+    """
+    CPU and memory usage and limits of the cgroup this process runs in (v2, or v1 as fallback).
+    CPU usage is measured between calls, like cpu_percent(interval=None).
+    """
+
+    def __init__(self):
+        self.version = None
+        self.path = None
+        self._files: Dict[str, Optional[ProcFile]] = {}
+        self._previous: Optional[Tuple[float, float]] = None
+        self._open()
+
+    def _open(self) -> None:
+        groups = _own_cgroups()
+        if os.path.exists("/sys/fs/cgroup/cgroup.controllers") and "" in groups:
+            self.version = 2
+            self.path = groups[""]
+            base = _cgroup_dir("/sys/fs/cgroup", self.path)
+            names = {
+                "memory": "memory.current",
+                "memory_limit": "memory.max",
+                "memory_stat": "memory.stat",
+                "cpu_limit": "cpu.max",
+                "cpu_stat": "cpu.stat",
+            }
+            self._files = {
+                key: open_file(os.path.join(base, name)) for key, name in names.items()
+            }
+        elif "memory" in groups:
+            self.version = 1
+            self.path = groups["memory"]
+            memory = _cgroup_dir("/sys/fs/cgroup/memory", groups["memory"])
+            cpu = _cgroup_dir(
+                "/sys/fs/cgroup/cpu", groups.get("cpu", groups.get("cpu,cpuacct", "/"))
+            )
+            cpuacct = _cgroup_dir(
+                "/sys/fs/cgroup/cpuacct",
+                groups.get("cpuacct", groups.get("cpu,cpuacct", "/")),
+            )
+            self._files = {
+                "memory": open_file(os.path.join(memory, "memory.usage_in_bytes")),
+                "memory_limit": open_file(
+                    os.path.join(memory, "memory.limit_in_bytes")
+                ),
+                "memory_stat": open_file(os.path.join(memory, "memory.stat")),
+                "cpu_quota": open_file(os.path.join(cpu, "cpu.cfs_quota_us")),
+                "cpu_period": open_file(os.path.join(cpu, "cpu.cfs_period_us")),
+                "cpu_usage": open_file(os.path.join(cpuacct, "cpuacct.usage")),
+            }
+
+    @property
+    def available(self) -> bool:
+        return self._files.get("memory") is not None
+
+    def memory(self) -> Tuple[int, Optional[int]]:
+        """(used, limit) in bytes; used excludes reclaimable page cache, like `docker stats`."""
+        current = read_int(self._files["memory"])
+        stat = self._files.get("memory_stat")
+        inactive = None
+        if stat is not None:
+            data = stat.read()
+            inactive = (
+                field(data, b"\ninactive_file ")
+                if self.version == 2
+                else field(data, b"total_inactive_file ")
+            )
+        used = (
+            current - inactive
+            if inactive is not None and inactive < current
+            else current
+        )
+        limit = read_int(self._files.get("memory_limit"))
+        if limit is not None and limit >= _V1_UNLIMITED:
+            limit = None
+        return used, limit
+
+    def cpu_limit(self) -> Optional[float]:
+        """CPU quota in cores, or None when unlimited."""
+        if self.version == 2:
+            file = self._files.get("cpu_limit")
+            if file is None:
+                return None
+            quota, period = file.read().split()
+            return None if quota == b"max" else int(quota) / int(period)
+        quota = read_int(self._files.get("cpu_quota"))
+        period = read_int(self._files.get("cpu_period"))
+        return quota / period if quota and quota > 0 and period else None
+
+    def _cpu_seconds(self) -> Optional[float]:
+        if self.version == 2:
+            file = self._files.get("cpu_stat")
+            if file is None:
+                return None
+            # usage_usec is the first line of cpu.stat
+            usage = field(b"\n" + file.read(), b"\nusage_usec ")
+            return usage / 1e6 if usage is not None else None
+        usage = read_int(self._files.get("cpu_usage"))
+        return usage / 1e9 if usage is not None else None
+
+    def cpu_cores_used(self) -> Optional[float]:
+        """Average number of cores used since the previous call (0.0 on the first call)."""
+        seconds = self._cpu_seconds()
+        if seconds is None:
+            return None
+        now = time.monotonic()
+        previous, self._previous = self._previous, (now, seconds)
+        if previous is None or now <= previous[0]:
+            return 0.0
+        return max(0.0, (seconds - previous[1]) / (now - previous[0]))
+
+
+def _own_cgroups() -> Dict[str, str]:
+    """Controller list -> cgroup path of this process; the v2 unified hierarchy has key ""."""
+    groups = {}
+    try:
+        with open("/proc/self/cgroup") as f:
+            for line in f:
+                _, controllers, path = line.rstrip("\n").split(":", 2)
+                for controller in controllers.split(","):
+                    groups[controller] = path
+                groups[controllers] = path
+    except OSError:
+        pass
+    return groups
+
+
+def _cgroup_dir(mount: str, path: str) -> str:
+    # With a private cgroup namespace the path is "/" and the mount already is our cgroup
+    candidate = os.path.join(mount, path.lstrip("/"))
+    return candidate if os.path.isdir(candidate) else mount
+
+
+class ProcfsBackend:
+    """
+    Linux fast path for the hot host metrics, reading /proc directly instead of through psutil.
+    Files are opened once and re-read with pread; each reader returns None when its file is
+    unavailable so callers can fall back to psutil.
+    """
+
+    def __init__(self):
+        self._stat = open_file("/proc/stat")
+        self._meminfo = open_file("/proc/meminfo")
+        self._net_dev = open_file("/proc/net/dev")
+        self._previous_cpu: List[Tuple[int, int]] = []
+        self._lock = threading.Lock()
+        self.cgroup = CgroupReader()
+
+    def cpu_percent(self) -> Optional[Tuple[float, List[float]]]:
+        """(total, per core) usage since the previous call, or None without /proc/stat."""
+        if self._stat is None:
+            return None
+        data = self._stat.read()
+        times = []
+        for line in data.split(b"\n"):
+            if not line.startswith(b"cpu"):
+                break
+            times.append(_cpu_times(line))
+        with self._lock:
+            previous, self._previous_cpu = self._previous_cpu, times
+        if len(previous) != len(times):
+            # First call, or CPUs went on/offline: only a baseline is available
+            previous = [None] * len(times)
+        usage = [_percent(before, after) for before, after in zip(previous, times)]
+        return usage[0], usage[1:]
+
+    def memory(self) -> Optional[Dict[str, int]]:
+        """Virtual and swap memory in bytes, computed like psutil.virtual_memory/swap_memory."""
+        if self._meminfo is None:
+            return None
+        # Keys are anchored on the preceding newline so Cached does not match SwapCached
+        data = b"\n" + self._meminfo.read()
+        kib = {
+            key: field(data, b"\n" + key.encode() + b":")
+            for key in (
+                "MemTotal",
+                "MemFree",
+                "MemAvailable",
+                "Buffers",
+                "Cached",
+                "SReclaimable",
+                "SwapTotal",
+                "SwapFree",
+            )
+        }
+        if kib["MemTotal"] is None or kib["MemAvailable"] is None:
+            return None
+        total, free = kib["MemTotal"] * 1024, kib["MemFree"] * 1024
+        cached = ((kib["Cached"] or 0) + (kib["SReclaimable"] or 0)) * 1024
+        used = total - free - cached - (kib["Buffers"] or 0) * 1024
+        if used < 0:
+            used = total - free
+        return {
+            "total": total,
+            "available": kib["MemAvailable"] * 1024,
+            "used": used,
+            "swap_total": (kib["SwapTotal"] or 0) * 1024,
+            "swap_free": (kib["SwapFree"] or 0) * 1024,
+        }
+
+    def net_io_counters(self) -> Optional[Dict[str, Dict[str, int]]]:
+        """Per-interface counters from /proc/net/dev, keyed like get_network_io_counters."""
+        if self._net_dev is None:
+            return None
+        counters = {}
+        # The first two lines are column headers
+        for line in self._net_dev.read().split(b"\n")[2:]:
+            name, sep, values = line.partition(b":")
+            if not sep:
+                continue
+            v = values.split()
+            counters[name.strip().decode()] = {
+                "bytes_sent": int(v[8]),
+                "bytes_recv": int(v[0]),
+                "packets_sent": int(v[9]),
+                "packets_recv": int(v[1]),
+                "errors_in": int(v[2]),
+                "errors_out": int(v[10]),
+                "drop_in": int(v[3]),
+                "drop_out": int(v[11]),
+            }
+        return counters
+
+
+def open_backend() -> Optional[ProcfsBackend]:
+    """The procfs backend, or None when /proc is not available (not Linux)."""
+    if not os.path.exists("/proc/stat"):
+        return None
+    return ProcfsBackend()
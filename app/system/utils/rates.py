@@ -0,0 +1,93 @@
+from typing import Dict, Optional
+
+# Counter name in the snapshot -> rate name in the response
+NETWORK_RATE_FIELDS = {
+    "bytes_recv": "rx_bytes_per_sec",
+    "bytes_sent": "tx_bytes_per_sec",
+    "packets_recv": "rx_packets_per_sec",
+    "packets_sent": "tx_packets_per_sec",
+    "errors_in": "rx_errors_per_sec",
+    "errors_out": "tx_errors_per_sec",
+    "drop_in": "rx_drops_per_sec",
+    "drop_out": "tx_drops_per_sec",
+}
+
+DISK_RATE_FIELDS = {
+    "read_count": "read_iops",
+    "write_count": "write_iops",
+    "read_bytes": "read_bytes_per_sec",
+    "write_bytes": "write_bytes_per_sec",
+}
+
+_WRAP_32 = 2**32
+
+
+def counter_delta(previous: int, current: int) -> Optional[int]:
+    """
+    Increase of a cumulative counter between two samples.
+    A 32-bit counter that wrapped is unwrapped; any other decrease means the counter was
+    reset (e.g. the interface was recreated) and no delta can be derived.
+    """
+    if current >= previous:
+        return current - previous
+    if previous < _WRAP_32:
+        wrapped = _WRAP_32 - previous + current
+        if wrapped < _WRAP_32 // 2:
+            return wrapped
+    return None
+
+
+class CounterRates:
+    """Derives per-second rates for a family of devices from consecutive counter samples."""
+
+    def __init__(self, fields: Dict[str, str]):
+        self.fields = fields
+        self._previous: Dict[str, Dict[str, int]] = {}
+        self._timestamp: Optional[float] = None
+
+    def update(
+        self, timestamp: float, counters: Dict[str, Dict]
+    ) -> Dict[str, Dict[str, float]]:
+        """
+        Record a sample and return rates for devices seen in both this and the previous one.
+        Devices appearing for the first time get rates from the next sample on; devices that
+        disappeared are forgotten.
+        """
+        elapsed = timestamp - self._timestamp if self._timestamp is not None else 0.0
+        rates = {}
+        current = {}
+        for device, values in counters.items():
+            if not isinstance(values, dict):
+                continue
+            current[device] = values
+            previous = self._previous.get(device)
+            if previous is None or elapsed <= 0:
+                continue
+            device_rates = {}
+            for field, rate_name in self.fields.items():
+                delta = counter_delta(previous[field], values[field])
+                if delta is not None:
+                    device_rates[rate_name] = round(delta / elapsed, 2)
+            rates[device] = device_rates
+        self._previous = current
+        self._timestamp = timestamp
+        return rates
+
+
+class ThroughputTracker:
+    """Network interface and block device rates computed from the sampler's snapshots."""
+
+    def __init__(self):
+        self.network = CounterRates(NETWORK_RATE_FIELDS)
+        self.disks = CounterRates(DISK_RATE_FIELDS)
+        self._timestamp: Optional[float] = None
+
+    def update(self, timestamp: float, snapshot: Dict) -> Dict:
+        interval = timestamp - self._timestamp if self._timestamp is not None else None
+        self._timestamp = timestamp
+        network = snapshot.get("network") or {}
+        return {
+            "interval": round(interval, 3) if interval is not None else None,
+            "network": self.network.update(timestamp, network.get("io_counters") or {}),
+            "disks": self.disks.update(timestamp, snapshot.get("disk_io") or {}),
+        }
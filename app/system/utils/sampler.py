@@ -0,0 +1,221 @@
+import asyncio
+import os
+import socket
+import time
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional
+
+from loguru import logger
+from redis.exceptions import RedisError
+
+from ... import cache
+from ...connections import get_redis
+from ...settings import settings
+from . import system_monitor
+from .rates import ThroughputTracker
+
+
+SNAPSHOT_KEY = "system:snapshot"
+
+# Take or renew the sampler lease held under KEYS[1]; returns 1 when ARGV[1] holds it afterwards
+_LEASE_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('pexpire', KEYS[1], ARGV[2])
+end
+if redis.call('set', KEYS[1], ARGV[1], 'NX', 'PX', ARGV[2]) then
+    return 1
+end
+return 0
+"""
+_RELEASE_SCRIPT = """
+if redis.call('get', KEYS[1]) == ARGV[1] then
+    return redis.call('del', KEYS[1])
+end
+return 0
+"""
+
+
+class SystemSampler:
+    """
+    Collects host metrics on a fixed interval and keeps the latest snapshot in memory.
+    Collection runs in a worker thread so request handlers never block the event loop.
+    With Redis, only the worker holding the sampler lease collects; it shares every snapshot
+    and the other workers adopt it, taking over when the leaseholder stops sampling.
+    Listeners with side effects outside the process, such as persistence or notifications,
+    run on the leaseholder only, so the snapshots adopted by the other workers don't repeat them.
+    """
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self._snapshot: Optional[Dict] = None
+        self._sampled_at_monotonic: float = 0.0
+        self._lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self._listeners: List[Callable[[Dict], None]] = []
+        self._leader_listeners: List[Callable[[Dict], None]] = []
+        # Whether this worker held the lease when it last checked; every worker does without Redis
+        self._leader = False
+        self._throughput = ThroughputTracker()
+
+    def add_listener(
+        self, listener: Callable[[Dict], None], leader_only: bool = False
+    ) -> None:
+        """
+        Register a callback invoked on the event loop with every new snapshot.
+        A leader_only listener is skipped while another worker holds the sampler lease.
+        """
+        (self._leader_listeners if leader_only else self._listeners).append(listener)
+
+    def remove_listener(self, listener: Callable[[Dict], None]) -> None:
+        for listeners in (self._listeners, self._leader_listeners):
+            if listener in listeners:
+                listeners.remove(listener)
+
+    @property
+    def leader(self) -> bool:
+        return self._leader
+
+    @property
+    def age(self) -> Optional[float]:
+        """Age of the current snapshot in seconds, or None if nothing was sampled yet."""
+        if self._snapshot is None:
+            return None
+        return time.monotonic() - self._sampled_at_monotonic
+
+    async def start(self) -> None:
+        # CPU usage is measured since the previous call, so prime it once
+        await asyncio.to_thread(system_monitor.prime_cpu_usage)
+        self._task = asyncio.create_task(self._run())
+        logger.info(f"System sampler started with {self.interval}s interval")
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+            self._leader = False
+            await self._release_lease()
+            logger.info("System sampler stopped")
+
+    async def sample(self) -> Dict:
+        """Take a fresh sample and publish it to listeners."""
+        snapshot = await asyncio.to_thread(self._collect)
+        snapshot["sampled_at"] = datetime.now(timezone.utc)
+        self._publish(snapshot)
+        return snapshot
+
+    def _publish(self, snapshot: Dict) -> None:
+        self._snapshot = snapshot
+        age = (datetime.now(timezone.utc) - snapshot["sampled_at"]).total_seconds()
+        self._sampled_at_monotonic = time.monotonic() - max(0.0, age)
+        listeners = (
+            self._listeners + self._leader_listeners
+            if self._leader
+            else self._listeners
+        )
+        for listener in listeners:
+            try:
+                listener(snapshot)
+            except Exception:
+                logger.exception("System sampler listener failed")
+
+    def _collect(self) -> Dict:
+        snapshot = system_monitor.get_system_info()
+        # Rates come from consecutive samples, so every caller of sample() shares the same baseline
+        snapshot["rates"] = self._throughput.update(time.monotonic(), snapshot)
+        return snapshot
+
+    def peek(self, max_age: Optional[float] = None) -> Optional[Dict]:
+        """Return the latest snapshot if it is recent enough, without ever sampling."""
+        return None if self._is_stale(max_age) else self._snapshot
+
+    async def get_snapshot(self, max_age: Optional[float] = None) -> Dict:
+        """
+        Return the latest snapshot.
+        A new sample is taken when there is none yet or it is older than max_age seconds.
+        """
+        if not self._is_stale(max_age):
+            return self._snapshot
+        async with self._lock:
+            # Another request may have refreshed the snapshot while we were waiting
+            if self._is_stale(max_age):
+                await self._adopt_shared()
+            if self._is_stale(max_age):
+                await self.sample()
+        return self._snapshot
+
+    def _is_stale(self, max_age: Optional[float]) -> bool:
+        if self._snapshot is None:
+            return True
+        return max_age is not None and self.age > max_age
+
+    async def _holds_lease(self) -> bool:
+        """Whether this worker should sample; always true without Redis."""
+        redis = get_redis()
+        if redis is None:
+            return True
+        try:
+            lease_ms = int(self.interval * 3 * 1000)
+            return bool(
+                await redis.eval(
+                    _LEASE_SCRIPT,
+                    1,
+                    cache.key("system", "sampler"),
+                    self._worker_id,
+                    lease_ms,
+                )
+            )
+        except RedisError as e:
+            logger.warning(f"Sampler lease unavailable, sampling locally: {e}")
+            return True
+
+    async def _release_lease(self) -> None:
+        redis = get_redis()
+        if redis is None:
+            return
+        try:
+            await redis.eval(
+                _RELEASE_SCRIPT, 1, cache.key("system", "sampler"), self._worker_id
+            )
+        except RedisError:
+            pass
+
+    async def _adopt_shared(self) -> bool:
+        """Take over the leaseholder's snapshot if it is newer than ours; False when none is shared."""
+        shared = await cache.get_json(SNAPSHOT_KEY)
+        if shared is None:
+            return False
+        shared["sampled_at"] = datetime.fromisoformat(shared["sampled_at"])
+        if (
+            self._snapshot is None
+            or shared["sampled_at"] > self._snapshot["sampled_at"]
+        ):
+            self._publish(shared)
+        return True
+
+    async def _tick(self) -> None:
+        """One interval: sample and share as the leaseholder, otherwise adopt its snapshot."""
+        self._leader = await self._holds_lease()
+        if self._leader:
+            async with self._lock:
+                snapshot = await self.sample()
+            # Expires soon after the leaseholder stops, so followers fall back to sampling
+            await cache.set_json(SNAPSHOT_KEY, snapshot, self.interval * 3)
+        elif not await self._adopt_shared():
+            async with self._lock:
+                await self.sample()
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self._tick()
+            except Exception:
+                logger.exception("Failed to sample system metrics")
+            await asyncio.sleep(self.interval)
+
+
+sampler = SystemSampler(settings.SYSTEM_SAMPLE_INTERVAL)
@@ -0,0 +1,150 @@
+import asyncio
+import json
+import time
+from datetime import datetime
+from typing import AsyncIterator, Dict, Optional, Set
+
+from loguru import logger
+
+
+def flatten(prefix: str, value, out: Dict) -> Dict:
+    """Flatten nested dicts and lists into dotted-path keys with scalar leaves."""
+    if isinstance(value, dict):
+        for key, item in value.items():
+            flatten(f"{prefix}.{key}" if prefix else str(key), item, out)
+    elif isinstance(value, list):
+        if not value:
+            out[prefix] = []
+        for index, item in enumerate(value):
+            flatten(f"{prefix}.{index}", item, out)
+    elif isinstance(value, datetime):
+        out[prefix] = value.isoformat()
+    else:
+        out[prefix] = value
+    return out
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+class _Frame:
+    """A published snapshot with its flattened form and lazily encoded payloads."""
+
+    __slots__ = ("seq", "snapshot", "flat", "encoded")
+
+    def __init__(self, seq: int, snapshot: Dict):
+        self.seq = seq
+        self.snapshot = snapshot
+        self.flat = flatten("", snapshot, {})
+        # Encoded payloads keyed by the sequence number of the frame the client already has
+        self.encoded: Dict[Optional[int], str] = {}
+
+    def encode(self, previous: Optional["_Frame"]) -> str:
+        key = previous.seq if previous else None
+        payload = self.encoded.get(key)
+        if payload is None:
+            payload = json.dumps(
+                self._build(previous), default=_json_default, separators=(",", ":")
+            )
+            self.encoded[key] = payload
+        return payload
+
+    def _build(self, previous: Optional["_Frame"]) -> Dict:
+        sampled_at = self.flat.get("sampled_at")
+        if previous is None:
+            return {
+                "type": "full",
+                "seq": self.seq,
+                "sampled_at": sampled_at,
+                "data": self.snapshot,
+            }
+        old = previous.flat
+        changed = {
+            key: value for key, value in self.flat.items() if old.get(key, ...) != value
+        }
+        removed = [key for key in old if key not in self.flat]
+        changed.pop("sampled_at", None)
+        return {
+            "type": "delta",
+            "seq": self.seq,
+            "sampled_at": sampled_at,
+            "changed": changed,
+            "removed": removed,
+        }
+
+
+class _Subscriber:
+    __slots__ = ("queue", "dropped")
+
+    def __init__(self):
+        # A single slot: a slow consumer only ever sees the newest frame
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=1)
+        self.dropped = 0
+
+    def offer(self, frame: _Frame) -> None:
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(frame)
+
+
+class SnapshotBroadcaster:
+    """
+    Fans sampler snapshots out to stream subscribers.
+    Each snapshot is flattened once and every distinct full or delta payload is encoded once,
+    no matter how many clients are connected.
+    """
+
+    def __init__(self):
+        self._subscribers: Set[_Subscriber] = set()
+        self._latest: Optional[_Frame] = None
+        self._latest_snapshot: Optional[Dict] = None
+        self._seq = 0
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    def publish(self, snapshot: Dict) -> None:
+        """Sampler listener; frames are only built while someone is subscribed."""
+        self._latest_snapshot = snapshot
+        if not self._subscribers:
+            self._latest = None
+            return
+        self._latest = self._next_frame(snapshot)
+        for subscriber in self._subscribers:
+            subscriber.offer(self._latest)
+
+    def _next_frame(self, snapshot: Dict) -> _Frame:
+        self._seq += 1
+        return _Frame(self._seq, snapshot)
+
+    async def frames(self, interval: float, delta: bool = True) -> AsyncIterator[str]:
+        """Yield encoded frames no more often than every interval seconds."""
+        subscriber = _Subscriber()
+        self._subscribers.add(subscriber)
+        if self._latest is None and self._latest_snapshot is not None:
+            self._latest = self._next_frame(self._latest_snapshot)
+        if self._latest:
+            subscriber.offer(self._latest)
+        previous: Optional[_Frame] = None
+        try:
+            while True:
+                frame = await subscriber.queue.get()
+                due = time.monotonic() + interval
+                yield frame.encode(previous if delta else None)
+                previous = frame
+                # Frames published while we wait are coalesced into the newest one
+                await asyncio.sleep(max(0.0, due - time.monotonic()))
+        finally:
+            self._subscribers.discard(subscriber)
+            if subscriber.dropped:
+                logger.debug(
+                    f"Stream subscriber closed after coalescing {subscriber.dropped} frames"
+                )
+
+
+broadcaster = SnapshotBroadcaster()
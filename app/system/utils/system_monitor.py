@@ -1,12 +1,95 @@
+import functools
 import platform
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FuturesTimeoutError
 from datetime import datetime
-from typing import Dict, List
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
 
 import distro
 import psutil
 from fastapi import HTTPException
 
+from ...settings import settings
+from . import procfs
 
+# Section collectors and per-mount disk_usage calls run on separate pools so a collector
+# waiting on its mounts can never starve them of workers
+_collector_executor = ThreadPoolExecutor(
+    max_workers=settings.SYSTEM_COLLECTOR_WORKERS, thread_name_prefix="collector"
+)
+_mount_executor = ThreadPoolExecutor(
+    max_workers=settings.SYSTEM_COLLECTOR_WORKERS, thread_name_prefix="disk-usage"
+)
+_hung_mounts: Dict[
+    str, Future
+] = {}  # disk_usage calls that missed their deadline and have not returned
+# Direct /proc readers for CPU, memory and network counters; psutil is used when this is None
+_procfs = procfs.open_backend() if settings.SYSTEM_BACKEND == "procfs" else None
+
+
+class CachedCollector:
+    """
+    Memoizes a zero-argument collector for ttl seconds, or forever when ttl is None.
+    Cached results are shared between callers and must be treated as read-only.
+    """
+
+    def __init__(self, func: Callable, ttl: Optional[float]):
+        functools.update_wrapper(self, func)
+        self.func = func
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._value = None
+        self._expires_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def __call__(self):
+        with self._lock:
+            if self._expires_at is not None and time.monotonic() < self._expires_at:
+                self.hits += 1
+                return self._value
+            self.misses += 1
+            self._value = self.func()
+            self._expires_at = (
+                float("inf") if self.ttl is None else time.monotonic() + self.ttl
+            )
+            return self._value
+
+    def clear(self) -> None:
+        with self._lock:
+            self._value = None
+            self._expires_at = None
+
+
+_collector_caches: Dict[str, CachedCollector] = {}
+
+
+def cached(ttl: Optional[float]) -> Callable[[Callable], CachedCollector]:
+    """Cache a collector's result for ttl seconds (None caches forever)."""
+
+    def decorator(func: Callable) -> CachedCollector:
+        collector = CachedCollector(func, ttl)
+        _collector_caches[func.__name__] = collector
+        return collector
+
+    return decorator
+
+
+def get_cache_stats() -> Dict[str, Dict]:
+    return {
+        name: {"ttl": collector.ttl, "hits": collector.hits, "misses": collector.misses}
+        for name, collector in _collector_caches.items()
+    }
+
+
+def clear_caches() -> None:
+    for collector in _collector_caches.values():
+        collector.clear()
+
+
+@cached(ttl=None)
 def get_platform_info() -> Dict:
     return {
         "system": platform.system(),
@@ -20,61 +103,211 @@ def get_platform_info() -> Dict:
     }
 
 
-def get_cpu_info() -> Dict:
+@cached(ttl=None)
+def get_boot_time() -> str:
+    return datetime.fromtimestamp(psutil.boot_time()).strftime("%Y-%m-%d %H:%M:%S")
+
+
+@cached(ttl=None)
+def get_cpu_counts() -> Dict:
+    return {
+        "physical_cores": psutil.cpu_count(logical=False),
+        "total_cores": psutil.cpu_count(logical=True),
+    }
+
+
+@cached(ttl=settings.SYSTEM_PARTITIONS_CACHE_TTL)
+def get_disk_partitions() -> List:
+    return psutil.disk_partitions(all=False)  # all=False to skip special filesystems
+
+
+@cached(ttl=settings.SYSTEM_INTERFACES_CACHE_TTL)
+def get_interface_addresses() -> Dict[str, List[Dict]]:
+    return {
+        interface_name: [
+            {
+                "address": addr.address,
+                "netmask": addr.netmask,
+                "family": str(addr.family),
+            }
+            for addr in addresses
+        ]
+        for interface_name, addresses in psutil.net_if_addrs().items()
+    }
+
+
+def prime_cpu_usage() -> None:
+    """Establish the baseline that non-blocking CPU usage is measured from."""
+    psutil.cpu_percent(None, True)
+    psutil.cpu_percent(None)
+    if _procfs is not None:
+        _procfs.cpu_percent()
+        _procfs.cgroup.cpu_cores_used()
+
+
+def get_cpu_info(interval: Optional[float] = None) -> Dict:
+    """
+    Get CPU information using psutil, or /proc/stat directly with the procfs backend.
+    With interval=None usage is measured since the previous call instead of blocking.
+    """
     try:
+        usage = (
+            _procfs.cpu_percent() if _procfs is not None and interval is None else None
+        )
+        if usage is None:
+            per_core = psutil.cpu_percent(percpu=True, interval=interval)
+            usage = psutil.cpu_percent(interval=interval), per_core
         cpu_freq = psutil.cpu_freq()
         cpu_info = {
-            "physical_cores": psutil.cpu_count(logical=False),
-            "total_cores": psutil.cpu_count(logical=True),
+            **get_cpu_counts(),
             "cpu_freq_current": round(cpu_freq.current, 2) if cpu_freq else None,
             "cpu_freq_min": round(cpu_freq.min, 2) if cpu_freq else None,
             "cpu_freq_max": round(cpu_freq.max, 2) if cpu_freq else None,
-            "cpu_usage_per_core": [round(x, 2) for x in psutil.cpu_percent(percpu=True, interval=1)],
-            "total_cpu_usage": round(psutil.cpu_percent(interval=1), 2),
+            "cpu_usage_per_core": [round(x, 2) for x in usage[1]],
+            "total_cpu_usage": round(usage[0], 2),
         }
         return cpu_info
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error getting CPU info: {str(e)}")
 
 
+def _memory_from_procfs() -> Optional[Dict]:
+    memory = _procfs.memory() if _procfs is not None else None
+    if memory is None:
+        return None
+    swap_used = memory["swap_total"] - memory["swap_free"]
+    return {
+        "total": memory["total"],
+        "available": memory["available"],
+        "used": memory["used"],
+        "percentage": round(
+            (memory["total"] - memory["available"]) / memory["total"] * 100, 1
+        ),
+        "swap_total": memory["swap_total"],
+        "swap_used": swap_used,
+        "swap_free": memory["swap_free"],
+        "swap_percentage": round(swap_used / memory["swap_total"] * 100, 1)
+        if memory["swap_total"]
+        else 0.0,
+    }
+
+
+def _memory_from_psutil() -> Dict:
+    virtual_memory = psutil.virtual_memory()
+    swap = psutil.swap_memory()
+    return {
+        "total": virtual_memory.total,
+        "available": virtual_memory.available,
+        "used": virtual_memory.used,
+        "percentage": virtual_memory.percent,
+        "swap_total": swap.total,
+        "swap_used": swap.used,
+        "swap_free": swap.free,
+        "swap_percentage": swap.percent,
+    }
+
+
 def get_memory_info() -> Dict:
-    """Get memory information using psutil"""
+    """Get memory information using psutil, or /proc/meminfo directly with the procfs backend"""
     try:
-        virtual_memory = psutil.virtual_memory()
-        swap = psutil.swap_memory()
-
+        memory = _memory_from_procfs() or _memory_from_psutil()
         return {
-            "total": round(virtual_memory.total / (1024**3), 2),  # GB
-            "available": round(virtual_memory.available / (1024**3), 2),  # GB
-            "used": round(virtual_memory.used / (1024**3), 2),  # GB
-            "percentage": virtual_memory.percent,
+            "total": round(memory["total"] / (1024**3), 2),  # GB
+            "available": round(memory["available"] / (1024**3), 2),  # GB
+            "used": round(memory["used"] / (1024**3), 2),  # GB
+            "percentage": memory["percentage"],
             "swap": {
-                "total": round(swap.total / (1024**3), 2),  # GB
-                "used": round(swap.used / (1024**3), 2),  # GB
-                "free": round(swap.free / (1024**3), 2),  # GB
-                "percentage": swap.percent,
+                "total": round(memory["swap_total"] / (1024**3), 2),  # GB
+                "used": round(memory["swap_used"] / (1024**3), 2),  # GB
+                "free": round(memory["swap_free"] / (1024**3), 2),  # GB
+                "percentage": memory["swap_percentage"],
             },
         }
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error getting memory info: {str(e)}")
+        raise HTTPException(
+            status_code=500, detail=f"Error getting memory info: {str(e)}"
+        )
 
 
-def get_disk_info() -> List[Dict]:
+def get_cgroup_info() -> Optional[Dict]:
+    """
+    Get CPU and memory usage and limits of the cgroup SnakeOS runs in.
+    Returns None when there is no cgroup to report (not Linux, or the psutil backend).
+    """
+    if _procfs is None or not _procfs.cgroup.available:
+        return None
+    try:
+        cgroup = _procfs.cgroup
+        memory_used, memory_limit = cgroup.memory()
+        cpu_limit = cgroup.cpu_limit()
+        cores_used = cgroup.cpu_cores_used()
+        # Without a limit the cgroup can use the whole host, so usage is relative to that
+        memory_total = memory_limit or psutil.virtual_memory().total
+        cpu_total = cpu_limit or get_cpu_counts()["total_cores"]
+        return {
+            "version": cgroup.version,
+            "path": cgroup.path,
+            "cpu_usage": round(cores_used / cpu_total * 100, 2)
+            if cores_used is not None
+            else None,
+            "cpu_cores_used": round(cores_used, 3) if cores_used is not None else None,
+            "cpu_limit": round(cpu_limit, 2) if cpu_limit else None,
+            "memory_used": round(memory_used / (1024**3), 2),  # GB
+            "memory_limit": round(memory_limit / (1024**3), 2)
+            if memory_limit
+            else None,  # GB
+            "memory_percentage": round(memory_used / memory_total * 100, 1),
+        }
+    except Exception as e:
+        raise HTTPException(
+            status_code=500, detail=f"Error getting cgroup info: {str(e)}"
+        )
+
+
+def _disk_usage(partition) -> Dict:
+    usage = psutil.disk_usage(partition.mountpoint)
+    return {
+        "device": partition.device,
+        "mountpoint": partition.mountpoint,
+        "filesystem_type": partition.fstype,
+        "total": round(usage.total / (1024**3), 2),  # GB
+        "used": round(usage.used / (1024**3), 2),  # GB
+        "free": round(usage.free / (1024**3), 2),  # GB
+        "percentage": usage.percent,
+    }
+
+
+def collect_disk_info() -> Tuple[List[Dict], List[str]]:
+    """
+    Get usage of every partition, returning (disks, errors).
+    Each mountpoint gets SYSTEM_MOUNT_TIMEOUT seconds; a mount that misses its deadline is
+    reported in errors and not queried again until the stuck call returns.
+    """
     try:
+        deadline = time.monotonic() + settings.SYSTEM_MOUNT_TIMEOUT
+        futures = {}
+        errors = []
+        for partition in get_disk_partitions():
+            pending = _hung_mounts.get(partition.mountpoint)
+            if pending is not None:
+                if not pending.done():
+                    errors.append(f"{partition.mountpoint}: still unresponsive")
+                    continue
+                del _hung_mounts[partition.mountpoint]
+            futures[partition.mountpoint] = _mount_executor.submit(
+                _disk_usage, partition
+            )
+
         disk_info = []
-        for partition in psutil.disk_partitions(all=False):  # all=False to skip special filesystems
+        for mountpoint, future in futures.items():
             try:
-                usage = psutil.disk_usage(partition.mountpoint)
                 disk_info.append(
-                    {
-                        "device": partition.device,
-                        "mountpoint": partition.mountpoint,
-                        "filesystem_type": partition.fstype,
-                        "total": round(usage.total / (1024**3), 2),  # GB
-                        "used": round(usage.used / (1024**3), 2),  # GB
-                        "free": round(usage.free / (1024**3), 2),  # GB
-                        "percentage": usage.percent,
-                    }
+                    future.result(timeout=max(0.0, deadline - time.monotonic()))
+                )
+            except FuturesTimeoutError:
+                _hung_mounts[mountpoint] = future
+                errors.append(
+                    f"{mountpoint}: timed out after {settings.SYSTEM_MOUNT_TIMEOUT}s"
                 )
             except PermissionError:
                 # Skip partitions that we don't have access to
@@ -82,61 +315,140 @@ def get_disk_info() -> List[Dict]:
             except Exception:
                 # Skip problematic partitions
                 continue
-        return disk_info
+        return disk_info, errors
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error getting disk info: {str(e)}")
+        raise HTTPException(
+            status_code=500, detail=f"Error getting disk info: {str(e)}"
+        )
 
 
-def get_network_info() -> Dict:
-    try:
-        network_info = {"interfaces": {}, "io_counters": {}}
-
-        # Get network interfaces
-        for interface_name, addresses in psutil.net_if_addrs().items():
-            network_info["interfaces"][interface_name] = []
-            for addr in addresses:
-                network_info["interfaces"][interface_name].append(
-                    {
-                        "address": addr.address,
-                        "netmask": addr.netmask,
-                        "family": str(addr.family),
-                    }
-                )
+def get_disk_info() -> List[Dict]:
+    return collect_disk_info()[0]
 
-        # Get IO statistics
-        try:
-            io_counters = psutil.net_io_counters(pernic=True)
-            for nic, counters in io_counters.items():
-                network_info["io_counters"][nic] = {
-                    "bytes_sent": counters.bytes_sent,
-                    "bytes_recv": counters.bytes_recv,
-                    "packets_sent": counters.packets_sent,
-                    "packets_recv": counters.packets_recv,
-                    "errors_in": counters.errin,
-                    "errors_out": counters.errout,
-                    "drop_in": counters.dropin,
-                    "drop_out": counters.dropout,
-                }
-        except Exception as e:
-            network_info["io_counters"] = {"error": f"Network IO statistics not available: {str(e)}"}
 
-        return network_info
+def get_network_io_counters() -> Dict[str, Dict]:
+    """Get cumulative IO counters per interface, or an error entry when unavailable"""
+    try:
+        counters = _procfs.net_io_counters() if _procfs is not None else None
+        if counters is not None:
+            return counters
+        return {
+            nic: {
+                "bytes_sent": counters.bytes_sent,
+                "bytes_recv": counters.bytes_recv,
+                "packets_sent": counters.packets_sent,
+                "packets_recv": counters.packets_recv,
+                "errors_in": counters.errin,
+                "errors_out": counters.errout,
+                "drop_in": counters.dropin,
+                "drop_out": counters.dropout,
+            }
+            for nic, counters in psutil.net_io_counters(pernic=True).items()
+        }
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error getting network info: {str(e)}")
+        return {"error": f"Network IO statistics not available: {str(e)}"}
 
 
-def get_system_info() -> Dict:
+def get_network_info() -> Dict:
     try:
-        boot_time = datetime.fromtimestamp(psutil.boot_time()).strftime("%Y-%m-%d %H:%M:%S")
-        system_info = {
-            "platform": get_platform_info(),
-            "boot_time": boot_time,
-            "cpu": get_cpu_info(),
-            "memory": get_memory_info(),
-            "disks": get_disk_info(),
-            "network": get_network_info(),
+        return {
+            "interfaces": get_interface_addresses(),
+            "io_counters": get_network_io_counters(),
         }
+    except Exception as e:
+        raise HTTPException(
+            status_code=500, detail=f"Error getting network info: {str(e)}"
+        )
+
 
-        return system_info
+def get_disk_io_info() -> Dict[str, Dict]:
+    """Get cumulative I/O counters per block device"""
+    try:
+        return {
+            disk: {
+                "read_count": counters.read_count,
+                "write_count": counters.write_count,
+                "read_bytes": counters.read_bytes,
+                "write_bytes": counters.write_bytes,
+            }
+            for disk, counters in (psutil.disk_io_counters(perdisk=True) or {}).items()
+        }
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Error getting system info: {str(e)}")
+        raise HTTPException(
+            status_code=500, detail=f"Error getting disk IO info: {str(e)}"
+        )
+
+
+SYSTEM_SECTIONS: Dict[str, Callable] = {
+    "platform": get_platform_info,
+    "cpu": get_cpu_info,
+    "memory": get_memory_info,
+    "disks": collect_disk_info,
+    "disk_io": get_disk_io_info,
+    "network": get_network_info,
+    "cgroup": get_cgroup_info,
+}
+
+
+def get_system_info() -> Dict:
+    """
+    Run all section collectors concurrently, each bounded by SYSTEM_COLLECTOR_TIMEOUT.
+    A section that fails or misses its deadline is returned as None and described in "sections".
+    """
+    deadline = time.monotonic() + settings.SYSTEM_COLLECTOR_TIMEOUT
+    futures = {
+        name: _collector_executor.submit(collector)
+        for name, collector in SYSTEM_SECTIONS.items()
+    }
+    system_info = {"boot_time": get_boot_time(), "sections": {}}
+
+    for name, future in futures.items():
+        section = {"status": "ok", "error": None}
+        try:
+            result = future.result(timeout=max(0.0, deadline - time.monotonic()))
+            if name == "disks":
+                result, errors = result
+                if errors:
+                    section = {"status": "partial", "error": "; ".join(errors)}
+        except FuturesTimeoutError:
+            result = None
+            section = {
+                "status": "timeout",
+                "error": f"Timed out after {settings.SYSTEM_COLLECTOR_TIMEOUT}s",
+            }
+        except HTTPException as e:
+            result = None
+            section = {"status": "error", "error": e.detail}
+        except Exception as e:
+            result = None
+            section = {"status": "error", "error": str(e)}
+        system_info[name] = result
+        system_info["sections"][name] = section
+
+    return system_info
+
+
+def select_fields(system_info: Dict, fields: Iterable[str]) -> Dict:
+    """Copy only the requested dotted paths (plus sampled_at and matching section statuses)."""
+    selected: Dict = {"sections": {}}
+    for field in fields:
+        source, target = system_info, selected
+        keys = field.split(".")
+        for key in keys[:-1]:
+            source = source.get(key) if isinstance(source, dict) else None
+            if source is None:
+                break
+            target = target.setdefault(key, {})
+        else:
+            if isinstance(source, dict) and keys[-1] in source:
+                target[keys[-1]] = source[keys[-1]]
+        for name, status in system_info.get("sections", {}).items():
+            if (
+                name == field
+                or field.startswith(f"{name}.")
+                or name.startswith(f"{field}.")
+            ):
+                selected["sections"][name] = status
+    if "sampled_at" in system_info:
+        selected["sampled_at"] = system_info["sampled_at"]
+    return selected
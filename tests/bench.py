@@ -0,0 +1,38 @@
+"""
+Timing helpers of the benchmark tests. Their figures are printed, so run them with
+`python -m pytest -s -k benchmark` to see them; the assertions only compare orders of magnitude.
+"""
+
+import statistics
+import time
+from typing import Callable, List
+
+
+def per_call(
+    function: Callable[[], object], number: int = 200, repeat: int = 5
+) -> float:
+    """Median seconds per call of function over repeat rounds of number calls."""
+    rounds = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for _ in range(number):
+            function()
+        rounds.append((time.perf_counter() - started) / number)
+    return statistics.median(rounds)
+
+
+def percentile(samples: List[float], fraction: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def report(name: str, **figures: float) -> None:
+    """Print figures given in seconds as milliseconds or microseconds."""
+    parts = []
+    for label, value in figures.items():
+        parts.append(
+            f"{label}={value * 1e3:.2f}ms"
+            if value >= 1e-3
+            else f"{label}={value * 1e6:.1f}us"
+        )
+    print(f"\n[benchmark] {name}: " + ", ".join(parts))
@@ -0,0 +1,53 @@
+import asyncio
+import tempfile
+from pathlib import Path
+
+import pytest
+import uvicorn
+from fakeredis import FakeServer
+from fakeredis.aioredis import FakeRedis
+from tortoise import Tortoise
+
+from app import connections
+
+from .docker_engine import FakeEngine
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+async def db():
+    await Tortoise.init(db_url="sqlite://:memory:", modules={"models": ["app.models"]})
+    await Tortoise.generate_schemas()
+    yield
+    await Tortoise.close_connections()
+
+
+@pytest.fixture
+async def redis(monkeypatch):
+    """An in-memory stand-in for the shared Redis, as every worker would see it."""
+    server = FakeServer()
+    client = FakeRedis(server=server, decode_responses=True)
+    monkeypatch.setattr(connections, "_redis", client)
+    yield client
+    await client.aclose()
+
+
+@pytest.fixture
+async def engine():
+    fake = FakeEngine()
+    with tempfile.TemporaryDirectory() as directory:
+        socket = str(Path(directory) / "docker.sock")
+        server = uvicorn.Server(
+            uvicorn.Config(fake.app, uds=socket, lifespan="off", log_level="critical")
+        )
+        task = asyncio.create_task(server.serve())
+        while not server.started:
+            await asyncio.sleep(0.01)
+        fake.socket = socket
+        yield fake
+        server.should_exit = True
+        await task
@@ -0,0 +1,164 @@
+"""A fake Docker Engine API for tests, served by uvicorn on a unix socket."""
+
+import asyncio
+import json
+from collections import Counter
+from typing import Optional
+
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response, StreamingResponse
+from starlette.routing import Route
+
+IMAGE_ID = "sha256:" + "a" * 64
+
+
+def frame(stream: int, data: bytes) -> bytes:
+    return bytes([stream, 0, 0, 0]) + len(data).to_bytes(4, "big") + data
+
+
+def attrs(container_id: str, name: str, tty: bool = False) -> dict:
+    return {
+        "Id": container_id,
+        "Name": f"/{name}",
+        "State": {"Status": "running"},
+        "Image": IMAGE_ID,
+        "Created": "2026-01-01T00:00:00Z",
+        "Mounts": [],
+        "Config": {"Env": ["A=1"], "Cmd": ["nginx", "-g", "daemon off;"], "Tty": tty},
+        "HostConfig": {
+            "Privileged": False,
+            "RestartPolicy": {"Name": "always"},
+            "CpuShares": 0,
+        },
+        "NetworkSettings": {"Ports": {}, "Networks": {"bridge": {}}},
+    }
+
+
+class FakeEngine:
+    """The parts of the Docker Engine API the client uses, served by uvicorn on a unix socket."""
+
+    def __init__(self):
+        self.containers = {
+            "c1": attrs("c1", "web"),
+            "c2": attrs("c2", "tty", tty=True),
+        }
+        self.fail_list = False
+        self.stop_delay = 0.0
+        self.log_body = b""
+        # When set, /events streams what is put here until None instead of failing after one event
+        self.event_queue: Optional[asyncio.Queue] = None
+        # Calls per route, and the delay of each, standing in for dockerd's own work
+        self.calls: Counter = Counter()
+        self.latency = 0.0
+        routes = [
+            ("/version", self.version, ["GET"]),
+            ("/images/json", self.images, ["GET"]),
+            ("/images/{id}/json", self.image, ["GET"]),
+            ("/containers/json", self.list, ["GET"]),
+            ("/containers/{id}/json", self.inspect, ["GET"]),
+            ("/containers/{id}/stop", self.stop, ["POST"]),
+            ("/containers/{id}/logs", self.logs, ["GET"]),
+            ("/containers/{id}/stats", self.stats, ["GET"]),
+            ("/events", self.events, ["GET"]),
+        ]
+        self.app = Starlette(
+            routes=[
+                Route(path, self._counted(path, endpoint), methods=methods)
+                for path, endpoint, methods in routes
+            ]
+        )
+
+    def _counted(self, path: str, endpoint):
+        async def counted(request: Request) -> Response:
+            self.calls[path] += 1
+            if self.latency:
+                await asyncio.sleep(self.latency)
+            return await endpoint(request)
+
+        return counted
+
+    def _container(self, request: Request):
+        return self.containers.get(request.path_params["id"])
+
+    async def version(self, request: Request) -> Response:
+        return JSONResponse({"ApiVersion": "1.47"})
+
+    async def images(self, request: Request) -> Response:
+        return JSONResponse([{"Id": IMAGE_ID, "RepoTags": ["nginx:latest"]}])
+
+    async def image(self, request: Request) -> Response:
+        return JSONResponse({"Id": IMAGE_ID, "RepoTags": ["nginx:latest"]})
+
+    async def list(self, request: Request) -> Response:
+        if self.fail_list:
+            return JSONResponse({"message": "boom"}, status_code=500)
+        return JSONResponse(
+            [
+                {
+                    "Id": c["Id"],
+                    "Names": [c["Name"]],
+                    "ImageID": IMAGE_ID,
+                    "State": "running",
+                    "Created": 0,
+                }
+                for c in self.containers.values()
+            ]
+        )
+
+    async def inspect(self, request: Request) -> Response:
+        container = self._container(request)
+        if container is None:
+            return JSONResponse(
+                {"message": f"No such container: {request.path_params['id']}"},
+                status_code=404,
+            )
+        return JSONResponse(container)
+
+    async def stop(self, request: Request) -> Response:
+        self._container(request)
+        await asyncio.sleep(self.stop_delay)
+        return Response(status_code=204)
+
+    async def logs(self, request: Request) -> Response:
+        self._container(request)
+
+        async def body():
+            # Arbitrary chunk boundaries, cutting through headers and payloads
+            for start in range(0, len(self.log_body), 5):
+                yield self.log_body[start : start + 5]
+
+        return StreamingResponse(body())
+
+    async def stats(self, request: Request) -> Response:
+        self._container(request)
+
+        async def body():
+            yield json.dumps({"cpu_stats": {"online_cpus": 2}}) + "\n\n"
+            yield json.dumps({"pids_stats": {"current": 3}}) + "\n"
+
+        return StreamingResponse(body())
+
+    async def events(self, request: Request) -> Response:
+        if request.query_params.get("filters") == "bad":
+            return Response("invalid filter", status_code=400)
+
+        if self.event_queue is not None:
+            return StreamingResponse(self._queued_events(self.event_queue))
+
+        async def body():
+            yield (
+                json.dumps(
+                    {"Type": "container", "Action": "start", "Actor": {"ID": "c1"}}
+                )
+                + "\n"
+            )
+            # Dockerd going away mid-stream: the body ends without its terminating chunk
+            raise RuntimeError("daemon shutting down")
+
+        return StreamingResponse(body())
+
+    @staticmethod
+    async def _queued_events(queue: asyncio.Queue):
+        while (event := await queue.get()) is not None:
+            yield json.dumps(event) + "\n"
@@ -0,0 +1,195 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import httpx
+import pytest
+from fastapi import FastAPI
+
+from app import cache
+from app.alerts.engine import RULES_CHANNEL, AlertEngine, alert_series
+from app.alerts.router import router
+from app.auth.utils import get_current_user
+from app.docker.inventory import ContainerInventory
+from app.docker.schemas import ContainerListResponse
+from app.models import AlertRule, User
+from app.settings import settings
+
+pytestmark = pytest.mark.anyio
+
+
+def _container(
+    container_id: str, name: str, status: str = "running"
+) -> ContainerListResponse:
+    return ContainerListResponse(
+        id=container_id, name=name, image="nginx:latest", status=status
+    )
+
+
+def _event(container_id: str, action: str) -> dict:
+    return {"Type": "container", "Action": action, "Actor": {"ID": container_id}}
+
+
+class _Client:
+    """Answers the inspect the inventory makes for every event."""
+
+    def __init__(self, *containers: ContainerListResponse):
+        self.containers = {container.id: container for container in containers}
+
+    async def get_container(self, container_id: str) -> ContainerListResponse:
+        return self.containers[container_id]
+
+
+async def _apply(inventory: ContainerInventory, container_id: str, action: str) -> None:
+    await inventory._apply(
+        _Client(_container("a" * 64, "web"), _container("b" * 64, "db")),
+        _event(container_id, action),
+    )
+
+
+async def test_restart_series_counts_starts_after_a_die():
+    inventory = ContainerInventory()
+    inventory.ready = True
+    inventory.put(_container("a" * 64, "web"))
+    inventory.put(_container("b" * 64, "db"))
+    for action in ("start", "die", "start", "die", "start", "die"):
+        await _apply(inventory, "a" * 64, action)
+    assert inventory.restart_series() == {
+        "containers.web.restarts": 2.0,
+        "containers.db.restarts": 0.0,
+    }
+
+    await _apply(inventory, "a" * 64, "destroy")
+    assert inventory.restart_series() == {"containers.db.restarts": 0.0}
+
+
+async def test_restart_rule_fires_and_resolves(monkeypatch):
+    inventory = ContainerInventory()
+    inventory.ready = True
+    inventory.put(_container("a" * 64, "web"))
+    monkeypatch.setattr("app.alerts.engine.container_inventory", inventory)
+    engine = AlertEngine()
+    engine.upsert(
+        AlertRule(
+            id=1,
+            name="crash loop",
+            metric="containers",
+            aggregation="increase",
+            operator=">",
+            threshold=2,
+            window=60,
+            notifiers=[{"type": "log"}],
+            enabled=True,
+        )
+    )
+    start = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+    def tick(seconds: int) -> None:
+        engine.observe(start + timedelta(seconds=seconds), alert_series({}))
+
+    for second in range(0, 61, 10):
+        tick(second)
+    assert engine.states(firing_only=True) == []
+
+    # Three restarts within the window
+    for _ in range(3):
+        await _apply(inventory, "a" * 64, "die")
+        await _apply(inventory, "a" * 64, "start")
+    tick(70)
+    firing = engine.states(firing_only=True)
+    assert [(state["series"], state["value"]) for state in firing] == [
+        ("containers.web.restarts", 3.0)
+    ]
+
+    # No more restarts: the increase drops out of the window
+    for second in range(80, 200, 10):
+        tick(second)
+    assert engine.states(firing_only=True) == []
+    await engine.stop()
+
+
+async def _eventually(condition) -> None:
+    for _ in range(200):
+        if condition():
+            return
+        await asyncio.sleep(0.01)
+    raise AssertionError("condition not met")
+
+
+async def test_rule_changes_reach_other_workers(db, redis):
+    # Two workers sharing the database and Redis; only the second one evaluates samples
+    serving, evaluating = AlertEngine(), AlertEngine()
+    await serving.start()
+    await evaluating.start()
+    channel = cache.key(RULES_CHANNEL)
+    while dict(await redis.pubsub_numsub(channel))[channel] < 2:
+        await asyncio.sleep(0.01)
+    try:
+        rule = await AlertRule.create(
+            name="hot", metric="cpu.percent", aggregation="avg", threshold=90, window=60
+        )
+        serving.upsert(rule)
+        await serving.publish(rule.id)
+        await _eventually(lambda: rule.id in evaluating._rules)
+
+        rule.threshold = 95
+        await rule.save()
+        await serving.publish(rule.id)
+        await _eventually(lambda: evaluating._rules[rule.id].threshold == 95)
+
+        await rule.delete()
+        await serving.publish(rule.id)
+        await _eventually(lambda: rule.id not in evaluating._rules)
+    finally:
+        await serving.stop()
+        await evaluating.stop()
+
+
+def test_state_of_vanished_series_is_dropped():
+    engine = AlertEngine()
+    for rule_id, metric in ((1, "rates.network"), (2, "fleet.n1.rates.network")):
+        engine.upsert(
+            AlertRule(
+                id=rule_id,
+                name=metric,
+                metric=metric,
+                aggregation="avg",
+                operator=">",
+                threshold=1e9,
+                window=10,
+                notifiers=[{"type": "log"}],
+                enabled=True,
+            )
+        )
+    at = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    engine.observe(at, {"rates.network.veth1.rx": 1.0, "rates.network.eth0.rx": 1.0})
+    engine.observe(at, {"fleet.n1.rates.network.eth0.rx": 1.0}, source="fleet.n1.")
+    assert len(engine.states()) == 3
+
+    # The container behind veth1 went away
+    engine.observe(at + timedelta(seconds=1), {"rates.network.eth0.rx": 1.0})
+    assert sorted(state["series"] for state in engine.states()) == [
+        "fleet.n1.rates.network.eth0.rx",
+        "rates.network.eth0.rx",
+    ]
+
+
+async def test_only_admins_change_rules(db, monkeypatch):
+    monkeypatch.setattr(settings, "ADMIN_EMAILS", ["admin@example.com"])
+    app = FastAPI()
+    app.include_router(router)
+    rule = {
+        "name": "hook",
+        "metric": "cpu.percent",
+        "threshold": 90,
+        "window": 60,
+        "notifiers": [{"type": "webhook", "url": "http://169.254.169.254/latest"}],
+    }
+    async with httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app), base_url="http://test"
+    ) as client:
+        for email, expected in (("user@example.com", 403), ("admin@example.com", 201)):
+            app.dependency_overrides[get_current_user] = lambda: User(
+                id=1, email=email, username="u"
+            )
+            response = await client.post("/alerts/rules", json=rule)
+            assert response.status_code == expected
@@ -0,0 +1,111 @@
+import asyncio
+import json
+import time
+from datetime import datetime, timezone
+
+import pytest
+from fastapi.encoders import jsonable_encoder
+from tortoise.exceptions import IncompleteInstanceError
+
+from app.auth.cache import SessionCache, _user_from_row, _user_row
+from app.models import User
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_shared_session_row_has_no_password_hash(db):
+    user = await User.create(
+        email="ada@example.com", username="ada", hashed_password="$2b$12$secret"
+    )
+    # As stored in Redis
+    row = json.loads(json.dumps(jsonable_encoder(_user_row(user))))
+    assert "hashed_password" not in row
+
+    cached = _user_from_row(row)
+    assert (cached.id, cached.email, cached.is_active) == (
+        user.id,
+        "ada@example.com",
+        True,
+    )
+    assert cached.created_at == user.created_at.astimezone(timezone.utc)
+    assert isinstance(cached.updated_at, datetime)
+
+    # Only saves naming their fields are allowed, so the hash is never overwritten
+    with pytest.raises(IncompleteInstanceError):
+        await cached.save()
+    cached.is_active = False
+    await cached.save(update_fields=["is_active"])
+    stored = await User.get(id=user.id)
+    assert (stored.hashed_password, stored.is_active) == ("$2b$12$secret", False)
+
+
+async def _until(condition) -> None:
+    for _ in range(200):
+        if condition():
+            return
+        await asyncio.sleep(0.01)
+    raise AssertionError("condition not reached")
+
+
+async def test_sessions_are_shared_and_revoked_across_workers(db, redis):
+    user = await User.create(
+        email="ada@example.com", username="ada", hashed_password="$2b$12$secret"
+    )
+    first, second = SessionCache(100, 60), SessionCache(100, 60)
+    await first.start()
+    await second.start()
+    await asyncio.sleep(0.05)
+    expires_at = time.time() + 600
+    try:
+        for token in ("token-1", "token-2"):
+            await first.store(token, user, expires_at, await first.generation(user.id))
+        # The other worker finds the session without a database query
+        shared = await second.lookup("token-1")
+        assert (shared.id, shared.email, second.shared_hits) == (user.id, user.email, 1)
+        assert await second.lookup("token-1") is not None
+        assert second.hits == 1
+
+        await first.revoke_token("token-1")
+        await _until(lambda: len(second) == 0)
+        assert await second.lookup("token-1") is None
+        assert await second.lookup("token-2") is not None
+
+        await first.revoke_user(user.id)
+        await _until(lambda: len(second) == 0)
+        assert await second.lookup("token-2") is None
+        assert await redis.keys("snakeos:session:*") == []
+    finally:
+        await first.stop()
+        await second.stop()
+
+
+async def test_revocation_during_validation_is_not_undone(db, redis):
+    user = await User.create(
+        email="ada@example.com", username="ada", hashed_password="$2b$12$secret"
+    )
+    # Two workers; the revocation broadcast has not reached the second one yet
+    first, second = SessionCache(100, 60), SessionCache(100, 60)
+    expires_at = time.time() + 600
+
+    # Logout on the same worker while the session was being read from the database
+    generation = await first.generation(user.id)
+    await first.revoke_token("token-1")
+    await first.store("token-1", user, expires_at, generation)
+    assert first.get("token-1") is None
+
+    # Logout on another worker: its tombstone keeps the session from being shared again
+    generation = await second.generation(user.id)
+    await first.revoke_token("token-2")
+    await second.store("token-2", user, expires_at, generation)
+    assert second.get("token-2") is None
+    assert await first.lookup("token-2") is None
+
+    # The user changed on another worker
+    generation = await second.generation(user.id)
+    await first.revoke_user(user.id)
+    await second.store("token-3", user, expires_at, generation)
+    assert await first.lookup("token-3") is None
+
+    # Validations that start afterwards are cached again
+    await second.store("token-3", user, expires_at, await second.generation(user.id))
+    assert (await first.lookup("token-3")).id == user.id
@@ -0,0 +1,181 @@
+import asyncio
+import time
+
+import pytest
+from fastapi import HTTPException
+
+from app.docker.clients import DockerClient, DockerError
+from app.docker.clients.docker import _demultiplex
+
+from .bench import report
+from .docker_engine import attrs, frame
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def client(engine):
+    client = DockerClient(4, 5, host=f"unix://{engine.socket}")
+    yield client
+    await client.close()
+
+
+async def test_list_and_get(client):
+    containers = await client.list_containers(all_containers=True, detail="full")
+    assert [(c.id, c.name, c.image, c.restart_policy) for c in containers] == [
+        ("c1", "web", "nginx:latest", "always"),
+        ("c2", "tty", "nginx:latest", "always"),
+    ]
+    summary = await client.list_containers(detail="summary")
+    assert [c.name for c in summary] == ["web", "tty"] and summary[
+        0
+    ].restart_policy is None
+    assert (await client.get_container("c1")).command == "nginx -g daemon off;"
+
+
+async def test_error_responses_are_mapped(client, engine):
+    with pytest.raises(HTTPException) as raised:
+        await client.get_container("missing")
+    assert raised.value.status_code == 404
+    assert raised.value.detail == "Container not found: 404: No such container: missing"
+
+    engine.fail_list = True
+    with pytest.raises(HTTPException) as raised:
+        await client.list_containers()
+    assert (raised.value.status_code, raised.value.detail) == (
+        500,
+        "Failed to list containers: 500: boom",
+    )
+
+    with pytest.raises(DockerError) as raised:
+        await client._get_json("/containers/missing/json")
+    assert raised.value.status_code == 404
+
+
+async def test_unreachable_daemon_is_a_docker_error(engine):
+    client = DockerClient(host=f"unix://{engine.socket}.gone")
+    try:
+        with pytest.raises(DockerError) as raised:
+            await client.version()
+        assert raised.value.status_code is None
+    finally:
+        await client.close()
+
+
+async def test_multiplexed_logs(client, engine):
+    engine.log_body = (
+        frame(1, b"hello\n")
+        + frame(2, b"oops\n")
+        + frame(1, b"x" * 70000)
+        + frame(1, b"")
+    )
+    out = {"stdout": b"", "stderr": b""}
+    async with client.logs("c1") as pieces:
+        async for stream, data in pieces:
+            out[stream] += data
+    assert out == {"stdout": b"hello\n" + b"x" * 70000, "stderr": b"oops\n"}
+
+
+async def test_tty_logs_are_not_demultiplexed(client, engine):
+    engine.log_body = b"\x01raw tty output\n"
+    async with client.logs("c2") as pieces:
+        assert (
+            b"".join([data async for stream, data in pieces if stream == "stdout"])
+            == b"\x01raw tty output\n"
+        )
+
+
+async def test_demultiplex_split_header_and_payload():
+    async def chunks():
+        data = frame(2, b"abc") + frame(1, b"defgh")
+        yield data[:3]  # inside the first header
+        yield data[3:10]  # rest of the header and part of the payload
+        yield data[10:13]  # end of the payload and the start of the next header
+        yield data[13:]
+
+    assert [piece async for piece in _demultiplex(chunks())] == [
+        ("stderr", b"ab"),
+        ("stderr", b"c"),
+        ("stdout", b"defgh"),
+    ]
+
+
+async def test_missing_container_logs(client):
+    with pytest.raises(DockerError) as raised:
+        async with client.logs("missing"):
+            pass
+    assert raised.value.status_code == 404
+
+
+async def test_json_stream(client):
+    async with client.stats("c1") as frames:
+        assert [frame async for frame in frames] == [
+            {"cpu_stats": {"online_cpus": 2}},
+            {"pids_stats": {"current": 3}},
+        ]
+
+
+async def test_stream_errors(client):
+    with pytest.raises(DockerError) as raised:
+        async with client._stream_json("/events", {"filters": "bad"}):
+            pass
+    assert raised.value.status_code == 400
+
+    received = []
+    with pytest.raises(DockerError):
+        async with client.events({"type": ["container"]}) as events:
+            async for event in events:
+                received.append(event["Action"])
+    assert received == ["start"]
+
+
+async def test_slow_call_does_not_block_others(client, engine):
+    engine.stop_delay = 1.0
+    stop = asyncio.create_task(client.stop_container("c1"))
+    await asyncio.sleep(0.05)
+    started = time.monotonic()
+    await client.get_container("c1")
+    assert time.monotonic() - started < 0.5
+    assert not stop.done()
+
+    # Cancelling the caller cancels the request
+    started = time.monotonic()
+    stop.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await stop
+    assert time.monotonic() - started < 0.5
+
+
+async def test_benchmark_list_call_counts(engine):
+    engine.latency = 0.001
+    figures = {}
+    for count in (10, 150):
+        engine.containers = {f"c{i}": attrs(f"c{i}", f"app{i}") for i in range(count)}
+        client = DockerClient(10, 5, host=f"unix://{engine.socket}")
+        try:
+            for detail in ("summary", "full"):
+                engine.calls.clear()
+                started = time.perf_counter()
+                containers = await client.list_containers(detail=detail)
+                figures[f"{detail}_{count}"] = time.perf_counter() - started
+                assert len(containers) == count
+                assert engine.calls["/containers/json"] == 1
+                # Image metadata is fetched once and then served from the cache
+                assert engine.calls["/images/json"] == (detail == "summary")
+                assert engine.calls["/containers/{id}/json"] == (
+                    count if detail == "full" else 0
+                )
+
+            # The previous N+1 pattern: an inspect per container and two image inspects each
+            engine.calls.clear()
+            started = time.perf_counter()
+            for summary in await client._get_json("/containers/json"):
+                await client._get_json(f"/containers/{summary['Id']}/json")
+                for _ in range(2):
+                    await client._get_json(f"/images/{summary['ImageID']}/json")
+            figures[f"n+1_{count}"] = time.perf_counter() - started
+            assert sum(engine.calls.values()) == 1 + 3 * count
+        finally:
+            await client.close()
+    report("container listing", **figures)
+    assert figures["summary_150"] < figures["full_150"] < figures["n+1_150"]
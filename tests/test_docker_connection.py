@@ -0,0 +1,89 @@
+import asyncio
+import time
+
+import httpcore
+import pytest
+
+from app.docker.clients import DockerClient
+from app.docker.connection import DockerConnection
+
+from .bench import report
+
+pytestmark = pytest.mark.anyio
+
+
+class _Client:
+    def __init__(self):
+        self.closed = False
+
+    async def close(self) -> None:
+        self.closed = True
+
+
+async def test_retired_client_stays_open_for_running_requests():
+    connection = DockerConnection()
+    old = connection._client = _Client()
+    connection._retire()
+
+    # New callers reconnect while requests already holding the old client keep using it
+    assert not connection.connected
+    await asyncio.sleep(0.05)
+    assert not old.closed
+
+    # Shutdown doesn't wait for the grace period
+    current = connection._client = _Client()
+    await connection.stop()
+    assert old.closed and current.closed
+    assert not connection._retiring
+
+
+async def test_benchmark_shared_client_reuses_connections(engine, monkeypatch):
+    created = []
+    create_connection = httpcore.AsyncConnectionPool.create_connection
+
+    def counting(self, origin):
+        created.append(origin)
+        return create_connection(self, origin)
+
+    monkeypatch.setattr(httpcore.AsyncConnectionPool, "create_connection", counting)
+    host = f"unix://{engine.socket}"
+    concurrency = 8
+
+    async def call(client: DockerClient, index: int) -> None:
+        if index % 2:
+            await client.get_container("c1")
+        else:
+            await client.list_containers(detail="summary")
+
+    async def run(request, calls: int) -> float:
+        slots = asyncio.Semaphore(concurrency)
+
+        async def limited(index: int) -> None:
+            async with slots:
+                await request(index)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(limited(index) for index in range(calls)))
+        return (time.perf_counter() - started) / calls
+
+    shared = DockerClient(4, 5, host=host)
+    await shared.version()
+    try:
+        pooled = await run(lambda index: call(shared, index), 200)
+    finally:
+        await shared.close()
+    pooled_connections, created[:] = len(created), []
+
+    async def per_request(index: int) -> None:
+        # The previous behaviour: a new client per request, pinged before use
+        client = DockerClient(host=host)
+        try:
+            await client.version()
+            await call(client, index)
+        finally:
+            await client.close()
+
+    unpooled = await run(per_request, 40)
+    report("docker call", shared_client=pooled, client_per_request=unpooled)
+    assert pooled_connections <= 4 and len(created) == 40
+    assert pooled < unpooled
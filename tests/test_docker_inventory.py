@@ -0,0 +1,156 @@
+import asyncio
+
+import httpx
+import pytest
+from fastapi import FastAPI, HTTPException
+
+from app.auth.utils import get_current_user
+from app.docker import inventory as inventory_module
+from app.docker import routes
+from app.docker.clients import DockerClient
+from app.docker.connection import docker_connection
+from app.docker.inventory import ContainerInventory, container_inventory
+from app.docker.routes import router
+from app.docker.schemas import ContainerDetailResponse
+from app.models import User
+
+from .docker_engine import attrs
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def api():
+    app = FastAPI()
+    app.include_router(router)
+    app.dependency_overrides[get_current_user] = lambda: User(
+        id=1, email="user@example.com", username="u"
+    )
+    return httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app), base_url="http://test"
+    )
+
+
+async def test_inventory_reads_do_not_need_dockerd(api, monkeypatch):
+    async def unavailable():
+        raise HTTPException(status_code=503, detail="Docker is unavailable")
+
+    monkeypatch.setattr(routes, "get_docker_client", unavailable)
+    container_inventory.put(
+        ContainerDetailResponse(
+            id="c1",
+            name="web",
+            image="nginx",
+            status="running",
+            ports={},
+            environment=[],
+            volumes=[],
+            devices=[],
+        )
+    )
+    container_inventory.ready = True
+    try:
+        async with api:
+            response = await api.get("/docker/containers")
+            assert response.status_code == 200
+            assert [c["name"] for c in response.json()] == ["web"]
+            etag = response.headers["etag"]
+            response = await api.get(
+                "/docker/containers", headers={"If-None-Match": etag}
+            )
+            assert response.status_code == 304
+            assert (await api.get("/docker/containers/web")).status_code == 200
+
+            # Only the fallback to dockerd fails while it is down
+            container_inventory.ready = False
+            assert (await api.get("/docker/containers")).status_code == 503
+    finally:
+        await container_inventory.stop()
+
+
+async def _until(condition) -> None:
+    for _ in range(200):
+        if condition():
+            return
+        await asyncio.sleep(0.01)
+    raise AssertionError("condition not reached")
+
+
+def _event(action: str, container_id: str) -> dict:
+    return {"Type": "container", "Action": action, "Actor": {"ID": container_id}}
+
+
+@pytest.fixture
+async def inventory(engine, monkeypatch):
+    """An inventory following the fake engine, served by the routes."""
+    client = DockerClient(host=f"unix://{engine.socket}")
+    monkeypatch.setattr(docker_connection, "_client", client)
+    monkeypatch.setattr(inventory_module.settings, "DOCKER_RECONNECT_INTERVAL", 0.01)
+    monkeypatch.setattr(routes, "container_inventory", ContainerInventory())
+    engine.event_queue = asyncio.Queue()
+    yield routes.container_inventory
+    await routes.container_inventory.stop()
+    await client.close()
+
+
+async def test_inventory_follows_events(inventory, engine):
+    await inventory.start()
+    await _until(lambda: inventory.ready)
+    assert sorted(c.name for c in inventory.list()) == ["tty", "web"]
+    assert inventory.resyncs == 1
+
+    version = inventory.version
+    engine.containers["c3"] = attrs("c3", "db")
+    engine.event_queue.put_nowait(_event("create", "c3"))
+    await _until(lambda: inventory.version > version)
+    assert inventory.find("db").id == "c3"
+
+    del engine.containers["c3"]
+    engine.event_queue.put_nowait(_event("destroy", "c3"))
+    await _until(lambda: inventory.find("c3") is None)
+
+    # A reconnection reloads the whole inventory
+    engine.containers["c4"] = attrs("c4", "cache")
+    engine.event_queue.put_nowait(None)
+    await _until(lambda: inventory.resyncs == 2 and inventory.ready)
+    assert sorted(c.name for c in inventory.list()) == ["cache", "tty", "web"]
+
+
+async def test_inventory_survives_unexpected_errors(inventory, monkeypatch):
+    resync = inventory._resync
+    calls = []
+
+    async def failing_once(client):
+        calls.append(client)
+        if len(calls) == 1:
+            raise ValueError("unexpected response")
+        await resync(client)
+
+    monkeypatch.setattr(inventory, "_resync", failing_once)
+    await inventory.start()
+    await _until(lambda: inventory.ready)
+    assert len(calls) == 2
+
+
+async def test_etag_changes_with_the_inventory(inventory, engine, api):
+    await inventory.start()
+    await _until(lambda: inventory.ready)
+    async with api:
+        response = await api.get("/docker/containers", params={"all_containers": True})
+        assert response.status_code == 200
+        etag = response.headers["etag"]
+        assert response.headers["cache-control"] == "private, no-cache"
+
+        response = await api.get("/docker/containers", headers={"If-None-Match": etag})
+        assert (response.status_code, response.headers["etag"]) == (304, etag)
+        response = await api.get(
+            "/docker/containers", headers={"If-None-Match": f'"other", {etag}'}
+        )
+        assert response.status_code == 304
+
+        engine.containers["c3"] = attrs("c3", "db")
+        engine.event_queue.put_nowait(_event("start", "c3"))
+        await _until(lambda: inventory.find("c3") is not None)
+        response = await api.get("/docker/containers", headers={"If-None-Match": etag})
+        assert response.status_code == 200 and response.headers["etag"] != etag
+        assert sorted(c["name"] for c in response.json()) == ["db", "tty", "web"]
@@ -0,0 +1,121 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+
+from app.docker import logs
+from app.docker.clients import DockerClient
+from app.docker.logs import MAX_LINE_BYTES, ContainerLogs, _sse_events
+
+from .docker_engine import frame
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def container_logs(engine):
+    container_logs = ContainerLogs()
+    container_logs._client = DockerClient(4, 5, host=f"unix://{engine.socket}")
+    yield container_logs
+    await container_logs.stop()
+
+
+async def _pieces(*pieces):
+    for piece in pieces:
+        yield piece
+
+
+async def _events(*pieces):
+    return [event async for event in _sse_events(_pieces(*pieces))]
+
+
+async def test_sse_events_hold_partial_lines():
+    assert await _events(
+        ("stdout", b"one\ntw"),
+        ("stderr", b"err"),
+        ("stdout", b"o\nthree\nfo"),
+        ("stderr", b"or\n"),
+        ("stdout", b"ur"),
+    ) == [
+        "event: stdout\ndata: one\n\n",
+        "event: stdout\ndata: two\ndata: three\n\n",
+        "event: stderr\ndata: error\n\n",
+        # The last partial line is sent when the log ends
+        "event: stdout\ndata: four\n\n",
+    ]
+
+
+async def test_sse_events_strip_carriage_returns():
+    assert await _events(("stdout", b"progress 1\r\rprogress 2\r\ndone\r\n")) == [
+        "event: stdout\ndata: progress 1progress 2\ndata: done\n\n"
+    ]
+
+
+async def test_sse_events_split_long_lines():
+    line = b"x" * (2 * MAX_LINE_BYTES + 10)
+    events = await _events(
+        ("stdout", line[:100]), ("stdout", line[100:]), ("stdout", b"\nnext\n")
+    )
+    assert events == [
+        f"event: stdout\ndata: {'x' * MAX_LINE_BYTES}\n\n",
+        f"event: stdout\ndata: {'x' * MAX_LINE_BYTES}\n\n",
+        "event: stdout\ndata: xxxxxxxxxx\ndata: next\n\n",
+    ]
+
+
+async def test_sse_stream_from_dockerd(container_logs, engine):
+    engine.log_body = (
+        frame(1, b"hello\r\nwor") + frame(2, b"oops\n") + frame(1, b"ld\n")
+    )
+    response = await container_logs.stream("c1", None, None, False, False, "sse")
+    assert response.media_type == "text/event-stream"
+    assert [event async for event in response.body_iterator] == [
+        "event: stdout\ndata: hello\n\n",
+        "event: stderr\ndata: oops\n\n",
+        "event: stdout\ndata: world\n\n",
+    ]
+
+
+async def test_missing_container_is_404(container_logs):
+    with pytest.raises(HTTPException) as raised:
+        await container_logs.stream("missing", None, None, True, False, "text")
+    assert raised.value.status_code == 404
+    assert container_logs.followers == 0
+
+
+async def test_followers_are_capped(container_logs, monkeypatch):
+    monkeypatch.setattr(logs.settings, "DOCKER_LOGS_MAX_FOLLOWERS", 1)
+    following = await container_logs.stream("c1", None, None, True, False, "text")
+    with pytest.raises(HTTPException) as raised:
+        await container_logs.stream("c2", None, None, True, False, "text")
+    assert raised.value.status_code == 503
+    assert raised.value.headers == {"Retry-After": "5"}
+    assert (container_logs.followers, container_logs.rejected) == (1, 1)
+
+    # Reading a log without following it is not capped
+    await container_logs.stream("c2", None, None, False, False, "text")
+    assert container_logs.followers == 1
+
+    await following.background()
+    assert container_logs.followers == 0
+    await container_logs.stream("c2", None, None, True, False, "text")
+    assert container_logs.followers == 1
+
+
+async def test_disconnect_before_body_releases_follower(container_logs, engine):
+    engine.log_body = frame(1, b"hello\n")
+    response = await container_logs.stream("c1", None, None, True, False, "text")
+    assert container_logs.followers == 1
+
+    async def receive():
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        # The client is gone before the response starts
+        await asyncio.Event().wait()
+
+    await response({"type": "http"}, receive, send)
+    assert container_logs.followers == 0
+    # The request to dockerd was closed as well
+    pool = container_logs._client.client._transport._pool
+    assert all(c.is_idle() or c.is_closed() for c in pool.connections)
@@ -0,0 +1,45 @@
+import asyncio
+from contextlib import asynccontextmanager
+
+import pytest
+
+from app.docker import stats as stats_module
+from app.docker.stats import ContainerStats, _Stream
+
+pytestmark = pytest.mark.anyio
+
+
+class _Client:
+    """Sends a malformed frame on the first stream, a valid one on the next."""
+
+    def __init__(self):
+        self.opened = 0
+
+    @asynccontextmanager
+    async def stats(self, container_id: str):
+        self.opened += 1
+        first = self.opened == 1
+
+        async def frames():
+            if first:
+                raise ValueError("Expecting value: line 1 column 1 (char 0)")
+            yield {"cpu_stats": {"online_cpus": 2}, "pids_stats": {"current": 4}}
+
+        yield frames()
+
+
+async def test_follow_survives_a_malformed_frame(monkeypatch):
+    monkeypatch.setattr(stats_module.settings, "DOCKER_RECONNECT_INTERVAL", 0.01)
+    container_stats = ContainerStats()
+    container_stats._client = _Client()
+    stream = _Stream("web")
+    task = asyncio.create_task(container_stats._follow("c1", stream))
+    try:
+        for _ in range(100):
+            if stream.samples or task.done():
+                break
+            await asyncio.sleep(0.01)
+        assert not task.done()
+        assert stream.samples[-1]["pids"] == 4
+    finally:
+        task.cancel()
@@ -0,0 +1,47 @@
+import gzip
+import json
+from collections import deque
+from datetime import datetime, timedelta, timezone
+
+import httpx
+import pytest
+
+from app.fleet import agent as agent_module
+from app.fleet.agent import FleetAgent
+
+pytestmark = pytest.mark.anyio
+
+START = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+def _snapshot(second: int) -> dict:
+    return {"sampled_at": START + timedelta(seconds=second), "cpu": {"percentage": 1.0}}
+
+
+async def test_push_keeps_samples_taken_while_sending(monkeypatch):
+    agent = FleetAgent()
+    agent._samples = deque(maxlen=4)
+    agent._inventory_due = float("inf")
+    for second in range(3):
+        agent.record_snapshot(_snapshot(second))
+    sent = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        batch = json.loads(gzip.decompress(request.content))
+        sent.append([sample["sampled_at"] for sample in batch["samples"]])
+        # Samples keep arriving during the request and rotate the full buffer
+        for second in range(3, 6):
+            agent.record_snapshot(_snapshot(second))
+        return httpx.Response(204)
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    monkeypatch.setattr(agent_module, "http_client", lambda: client)
+    monkeypatch.setattr(agent_module.settings, "FLEET_CENTRAL_URL", "http://central")
+    await agent.push()
+    await client.aclose()
+
+    assert len(sent[0]) == 3
+    # Everything taken after the batch was built stays buffered for the next push
+    assert [sample["sampled_at"] for _, sample in agent._samples] == [
+        START + timedelta(seconds=second) for second in range(3, 6)
+    ]
@@ -0,0 +1,184 @@
+import asyncio
+import gzip
+import json
+
+import httpx
+import pytest
+from fastapi import FastAPI
+
+from app.fleet import registry
+from app.fleet.registry import fleet_registry
+from app.fleet.router import router
+from app.fleet.schemas import FleetBatch
+from app.settings import settings
+
+pytestmark = pytest.mark.anyio
+
+TOKEN = "fleet-secret"
+
+
+@pytest.fixture
+def app(monkeypatch):
+    monkeypatch.setattr(settings, "FLEET_TOKEN", TOKEN)
+    monkeypatch.setattr(settings, "FLEET_MAX_BATCH_BYTES", 1024)
+    app = FastAPI()
+    app.include_router(router)
+    return app
+
+
+async def _post(app: FastAPI, chunks, headers=()):
+    """POST /fleet/ingest with a body sent in chunks; returns (status, chunks the app read)."""
+    read = 0
+    response = {}
+
+    async def receive():
+        nonlocal read
+        read += 1
+        if read > len(chunks):
+            return {"type": "http.disconnect"}
+        return {
+            "type": "http.request",
+            "body": chunks[read - 1],
+            "more_body": read < len(chunks),
+        }
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            response["status"] = message["status"]
+
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "POST",
+        "scheme": "http",
+        "path": "/fleet/ingest",
+        "raw_path": b"/fleet/ingest",
+        "query_string": b"",
+        "root_path": "",
+        "headers": [(b"authorization", f"Bearer {TOKEN}".encode()), *headers],
+        "client": ("127.0.0.1", 1234),
+        "server": ("testserver", 80),
+    }
+    await app(scope, receive, send)
+    return response["status"], read
+
+
+async def test_declared_length_over_the_cap_is_refused_unread(app):
+    status, read = await _post(app, [b"{}"], [(b"content-length", b"4096")])
+    assert (status, read) == (413, 0)
+
+
+async def test_streamed_body_over_the_cap_stops_being_read(app):
+    status, read = await _post(app, [b"x" * 512] * 10)
+    assert (status, read) == (413, 3)
+
+
+async def test_compressed_batch_over_the_cap_is_refused(app):
+    body = gzip.compress(
+        json.dumps({"node": "n1", "snapshot": {"pad": "x" * 4096}}).encode()
+    )
+    assert len(body) < 1024
+    status, _ = await _post(app, [body], [(b"content-encoding", b"gzip")])
+    assert status == 413
+
+
+async def test_batch_is_ingested(app, monkeypatch):
+    batches = []
+
+    async def ingest(batch):
+        batches.append(batch)
+
+    monkeypatch.setattr(fleet_registry, "ingest", ingest)
+    body = gzip.compress(json.dumps({"node": "n1"}).encode())
+    status, _ = await _post(
+        app, [body[:10], body[10:]], [(b"content-encoding", b"gzip")]
+    )
+    assert status == 204
+    assert [batch.node for batch in batches] == ["n1"]
+
+
+async def test_live_queries_only_go_to_configured_urls(monkeypatch):
+    requests = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append((str(request.url), request.headers["authorization"]))
+        return httpx.Response(200, json={"cpu": {"percentage": 1.0}})
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    monkeypatch.setattr(registry, "http_client", lambda: client)
+    monkeypatch.setattr(settings, "FLEET_TOKEN", TOKEN)
+    monkeypatch.setattr(settings, "FLEET_NODE_URLS", {"n1": "http://10.0.0.5:8000/"})
+    fleet = registry.FleetRegistry()
+    # A URL sent by an agent is not trusted with the token
+    for name in ("n1", "n2"):
+        await fleet.ingest(
+            FleetBatch.model_validate({"node": name, "url": "http://attacker.example"})
+        )
+
+    nodes = await fleet.query("system", live=True)
+    assert requests == [
+        (
+            f"http://10.0.0.5:8000{settings.API_V1_STR}/fleet/local/system",
+            f"Bearer {TOKEN}",
+        )
+    ]
+    assert (nodes["n1"]["status"], nodes["n2"]["status"]) == ("ok", "cached")
+    assert [node["url"] for node in await fleet.nodes()] == [
+        "http://10.0.0.5:8000",
+        None,
+    ]
+    await client.aclose()
+
+
+async def test_workers_share_nodes_through_redis(redis, monkeypatch):
+    observed = []
+
+    class Engine:
+        @staticmethod
+        def observe(at, values, source):
+            observed.append((source, values))
+
+    monkeypatch.setattr(registry, "alert_engine", Engine)
+    monkeypatch.setattr(registry.sampler, "_leader", True)
+    monkeypatch.setattr(settings, "ALERTS_ENABLED", True)
+    # Two workers of the central instance; only the leaseholder evaluates alerts
+    first, second = registry.FleetRegistry(), registry.FleetRegistry()
+    await second.start()
+    await asyncio.sleep(0.05)
+
+    container = {"id": "c1", "name": "web", "image": "nginx", "state": "running"}
+    await first.ingest(
+        FleetBatch.model_validate(
+            {
+                "node": "n1",
+                "version": "1.0",
+                "snapshot": {"cpu": {"percentage": 5.0}},
+                "containers": [container],
+                "samples": [
+                    {"sampled_at": "2026-01-01T00:00:00Z", "values": {"cpu": 5.0}}
+                ],
+            }
+        )
+    )
+    # Containers are only sent now and then; the other worker's push keeps them
+    await second.ingest(
+        FleetBatch.model_validate(
+            {"node": "n1", "snapshot": {"cpu": {"percentage": 7.0}}}
+        )
+    )
+
+    for worker in (first, second):
+        [node] = await worker.nodes()
+        assert (node["name"], node["pushes"], node["stale"]) == ("n1", 2, False)
+        nodes = await worker.query("containers")
+        assert nodes["n1"]["containers"] == [container]
+        nodes = await worker.query("system")
+        assert nodes["n1"]["system"] == {"cpu": {"percentage": 7.0}}
+
+    for _ in range(50):
+        if observed:
+            break
+        await asyncio.sleep(0.01)
+    assert observed == [("fleet.n1.", {"fleet.n1.cpu": 5.0})]
+    await second.stop()
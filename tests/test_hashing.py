@@ -0,0 +1,102 @@
+import asyncio
+import time
+
+import httpx
+import pytest
+from fastapi import FastAPI, HTTPException
+
+from app.auth import hashing
+from app.auth.hashing import PasswordHasher, _hash, _verify_and_update
+
+from .bench import percentile, report
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_bulk_hashing_leaves_a_worker_for_logins(monkeypatch):
+    monkeypatch.setattr(hashing.settings, "BCRYPT_ROUNDS", 8)
+    monkeypatch.setattr(hashing.settings, "PASSWORD_HASH_BULK_CHUNK", 4)
+    hasher = PasswordHasher(2, 64)
+    await hasher.start()
+    try:
+        passwords = [f"password-{i}" for i in range(40)]
+        bulk = asyncio.create_task(hasher.hash_many(passwords))
+        most_pending = 0
+        while hasher.pending == 0:
+            await asyncio.sleep(0.001)
+        # A login submitted mid-import runs on the free worker
+        login = asyncio.create_task(hasher.hash("login"))
+        while not login.done():
+            most_pending = max(most_pending, hasher.pending)
+            await asyncio.sleep(0.001)
+        assert not bulk.done()
+        assert most_pending <= 2
+
+        hashes = await bulk
+        assert len(hashes) == len(passwords)
+        assert all(
+            _verify_and_update(password, hashed, 8)[0]
+            for password, hashed in zip(passwords, hashes)
+        )
+    finally:
+        hasher.stop()
+
+
+async def test_benchmark_login_flood_leaves_other_requests_flat(monkeypatch):
+    monkeypatch.setattr(hashing.settings, "BCRYPT_ROUNDS", 9)
+    app = FastAPI()
+
+    @app.get("/ping")
+    async def ping():
+        await asyncio.sleep(0.001)  # stands in for the I/O of a cheap endpoint
+        return {}
+
+    async def p99(client: httpx.AsyncClient) -> float:
+        latencies = []
+        for _ in range(100):
+            started = time.perf_counter()
+            await client.get("/ping")
+            latencies.append(time.perf_counter() - started)
+        return percentile(latencies, 0.99)
+
+    _hash("password", 4)  # loads the bcrypt backend
+    started = time.perf_counter()
+    _hash("password", 9)
+    one_hash = time.perf_counter() - started
+
+    hasher = PasswordHasher(1, 8)
+    await hasher.start()
+    rejected = []
+
+    async def login():
+        try:
+            await hasher.hash("password")
+        except HTTPException as e:
+            rejected.append(e.status_code)
+
+    async def inline():
+        # The previous behaviour: bcrypt on the event loop
+        for _ in range(4):
+            _hash("password", 9)
+            await asyncio.sleep(0)
+
+    try:
+        async with httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=app), base_url="http://test"
+        ) as client:
+            idle = await p99(client)
+            flood = asyncio.gather(*(login() for _ in range(12)))
+            await asyncio.sleep(0)
+            pooled = await p99(client)
+            await flood
+            blocking = asyncio.create_task(inline())
+            await asyncio.sleep(0)
+            on_loop = await p99(client)
+            await blocking
+    finally:
+        hasher.stop()
+
+    report("p99 of /ping", idle=idle, pool=pooled, event_loop=on_loop, hash=one_hash)
+    # Over the pool's bound, logins fail fast instead of queueing
+    assert rejected == [503] * 4
+    assert pooled < one_hash / 2 < on_loop
@@ -0,0 +1,36 @@
+from app.system.utils.history import MetricHistory
+
+
+def test_churned_series_are_dropped_after_a_full_ring():
+    history = MetricHistory(capacity=10, max_series=100)
+    # A container per sample, each adding its own veth series next to a steady one
+    for sample in range(50):
+        history.record(
+            float(sample), {"cpu.percent": 1.0, f"rates.network.veth{sample}.rx": 2.0}
+        )
+    assert len(history.names) <= 11
+    assert "cpu.percent" in history.names
+    assert "rates.network.veth0.rx" not in history.names
+    assert "rates.network.veth49.rx" in history.names
+    # Series still in the ring keep their values
+    [(_, timestamps, values)] = history.window("rates.network.veth45", 0, 100)
+    assert [t for t, v in zip(timestamps, values) if v == v] == [45.0]
+
+
+def test_series_count_is_capped():
+    history = MetricHistory(capacity=1000, max_series=5)
+    for sample in range(20):
+        history.record(float(sample), {"cpu.percent": 1.0, f"veth{sample}.rx": 2.0})
+    # The least recently written series made room for each new one
+    assert history.names == [
+        "cpu.percent",
+        "veth16.rx",
+        "veth17.rx",
+        "veth18.rx",
+        "veth19.rx",
+    ]
+
+    # Every kept series still written: a new one is not recorded rather than evicting them
+    kept = history.names
+    history.record(20.0, {**{name: 1.0 for name in kept}, "veth20.rx": 2.0})
+    assert history.names == kept
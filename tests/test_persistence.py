@@ -0,0 +1,89 @@
+import math
+import time
+from datetime import datetime, timezone
+
+import pytest
+
+from app.models import MetricRollup
+from app.system.utils import persistence
+from app.system.utils.history import MetricHistory
+from app.system.utils.persistence import MetricStore, _Aggregate, _utc
+
+pytestmark = pytest.mark.anyio
+
+BUCKET = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+def _aggregate(*values: float) -> _Aggregate:
+    aggregate = _Aggregate(values[0])
+    for value in values[1:]:
+        aggregate.add(value)
+    return aggregate
+
+
+async def test_rollups_merge_with_existing_and_duplicate_buckets(db):
+    # Two writers flushing the same bucket, e.g. the previous and the current sampler leaseholder
+    await MetricStore()._upsert_rollups(
+        [("1m", BUCKET, "cpu.percent", _aggregate(10, 20))]
+    )
+    await MetricStore()._upsert_rollups(
+        [
+            ("1m", BUCKET, "cpu.percent", _aggregate(40)),
+            ("1m", BUCKET, "cpu.percent", _aggregate(5, 25)),
+            ("1h", BUCKET, "cpu.percent", _aggregate(7)),
+        ]
+    )
+
+    rows = {row.resolution: row for row in await MetricRollup.all()}
+    assert len(rows) == 2
+    minute = rows["1m"]
+    assert (minute.min, minute.max, minute.count) == (5, 40, 5)
+    assert minute.avg == pytest.approx(20)
+    assert (rows["1h"].min, rows["1h"].max, rows["1h"].avg, rows["1h"].count) == (
+        7,
+        7,
+        7,
+        1,
+    )
+
+
+async def test_open_bucket_comes_from_history(db, monkeypatch):
+    history = MetricHistory(capacity=1000, max_series=100)
+    monkeypatch.setattr(persistence, "history", history)
+    now = time.time()
+    monkeypatch.setattr(persistence.time, "time", lambda: now)
+    minute = math.floor(now / 60) * 60
+    # An earlier minute is persisted; the current one only exists in memory so far
+    await MetricStore()._upsert_rollups(
+        [("1m", _utc(minute - 60), "memory.percentage", _aggregate(10, 30))]
+    )
+    for offset, value in ((0, 40.0), (1, 60.0)):
+        history.record(
+            minute + offset, {"memory.percentage": value, "memory.free": 1.0}
+        )
+
+    [series] = await MetricStore().query("memory", minute - 60, now + 1, 60)
+    assert series["metric"] == "memory.percentage"
+    assert series["timestamps"] == [minute - 60, minute]
+    assert series["values"] == [20, 50]
+    assert (series["min"], series["max"]) == ([10, 40], [30, 60])
+
+
+async def test_failed_rollup_write_is_retried_without_double_counting(db, monkeypatch):
+    store = MetricStore()
+    store._closed = [
+        ("1m", BUCKET, "cpu.percent", _aggregate(10, 20)),
+        ("1m", BUCKET, "cpu.percent", _aggregate(30)),
+    ]
+    upsert_sql = persistence._rollup_upsert_sql
+    monkeypatch.setattr(
+        persistence, "_rollup_upsert_sql", lambda *args: "INSERT INTO nowhere"
+    )
+    with pytest.raises(Exception):
+        await store.flush()
+
+    monkeypatch.setattr(persistence, "_rollup_upsert_sql", upsert_sql)
+    await store.flush()
+    [row] = await MetricRollup.all()
+    assert (row.min, row.max, row.count) == (10, 30, 3)
+    assert row.avg == pytest.approx(20)
@@ -0,0 +1,67 @@
+import os
+
+import psutil
+import pytest
+
+from app.system.utils import procfs
+from app.system.utils.procfs import ProcfsBackend
+
+from .bench import per_call, report
+
+pytestmark = pytest.mark.skipif(
+    not os.path.exists("/proc/stat"), reason="needs Linux /proc"
+)
+
+
+def test_files_are_opened_once(monkeypatch):
+    backend = ProcfsBackend()
+    opened = []
+    real_open = os.open
+
+    def counting_open(path, *args, **kwargs):
+        opened.append(path)
+        return real_open(path, *args, **kwargs)
+
+    monkeypatch.setattr(procfs.os, "open", counting_open)
+    for _ in range(10):
+        assert backend.cpu_percent() is not None
+        assert backend.memory() is not None
+        assert backend.net_io_counters() is not None
+        if backend.cgroup.available:
+            backend.cgroup.memory()
+            backend.cgroup.cpu_cores_used()
+    assert opened == []
+
+
+def test_readings_agree_with_psutil():
+    backend = ProcfsBackend()
+    memory = backend.memory()
+    assert memory["total"] == psutil.virtual_memory().total
+    assert memory["swap_total"] == psutil.swap_memory().total
+    total, per_core = backend.cpu_percent()
+    assert len(per_core) == psutil.cpu_count() and total == 0.0
+    assert (
+        backend.net_io_counters().keys() == psutil.net_io_counters(pernic=True).keys()
+    )
+
+
+def test_benchmark_procfs_against_psutil():
+    backend = ProcfsBackend()
+    pairs = {
+        "cpu": (
+            backend.cpu_percent,
+            lambda: (psutil.cpu_percent(), psutil.cpu_percent(percpu=True)),
+        ),
+        "memory": (
+            backend.memory,
+            lambda: (psutil.virtual_memory(), psutil.swap_memory()),
+        ),
+        "network": (
+            backend.net_io_counters,
+            lambda: psutil.net_io_counters(pernic=True),
+        ),
+    }
+    for name, (fast, reference) in pairs.items():
+        figures = {"procfs": per_call(fast), "psutil": per_call(reference)}
+        report(f"{name} reading", **figures)
+        assert figures["procfs"] < figures["psutil"]
@@ -0,0 +1,104 @@
+import asyncio
+
+import httpx
+import pytest
+from fastapi import Depends, FastAPI
+
+from app.auth import ratelimit
+from app.auth.ratelimit import MemoryBackend, RateLimiter, parse_limit, rate_limit
+
+pytestmark = pytest.mark.anyio
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = _Clock()
+    monkeypatch.setattr(ratelimit.time, "monotonic", clock)
+    return clock
+
+
+def test_parse_limit():
+    assert parse_limit("10/minute") == (10, 10 / 60)
+    assert parse_limit(" 5 / second ") == (5, 5.0)
+    for limit in ("0/minute", "ten/minute", "10/fortnight", "10"):
+        with pytest.raises(ValueError):
+            parse_limit(limit)
+
+
+async def test_memory_bucket_refills_evenly(clock):
+    backend = MemoryBackend(100)
+    # A burst of up to the capacity, then one token per second
+    assert [await backend.take("k", 3, 1.0) for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert await backend.take("k", 3, 1.0) == pytest.approx(1.0)
+    clock.now += 0.5
+    assert await backend.take("k", 3, 1.0) == pytest.approx(0.5)
+    clock.now += 0.5
+    assert await backend.take("k", 3, 1.0) == 0.0
+    assert await backend.take("k", 3, 1.0) > 0
+    # Other principals have their own bucket
+    assert await backend.take("other", 3, 1.0) == 0.0
+
+
+async def test_memory_backend_is_bounded(clock):
+    backend = MemoryBackend(4)
+    for i in range(4):
+        await backend.take(f"idle-{i}", 2, 1.0)
+    # Buckets that refilled completely are dropped first
+    clock.now += 10
+    await backend.take("new", 2, 1.0)
+    assert len(backend) == 1
+    # Clients that are all still active: the oldest half goes
+    for i in range(10):
+        await backend.take(f"active-{i}", 2, 1.0)
+    assert len(backend) <= 4
+
+
+async def test_rejection_has_retry_after(clock, monkeypatch):
+    monkeypatch.setattr(ratelimit.settings, "RATE_LIMITS", {"login": "2/minute"})
+    monkeypatch.setattr(ratelimit, "rate_limiter", RateLimiter())
+    app = FastAPI()
+
+    @app.post("/login", dependencies=[Depends(rate_limit("login", per_user=False))])
+    async def login():
+        return {}
+
+    async with httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app), base_url="http://test"
+    ) as client:
+        assert [(await client.post("/login")).status_code for _ in range(2)] == [
+            200,
+            200,
+        ]
+        response = await client.post("/login")
+        assert response.status_code == 429
+        # One token every 30 seconds
+        assert response.headers["retry-after"] == "30"
+        clock.now += 29.5
+        response = await client.post("/login")
+        assert (response.status_code, response.headers["retry-after"]) == (429, "1")
+        clock.now += 0.5
+        assert (await client.post("/login")).status_code == 200
+    assert ratelimit.rate_limiter.rejected == {"login": 2}
+
+
+async def test_redis_buckets_are_shared_between_workers(redis, monkeypatch):
+    monkeypatch.setattr(ratelimit.settings, "RATE_LIMIT_BACKEND", "redis")
+    first, second = RateLimiter(), RateLimiter()
+    assert await first.take("login:ip:1", 2, 20.0) == 0.0
+    assert await second.take("login:ip:1", 2, 20.0) == 0.0
+    # The bucket is empty for every worker, and refills from the Redis clock
+    wait = await first.take("login:ip:1", 2, 20.0)
+    assert 0 < wait <= 0.05
+    assert await second.take("login:ip:1", 2, 20.0) > 0
+    assert len(first.memory) == len(second.memory) == 0
+    await asyncio.sleep(0.06)
+    assert await second.take("login:ip:1", 2, 20.0) == 0.0
+    assert 0 < await redis.pttl("snakeos:ratelimit:login:ip:1") <= 1100
@@ -0,0 +1,107 @@
+import asyncio
+import importlib
+from datetime import datetime, timedelta, timezone
+
+import httpx
+import pytest
+from fastapi import FastAPI
+
+from app.auth.utils import get_current_user
+from app.models import User
+from app.system.utils.sampler import SystemSampler
+
+# The package exports the APIRouter under the module's name
+system_router = importlib.import_module("app.system.router")
+
+
+def test_leader_only_listeners_skip_adopted_snapshots():
+    sampler = SystemSampler(5)
+    seen, persisted = [], []
+    sampler.add_listener(seen.append)
+    sampler.add_listener(persisted.append, leader_only=True)
+
+    # Another worker holds the lease: its snapshot feeds the local listeners only
+    sampler._publish({"sampled_at": datetime.now(timezone.utc)})
+    assert (len(seen), len(persisted)) == (1, 0)
+
+    sampler._leader = True
+    sampler._publish({"sampled_at": datetime.now(timezone.utc)})
+    assert (len(seen), len(persisted)) == (2, 1)
+
+    sampler.remove_listener(persisted.append)
+    sampler._publish({"sampled_at": datetime.now(timezone.utc)})
+    assert (len(seen), len(persisted)) == (3, 1)
+
+
+@pytest.mark.anyio
+async def test_lease_handover_between_workers(redis):
+    workers = [SystemSampler(0.05), SystemSampler(0.05)]
+    collected = [0, 0]
+    for index, worker in enumerate(workers):
+        worker._worker_id = f"worker-{index}"
+
+        def collect(index=index):
+            collected[index] += 1
+            return {"worker": index}
+
+        worker._collect = collect
+    leader, follower = workers
+
+    # The leaseholder samples; the other worker adopts its shared snapshot
+    await leader._tick()
+    await follower._tick()
+    assert leader.leader and not follower.leader
+    assert collected == [1, 0]
+    assert follower.peek() == leader.peek()
+    assert await redis.get("snakeos:system:sampler") == "worker-0"
+
+    # A released lease (the leaseholder stopped) is taken at the follower's next interval
+    await leader._release_lease()
+    await follower._tick()
+    assert follower.leader and collected == [1, 1]
+    await leader._tick()
+    assert not leader.leader and leader.peek()["worker"] == 1
+
+    # So is one that expired (the leaseholder died), once the shared snapshot is gone too
+    await asyncio.sleep(0.2)
+    await leader._tick()
+    assert leader.leader and collected == [2, 1]
+    await follower._tick()
+    assert not follower.leader and follower.peek()["worker"] == 0
+
+
+@pytest.mark.anyio
+async def test_include_never_collects_on_request(monkeypatch):
+    sampler = SystemSampler(5)
+    collected = []
+
+    def collect():
+        collected.append(1)
+        return {"memory": {"total": len(collected)}, "sections": {}}
+
+    sampler._collect = collect
+    monkeypatch.setattr(system_router, "sampler", sampler)
+    app = FastAPI()
+    app.include_router(system_router.router)
+    app.dependency_overrides[get_current_user] = lambda: User(
+        id=1, email="user@example.com", username="u"
+    )
+
+    async with httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app), base_url="http://test"
+    ) as api:
+        # Nothing sampled yet: the request goes through the sampler
+        response = await api.get("/api/v1/system/?include=memory")
+        assert response.json()["memory"] == {"total": 1}
+
+        # A stale sample is served rather than running collectors beside the sampler
+        sampler._publish(
+            {
+                "memory": {"total": 0},
+                "sections": {},
+                "sampled_at": datetime.now(timezone.utc) - timedelta(minutes=5),
+            }
+        )
+        response = await api.get("/api/v1/system/?include=memory&max_age=1")
+        assert response.json()["memory"] == {"total": 0}
+        assert collected == [1]
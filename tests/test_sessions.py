@@ -0,0 +1,130 @@
+import asyncio
+import time
+from datetime import datetime, timedelta
+
+import pytest
+from tortoise import Tortoise, connections
+
+from app.auth import sweeper
+from app.auth.sweeper import SessionSweeper
+from app.auth.utils import hash_token
+from app.connections import migrate_sessions
+from app.models import Session, User
+
+from .bench import report
+
+pytestmark = pytest.mark.anyio
+
+
+async def _add_history(user: User, start: int, count: int) -> None:
+    """Logged-out and expired sessions, as they pile up between sweeps."""
+    now = datetime.utcnow()
+    expired = (now - timedelta(days=1)).isoformat()
+    await connections.get("default").execute_many(
+        "INSERT INTO sessions (user_id, token_hash, is_active, expires_at, created_at, updated_at) "
+        "VALUES (?, ?, ?, ?, ?, ?)",
+        [
+            (user.id, f"{i:064x}", i % 2, expired, now.isoformat(), now.isoformat())
+            for i in range(start, start + count)
+        ],
+    )
+
+
+def _lookup(token: str):
+    # The predicate of authenticate_token
+    return Session.filter(
+        token_hash=hash_token(token), is_active=True, expires_at__gt=datetime.utcnow()
+    )
+
+
+async def _median_lookup(token: str, number: int = 200) -> float:
+    latencies = []
+    for _ in range(number):
+        started = time.perf_counter()
+        assert await _lookup(token).first() is not None
+        latencies.append(time.perf_counter() - started)
+    return sorted(latencies)[number // 2]
+
+
+async def test_benchmark_session_lookup_stays_flat(db):
+    user = await User.create(
+        email="ada@example.com", username="ada", hashed_password="x"
+    )
+    await Session.create(
+        user=user,
+        token_hash=hash_token("token"),
+        expires_at=datetime.utcnow() + timedelta(hours=1),
+    )
+
+    figures = {}
+    total = 0
+    for size in (1_000, 100_000):
+        await _add_history(user, total, size - total)
+        total = size
+        figures[f"{size}_sessions"] = await _median_lookup("token")
+    report("session lookup", **figures)
+    assert figures["100000_sessions"] < 3 * figures["1000_sessions"]
+
+    query = _lookup("token")
+    plan = await connections.get("default").execute_query_dict(
+        "EXPLAIN QUERY PLAN " + query.sql(),
+        [hash_token("token"), 1, datetime.utcnow().isoformat()],
+    )
+    assert any("USING INDEX" in row["detail"] for row in plan)
+
+
+async def _session_columns() -> set:
+    rows = await connections.get("default").execute_query_dict(
+        "PRAGMA table_info(sessions)"
+    )
+    return {row["name"] for row in rows}
+
+
+async def test_old_sessions_table_is_recreated():
+    await Tortoise.init(db_url="sqlite://:memory:", modules={"models": ["app.models"]})
+    try:
+        await Tortoise.generate_schemas()
+        user = await User.create(
+            email="ada@example.com", username="ada", hashed_password="x"
+        )
+        # The table as created before sessions were stored by digest
+        await connections.get("default").execute_script(
+            "DROP TABLE sessions;"
+            "CREATE TABLE sessions (id INTEGER PRIMARY KEY, user_id INT, token TEXT, "
+            "is_active INT, expires_at TEXT, created_at TEXT, updated_at TEXT);"
+            f"INSERT INTO sessions (user_id, token, is_active) VALUES ({user.id}, 'jwt', 1);"
+        )
+        await migrate_sessions()
+        await Tortoise.generate_schemas()
+        assert "token_hash" in await _session_columns()
+        assert await Session.all().count() == 0
+
+        # The current schema is left alone
+        await Session.create(
+            user=user, token_hash=hash_token("t"), expires_at=datetime.utcnow()
+        )
+        await migrate_sessions()
+        assert await Session.all().count() == 1
+    finally:
+        await Tortoise.close_connections()
+
+
+async def test_only_the_leader_sweeps(db, monkeypatch):
+    user = await User.create(
+        email="ada@example.com", username="ada", hashed_password="x"
+    )
+    await Session.create(
+        user=user, token_hash=hash_token("t"), expires_at=datetime.utcnow()
+    )
+    monkeypatch.setattr(sweeper.settings, "SESSION_SWEEP_INTERVAL", 0.01)
+    monkeypatch.setattr(sweeper.sampler, "_leader", False)
+    session_sweeper = SessionSweeper()
+    await session_sweeper.start()
+    try:
+        await asyncio.sleep(0.1)
+        assert await Session.all().count() == 1
+        monkeypatch.setattr(sweeper.sampler, "_leader", True)
+        await asyncio.sleep(0.1)
+        assert await Session.all().count() == 0
+    finally:
+        await session_sweeper.stop()